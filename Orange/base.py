@@ -1,16 +1,63 @@
 import inspect
+import threading
 from collections import Iterable
+from contextlib import contextmanager
+from itertools import islice
 
 import numpy as np
 import scipy
+import scipy.sparse as sp
 
-from Orange.data import Table, Storage, Instance, Value
+from Orange.data import Table, Storage, Instance, Value, Domain
+from Orange.data.table import _supports_group_transform, _table_nbytes
+from Orange.misc.cache import LRUCache
 from Orange.data.util import one_hot
 from Orange.misc.wrapper_meta import WrapperMeta
 from Orange.preprocess import (RemoveNaNClasses, Continuize,
                                RemoveNaNColumns, SklImpute)
 
-__all__ = ["Learner", "Model", "SklLearner", "SklModel"]
+__all__ = ["Learner", "Model", "SklLearner", "SklModel", "PredictionPlan",
+           "reuse_preprocessing"]
+
+_preprocessing = threading.local()
+
+"""Cache of preprocessed tables that persists across calls of
+Learner.preprocess. It is disabled (None) unless enabled by
+Learner.enable_preprocessing_cache."""
+_preprocessing_cache = None
+
+
+@contextmanager
+def reuse_preprocessing():
+    """
+    Within the context, learners that apply the same preprocessor (the same
+    object) to the same table reuse the result instead of computing it again.
+    Learners with the same (e.g. default) preprocessors thus preprocess the
+    data only once when fitted on the same table, for instance on a fold in
+    cross validation.
+
+    Preprocessors are assumed to be deterministic. Results are kept until
+    the context is exited; the context applies to the current thread.
+    """
+    memo = getattr(_preprocessing, "memo", None)
+    _preprocessing.memo = {}
+    try:
+        yield
+    finally:
+        _preprocessing.memo = memo
+
+
+def _preprocessing_cache_key(data, preprocessors):
+    """
+    Return the key of preprocessed `data` in the cache of preprocessed data,
+    or `None` if the cache is disabled or the data cannot be cached.
+    """
+    if _preprocessing_cache is None or not isinstance(data, Table) or \
+            any(sp.issparse(x) for x in (data.X, data._Y, data.W)):
+        return None
+    return (type(data), data.domain, len(data),
+            data.checksum(include_metas=False),
+            tuple(id(pp) for pp in preprocessors))
 
 
 class Learner:
@@ -107,10 +154,77 @@ class Learner:
 
     def preprocess(self, data):
         """Apply the `preprocessors` to the data"""
-        for pp in self.active_preprocessors:
-            data = pp(data)
+        preprocessors = tuple(self.active_preprocessors)
+        key = preprocessors and _preprocessing_cache_key(data, preprocessors)
+        if key:
+            cached = _preprocessing_cache.get(key)
+            if cached is not None:
+                return cached[1]
+        data = self._apply_preprocessors(data, preprocessors)
+        if key:
+            # Keep the preprocessors, so their ids are not reused
+            _preprocessing_cache[key] = preprocessors, data
         return data
 
+    @staticmethod
+    def _apply_preprocessors(data, preprocessors):
+        memo = getattr(_preprocessing, "memo", None)
+        for pp in preprocessors:
+            if memo is None:
+                data = pp(data)
+                continue
+            key = id(pp), id(data)
+            if key not in memo:
+                # Keep the preprocessor and the data, so ids are not reused
+                memo[key] = pp, data, pp(data)
+            data = memo[key][2]
+        return data
+
+    @classmethod
+    def enable_preprocessing_cache(cls, max_size=256 * 2 ** 20):
+        """
+        Enable caching of preprocessed data across calls of learners.
+
+        Results of preprocessing are kept in a cache with at most
+        `max_size` bytes of data, keyed by the checksum and the domain of
+        the data and by the preprocessors (the same objects, in the same
+        order); the least recently used results are evicted first. Learners
+        that are fitted on the same data repeatedly (for instance, with
+        different parameters) then only preprocess it once.
+
+        Preprocessors are assumed to be deterministic. Meta attributes are
+        not included in the checksum, and sparse data is not cached. Cached
+        tables are shared between learners and must not be modified.
+
+        :param max_size: maximal size of cached data in bytes
+        :type max_size: int
+        """
+        global _preprocessing_cache
+        _preprocessing_cache = LRUCache(max_size,
+                                        lambda item: _table_nbytes(item[1]))
+
+    @classmethod
+    def disable_preprocessing_cache(cls):
+        """Disable and clear the cache of preprocessed data."""
+        global _preprocessing_cache
+        _preprocessing_cache = None
+
+    @classmethod
+    def invalidate_preprocessing_cache(cls, data=None):
+        """
+        Remove the results of preprocessing `data` (or, if `data` is
+        `None`, all results) from the cache of preprocessed data.
+        """
+        cache = _preprocessing_cache
+        if cache is None:
+            return
+        if data is None:
+            cache.clear()
+            return
+        key = _preprocessing_cache_key(data, ())
+        if key is not None:
+            cache.discard_if(lambda cached: cached[:4] == key[:4])
+
     @property
     def active_preprocessors(self):
         yield from self.preprocessors
@@ -118,6 +232,24 @@ class Learner:
                 self.preprocessors is not type(self).preprocessors):
             yield from type(self).preprocessors
 
+    def leave_one_out(self, data):
+        """
+        Return predictions for leave-one-out testing on `data`, computed
+        without fitting a model for each instance.
+
+        Learners that can compute predictions of models fitted on all but
+        one instance in a single pass over the data (e.g. by subtracting
+        the instance from the statistics of the model) override this method.
+        The default implementation returns `None`, so a model is fitted
+        for each instance.
+
+        :param data: data
+        :type data: Orange.data.Table
+        :return: `None` or a tuple with predicted values and probabilities
+            (`None` for regression) for each instance
+        """
+        return None
+
     def __repr__(self):
         return self.name
 
@@ -225,10 +357,197 @@ class Model:
         else:  # ret == Model.ValueProbs
             return value, probs
 
+    def prediction_plan(self, domain=None):
+        """
+        Return a :obj:`PredictionPlan` for repeated prediction of data from
+        `domain` (by default, the domain of the data the model was fitted
+        on).
+        """
+        return PredictionPlan(self, domain)
+
     def __repr__(self):
         return self.name
 
 
+class PredictionPlan:
+    """
+    Prediction of data from a fixed domain with a model.
+
+    The conversion of data from `domain` to the model's domain is prepared
+    in advance. Attributes that appear in `domain` are copied by indices.
+    Attributes computed by transformations that support group transforms
+    (see :obj:`~Orange.preprocess.transformation.Transformation`) are
+    computed from arrays, all transformations of the same type and depth
+    at once. Other attributes are computed by :obj:`Table.from_table`.
+
+    Predictions are the same as those of calling the model with a table
+    or a data instance from `domain`, but without constructing tables in
+    intermediate domains. Since only values of attributes are given, the
+    model's attributes may not be, or be computed from, class variables or
+    meta attributes of `domain`; such models are refused. Variables that
+    are computed by other callables than transformations are assumed to
+    depend only on attributes.
+
+    :param model: model
+    :type model: Orange.base.Model
+    :param domain: the domain of data; by default, the domain of the data
+        the model was fitted on
+    :type domain: Orange.data.Domain
+    """
+    def __init__(self, model, domain=None):
+        self.model = model
+        if domain is None:
+            domain = getattr(model, "original_domain", None) or model.domain
+        self.domain = domain
+        self._use_storage = \
+            type(model).predict_storage is not Model.predict_storage
+
+        # Columns of the working array (one for each variable) are filled
+        # with columns of the data, with variables computed by from_table
+        # and then by group transforms, one level of nesting after another
+        self._slots = {}
+        self._columns, self._column_slots = [], []
+        self._computed = []
+        self._levels = []
+        for var in model.domain.attributes:
+            self._resolve(var)
+        self._computed_slots = [self._slots[var][0]
+                                for var in self._computed]
+        self._computed_domain = Domain(self._computed)
+        self._target_slots = [self._slots[var][0]
+                              for var in model.domain.attributes]
+
+    def _source_index(self, var):
+        """
+        Return the index of the variable in `domain` or None; raise an
+        error if the variable is a class variable or a meta attribute.
+        """
+        index = self.domain.index(var) if var in self.domain else None
+        if index is not None and not 0 <= index < len(self.domain.attributes):
+            raise ValueError(
+                "model's attributes depend on '{}', which is not an attribute "
+                "of the domain".format(var.name))
+        return index
+
+    def _resolve(self, var):
+        """Assign a slot to the variable; return its level of nesting"""
+        if var in self._slots:
+            return self._slots[var][1]
+        level = 0
+        index = self._source_index(var)
+        compute_value = var.compute_value
+        if index is not None:
+            self._columns.append(index)
+            self._column_slots.append(len(self._slots))
+        elif index is None and _supports_group_transform(compute_value):
+            level = self._resolve(compute_value.variable) + 1
+            if len(self._levels) < level:
+                self._levels.append({})
+            group = self._levels[level - 1].setdefault(
+                type(compute_value), ([], [], []))
+            group[0].append(compute_value)
+            group[1].append(self._slots[compute_value.variable][0])
+            group[2].append(len(self._slots))
+        else:
+            source = getattr(compute_value, "variable", None)
+            while source is not None and self._source_index(source) is None:
+                source = getattr(source.compute_value, "variable", None)
+            self._computed.append(var)
+        self._slots[var] = (len(self._slots), level)
+        return level
+
+    def transform(self, X):
+        """
+        Convert an array of values of attributes from `domain` to an array
+        of values of attributes of the model's domain.
+        """
+        X = np.asarray(X, dtype=float)
+        n_rows = X.shape[0]
+        columns = np.empty((n_rows, len(self._slots)))
+        columns[:, self._column_slots] = X[:, self._columns]
+        if self._computed:
+            data = self._table(self.domain, X)
+            columns[:, self._computed_slots] = \
+                Table.from_table(self._computed_domain, data).X
+        for groups in self._levels:
+            for cls, (transformations, sources, targets) in groups.items():
+                columns[:, targets] = \
+                    cls.transform_group(transformations, columns[:, sources])
+        # Models may depend on the memory layout (e.g. through BLAS)
+        return np.ascontiguousarray(columns[:, self._target_slots])
+
+    @staticmethod
+    def _table(domain, X):
+        n_rows = X.shape[0]
+        return Table.from_numpy(
+            domain, X,
+            np.full((n_rows, len(domain.class_vars)), np.nan),
+            np.array([[var.Unknown for var in domain.metas]] * n_rows,
+                     dtype=object).reshape(n_rows, len(domain.metas)))
+
+    def predict(self, X, ret=Model.Value):
+        """
+        Predict a 2d array (or a single row) of values of attributes from
+        `domain`; the result is the same as that of calling the model with
+        a table with these values.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != len(self.domain.attributes):
+            raise ValueError("invalid number of columns ({} != {})".format(
+                X.shape[1], len(self.domain.attributes)))
+        X = self.transform(X)
+        if self._use_storage:
+            return self.model(self._table(self.model.domain, X), ret)
+        return self.model(X, ret)
+
+    def _row(self, row):
+        if isinstance(row, Instance):
+            row = row.x if row.domain == self.domain \
+                else Instance(self.domain, row).x
+        else:
+            row = [var.to_val(val)
+                   for var, val in zip(self.domain.attributes, row)]
+        return np.array(row, dtype=float)[:len(self.domain.attributes)]
+
+    def _unwrap(self, prediction, i, ret):
+        """Return the prediction for the i-th row"""
+        if ret == Model.Probs:
+            return prediction[i]
+        if ret == Model.ValueProbs:
+            prediction, probs = prediction
+        value = prediction[i]
+        if len(self.model.domain.class_vars) == 1:
+            value = Value(self.model.domain.class_var, value)
+        return value if ret == Model.Value else (value, probs[i])
+
+    def predict_instance(self, row, ret=Model.Value):
+        """
+        Predict a single data instance, given as an :obj:`Instance` or as a
+        list of values of attributes from `domain`.
+
+        The predicted value is returned as a :obj:`Value` (or as an array
+        of values for multi-target models) and probabilities as a 1d array
+        (2d for multi-target models).
+        """
+        return self._unwrap(self.predict(self._row(row), ret), 0, ret)
+
+    def iter_predict(self, rows, ret=Model.Value, batch_size=100):
+        """
+        Predict data instances (see :obj:`predict_instance`) from an
+        iterable, e.g. a queue of requests, in batches of `batch_size`
+        instances, and yield predictions for individual instances as
+        :obj:`predict_instance` returns them.
+        """
+        rows = iter(rows)
+        while True:
+            batch = [self._row(row) for row in islice(rows, batch_size)]
+            if not batch:
+                return
+            prediction = self.predict(np.vstack(batch), ret)
+            for i in range(len(batch)):
+                yield self._unwrap(prediction, i, ret)
+
+
 class SklModel(Model, metaclass=WrapperMeta):
     used_vals = None
 
@@ -295,6 +614,18 @@ class SklLearner(Learner, metaclass=WrapperMeta):
 
         return data
 
+    def _leave_one_out_data(self, data):
+        """Return data preprocessed for leave-one-out shortcuts, or `None`
+        if preprocessing of folds would depend on the left-out instance"""
+        if any(all(pp is not default for default in SklLearner.preprocessors)
+               for pp in self.active_preprocessors) \
+                or len(data.domain.class_vars) != 1 or data.has_weights() \
+                or scipy.sparse.issparse(data.X) \
+                or np.isnan(data.X).any() or np.isnan(data.Y).any():
+            return None
+        # Default preprocessors do not depend on data without missing values
+        return self.preprocess(data)
+
     def __call__(self, data):
         m = super().__call__(data)
         m.used_vals = [np.unique(y) for y in data.Y[:, None].T]
@@ -346,6 +677,68 @@ class KNNBase:
         super().__init__(preprocessors=preprocessors)
         self.params = vars()
 
+    def leave_one_out(self, data):
+        """Leave-one-out predictions from the neighbours of each instance,
+        excluding the instance itself. If the k-th and the next neighbour
+        are equally distant, the neighbours chosen by a model fitted without
+        the instance can differ, so such instances are predicted by a model
+        fitted on the remaining data."""
+        params = self.params
+        k = params["n_neighbors"]
+        if params["metric"] == "mahalanobis" or \
+                params["weights"] not in ("uniform", "distance") or \
+                k >= len(data):
+            return None
+        orig_data = data
+        data = self._leave_one_out_data(data)
+        if data is None:
+            return None
+        X, y = data.X, data.Y
+        skl_model = self.__wraps__(**params).fit(X, y)
+        n_found = min(k + 2, len(X))
+        dist, ind = skl_model.kneighbors(X, n_found)
+        # Remove the instance or, if it is not among the nearest neighbours
+        # (because of duplicates), the farthest neighbour
+        own = ind == np.arange(len(X))[:, None]
+        own[~own.any(axis=1), -1] = True
+        dist = dist[~own].reshape(-1, n_found - 1)
+        ind = ind[~own].reshape(-1, n_found - 1)
+        if n_found - 1 > k:
+            ties = np.flatnonzero(dist[:, k - 1] == dist[:, k])
+        else:
+            ties = []
+        dist, ind = dist[:, :k], ind[:, :k]
+        if params["weights"] == "distance":
+            # Same as in scikit-learn: exact matches get all the weight
+            with np.errstate(divide="ignore"):
+                weights = 1 / dist
+            inf_mask = np.isinf(weights)
+            inf_row = np.any(inf_mask, axis=1)
+            weights[inf_row] = inf_mask[inf_row]
+        else:
+            weights = np.ones_like(dist)
+        neighbours_y = y[ind]
+        if data.domain.has_continuous_class:
+            predicted = np.sum(weights * neighbours_y, axis=1) / \
+                np.sum(weights, axis=1)
+            probs = None
+        else:
+            probs = np.column_stack(
+                [np.sum(weights * (neighbours_y == value), axis=1)
+                 for value in range(len(data.domain.class_var.values))])
+            probs /= probs.sum(axis=1)[:, None]
+            predicted = probs.argmax(axis=1)
+        for i in ties:
+            rest = np.ones(len(orig_data), dtype=bool)
+            rest[i] = False
+            model = self(orig_data[rest])
+            if probs is None:
+                predicted[i] = model(orig_data[i:i + 1], model.Value)[0]
+            else:
+                value, prob = model(orig_data[i:i + 1], model.ValueProbs)
+                predicted[i], probs[i] = value[0], prob[0]
+        return predicted, probs
+
     def fit(self, X, Y, W=None):
         if self.params["metric_params"] is None and \
                         self.params.get("metric") == "mahalanobis":
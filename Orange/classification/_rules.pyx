@@ -0,0 +1,109 @@
+#cython: embedsignature=True
+#cython: boundscheck=False
+#cython: wraparound=False
+#cython: infer_types=True
+#cython: cdivision=True
+
+
+import numpy as np
+cimport numpy as np
+
+# Codes of selector operators; see Orange.classification.rules.compile_rules
+cpdef enum:
+    OP_EQ = 0
+    OP_NE = 1
+    OP_LE = 2
+    OP_GE = 3
+
+
+cdef inline bint covers(const double[:, :] X, Py_ssize_t i, Py_ssize_t rule,
+                        const np.intp_t[:] offsets, const np.intp_t[:] columns,
+                        const np.int8_t[:] ops, const double[:] values) nogil:
+    cdef:
+        Py_ssize_t j
+        double x, value
+        np.int8_t op
+    for j in range(offsets[rule], offsets[rule + 1]):
+        x = X[i, columns[j]]
+        value = values[j]
+        op = ops[j]
+        # Comparisons with nan follow Python's: only != is true
+        if op == OP_EQ:
+            if not x == value:
+                return False
+        elif op == OP_NE:
+            if not x != value:
+                return False
+        elif op == OP_LE:
+            if not x <= value:
+                return False
+        elif not x >= value:
+            return False
+    return True
+
+
+def first_covering_rules(const double[:, :] X, const np.intp_t[:] offsets,
+                         const np.intp_t[:] columns, const np.int8_t[:] ops,
+                         const double[:] values):
+    """
+    Return the index of the first rule that covers each row of X, or the
+    number of rules for rows that are not covered.
+
+    Selectors of rule `r` are at indices from `offsets[r]` to
+    `offsets[r + 1]` of `columns`, `ops` and `values`.
+    """
+    cdef:
+        Py_ssize_t i, rule
+        Py_ssize_t n_rules = offsets.shape[0] - 1
+        np.intp_t[:] first = np.empty(X.shape[0], dtype=np.intp)
+
+    with nogil:
+        for i in range(X.shape[0]):
+            for rule in range(n_rules):
+                if covers(X, i, rule, offsets, columns, ops, values):
+                    break
+            else:
+                rule = n_rules
+            first[i] = rule
+    return np.asarray(first)
+
+
+def covering_rules_probabilities(const double[:, :] X,
+                                 const np.intp_t[:] offsets,
+                                 const np.intp_t[:] columns,
+                                 const np.int8_t[:] ops,
+                                 const double[:] values,
+                                 const double[:, :] weighted_probabilities,
+                                 const double[:] weights,
+                                 const double[:] default_probabilities):
+    """
+    Return the sums of `weighted_probabilities` of the rules that cover
+    each row of X, divided by the sum of their `weights`; rows that are
+    not covered by any rule get `default_probabilities`.
+
+    Rules are described as in :obj:`first_covering_rules`.
+    """
+    cdef:
+        Py_ssize_t i, rule, k, hits
+        Py_ssize_t n_rules = offsets.shape[0] - 1
+        Py_ssize_t n_classes = default_probabilities.shape[0]
+        double total_weight
+        double[:, :] probabilities = np.zeros((X.shape[0], n_classes))
+
+    with nogil:
+        for i in range(X.shape[0]):
+            hits = 0
+            total_weight = 0
+            for rule in range(n_rules):
+                if covers(X, i, rule, offsets, columns, ops, values):
+                    for k in range(n_classes):
+                        probabilities[i, k] += weighted_probabilities[rule, k]
+                    total_weight += weights[rule]
+                    hits += 1
+            if hits:
+                for k in range(n_classes):
+                    probabilities[i, k] /= total_weight
+            else:
+                for k in range(n_classes):
+                    probabilities[i, k] = default_probabilities[k]
+    return np.asarray(probabilities)
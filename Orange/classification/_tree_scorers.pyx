@@ -16,6 +16,24 @@ cdef extern from "numpy/npy_math.h":
 cpdef enum:
     NULL_BRANCH = -1
 
+# Table of n * log(n) for counts of instances; shared between calls and
+# enlarged (with GIL) when needed
+cdef double[:] _xlogx = np.zeros(1)
+
+cdef double[:] xlogx_table(Py_ssize_t n):
+    """Return a table of i * log(i) with at least n + 1 elements"""
+    global _xlogx
+    cdef:
+        Py_ssize_t i
+        double[:] table
+    if _xlogx.shape[0] <= n:
+        table = np.empty(max(n + 1, 2 * _xlogx.shape[0]))
+        table[0] = 0
+        for i in range(1, table.shape[0]):
+            table[i] = i * log(i)
+        _xlogx = table
+    return _xlogx
+
 def contingency(double[:] x, int nx, double[:] y, int ny):
     cdef:
         np.ndarray[np.uint32_t, ndim=2] cont = np.zeros((ny, nx), dtype=np.uint32)
@@ -27,7 +45,7 @@ def contingency(double[:] x, int nx, double[:] y, int ny):
             cont[yi, xi] += 1
     return cont
 
-def find_threshold_entropy(double[:] x, double[:] y, np.intp_t[:] idx,
+def find_threshold_entropy(const double[:] x, const double[:] y, np.intp_t[:] idx,
                            int n_classes, int min_leaf):
     """
     Find the threshold for continuous attribute values that maximizes
@@ -37,6 +55,10 @@ def find_threshold_entropy(double[:] x, double[:] y, np.intp_t[:] idx,
     of the threshold. If there is no threshold within that limits with positive
     information gain, the function returns (0, 0).
 
+    Thresholds between two groups of equal values that belong to the same
+    class are skipped, since they cannot be optimal. The result does not
+    depend upon the order of indices with equal values of x.
+
     Args:
         x: attribute values
         y: class values
@@ -49,18 +71,29 @@ def find_threshold_entropy(double[:] x, double[:] y, np.intp_t[:] idx,
     """
     cdef:
         unsigned int[:] distr = np.zeros(2 * n_classes, dtype=np.uint32)
+        double[:] xlogx
         Py_ssize_t i, j
         double entro, class_entro, best_entro
         unsigned int p, curr_y
+        # class of the group of equal values that ends at i, or -1 if
+        # the group contains different classes
+        int left_class = -1
+        bint candidate
         unsigned int best_idx = 0
         unsigned int N = idx.shape[0]
 
     # Initial split (min_leaf on the left)
     if N <= min_leaf:
         return 0, 0
+    xlogx = xlogx_table(N)
     with nogil:
         for i in range(min_leaf - 1):  # one will be added in the loop
-            distr[n_classes + <int>y[idx[i]]] += 1
+            curr_y = <int>y[idx[i]]
+            distr[n_classes + curr_y] += 1
+            if i == 0 or x[idx[i]] != x[idx[i - 1]]:
+                left_class = curr_y
+            elif left_class != <int>curr_y:
+                left_class = -1
         for i in range(min_leaf - 1, N):
             distr[<int>y[idx[i]]] += 1
 
@@ -77,11 +110,26 @@ def find_threshold_entropy(double[:] x, double[:] y, np.intp_t[:] idx,
             curr_y = <int>y[idx[i]]
             distr[curr_y] -= 1
             distr[n_classes + curr_y] += 1
-            if curr_y != y[idx[i + 1]] and x[idx[i]] != x[idx[i + 1]]:
-                entro = (i + 1) * log(i + 1) + (N - i - 1) * log(N - i - 1)
+            if i == 0 or x[idx[i]] != x[idx[i - 1]]:
+                left_class = curr_y
+            elif left_class != <int>curr_y:
+                left_class = -1
+            if x[idx[i]] == x[idx[i + 1]]:
+                continue
+            candidate = left_class == -1 or curr_y != y[idx[i + 1]]
+            if not candidate:
+                # The threshold is skipped if the group on the right
+                # has the same single class as the group on the left
+                j = i + 2
+                while j < N and x[idx[j]] == x[idx[i + 1]]:
+                    if curr_y != y[idx[j]]:
+                        candidate = True
+                        break
+                    j += 1
+            if candidate:
+                entro = xlogx[i + 1] + xlogx[N - i - 1]
                 for j in range(2 * n_classes):
-                    if distr[j]:
-                        entro -= distr[j] * log(distr[j])
+                    entro -= xlogx[distr[j]]
                 if entro < best_entro:
                     best_entro = entro
                     best_idx = i
@@ -186,7 +234,8 @@ def find_binarization_entropy(double[:, :] cont, double[:] class_distr,
     return (class_entro - best_entro) / N / log(2), best_mapping
 
 
-def find_threshold_MSE(double[:] x, double[:] y, np.intp_t[:] idx, int min_leaf):
+def find_threshold_MSE(const double[:] x, const double[:] y, np.intp_t[:] idx,
+                       int min_leaf):
     """
     Find the threshold for continuous attribute values that minimizes MSE.
 
@@ -370,8 +419,8 @@ def compute_grouped_MSE(double[:] x, double[:] y, int n_values, int min_leaf):
     return (inter - sum * sum / n) / x.shape[0]
 
 
-def compute_predictions(double[:, :] X, int[:] code,
-                        double[:, :] values, double[:] thresholds):
+def compute_predictions(const double[:, :] X, const int[:] code,
+                        const double[:, :] values, const double[:] thresholds):
     """
     Return the values (distributions, means and variances) stored in the nodes
     to which the tree classify the rows in X.
@@ -416,3 +465,68 @@ def compute_predictions(double[:, :] X, int[:] code,
             for j in range(values.shape[1]):
                 predictions[i, j] = values[node_idx, j]
     return np.asarray(predictions)
+
+
+def compute_forest_predictions(const double[:, :] X, const int[:] code,
+                               const double[:, :] values,
+                               const double[:] thresholds,
+                               const int[:] code_offsets,
+                               const int[:] value_offsets):
+    """
+    Return the average values stored in the nodes to which the trees of
+    a forest classify the rows in X.
+
+    Trees are encoded by :obj:`Orange.tree.TreeModel._compile` and
+    concatenated; pointers to children and node indices in the code of
+    each tree are relative to the tree's offsets into `code` and `values`.
+
+    The result is a matrix of shape (X.shape[0], values.shape[1])
+
+    Args:
+        X: data for which the predictions are made
+        code: concatenated encoded trees
+        values: concatenated values corresponding to tree nodes
+        thresholds: concatenated thresholds for numeric nodes
+        code_offsets: starts of trees in `code`
+        value_offsets: starts of trees in `values` and `thresholds`
+
+    Returns:
+        a matrix of values
+    """
+    cdef:
+        unsigned int node_ptr, i, j, t, val_idx, code_start, value_start
+        signed int next_node_ptr, node_idx
+        unsigned int n_trees = code_offsets.shape[0]
+        np.float64_t val
+        double[: ,:] predictions = np.zeros(
+            (X.shape[0], values.shape[1]), dtype=np.float64)
+
+    if n_trees == 0:
+        return np.asarray(predictions)
+    with nogil:
+        # Trees are in the outer loop, so the code of a tree stays in cache
+        for t in range(n_trees):
+            code_start = code_offsets[t]
+            value_start = value_offsets[t]
+            for i in range(X.shape[0]):
+                node_ptr = code_start
+                while code[node_ptr]:
+                    val = X[i, code[node_ptr + 2]]
+                    if npy_isnan(val):
+                        break
+                    if code[node_ptr] == 3:
+                        node_idx = value_start + code[node_ptr + 1]
+                        val_idx = int(val > thresholds[node_idx])
+                    else:
+                        val_idx = int(val)
+                    next_node_ptr = code[node_ptr + 3 + val_idx]
+                    if next_node_ptr == NULL_BRANCH:
+                        break
+                    node_ptr = code_start + next_node_ptr
+                node_idx = value_start + code[node_ptr + 1]
+                for j in range(values.shape[1]):
+                    predictions[i, j] += values[node_idx, j]
+        for i in range(X.shape[0]):
+            for j in range(values.shape[1]):
+                predictions[i, j] /= n_trees
+    return np.asarray(predictions)
@@ -42,6 +42,32 @@ class MajorityLearner(Learner):
             unif_maj = None
         return ConstantModel(dist=dist, unif_maj=unif_maj)
 
+    def leave_one_out(self, data):
+        """Leave-one-out predictions computed by subtracting each instance
+        from the class distribution"""
+        if any(True for _ in self.active_preprocessors) or \
+                not data.domain.has_discrete_class:
+            return None
+        dist = np.array(
+            distribution.get_distribution(data, data.domain.class_var))
+        y = data.Y
+        w = data.W if data.has_weights() else np.ones(len(data))
+        known = ~np.isnan(y)
+        counts = np.tile(dist, (len(data), 1))
+        counts[known, y[known].astype(int)] -= w[known]
+        N = counts.sum(axis=1)
+        probs = np.full(counts.shape, 1 / counts.shape[1])
+        probs[N > 0] = counts[N > 0] / N[N > 0, None]
+
+        values = probs.argmax(axis=1)
+        is_max = probs == probs.max(axis=1)[:, None]
+        for i in np.flatnonzero(is_max.sum(axis=1) > 1):
+            ties = np.flatnonzero(is_max[i])
+            random_idx = int(sha1(bytes(np.delete(y, i))).hexdigest(), 16) \
+                % len(ties)
+            values[i] = ties[random_idx]
+        return values, probs
+
 
 class ConstantModel(Model):
     """
@@ -1,7 +1,8 @@
 import numpy as np
+import scipy.sparse as sp
 
 from Orange.classification import Learner, Model
-from Orange.data import Instance, Storage
+from Orange.data import Storage, Table
 from Orange.statistics import contingency
 from Orange.preprocess import Discretize
 
@@ -35,31 +36,112 @@ class NaiveBayesLearner(Learner):
             contingency.get_contingency(table, table.domain.class_var)))
         return NaiveBayesModel(cont, class_freq, table.domain)
 
+    def leave_one_out(self, data):
+        """Leave-one-out predictions computed by subtracting each instance
+        from the contingencies of the model fitted on all data"""
+        # Discretization does not change discrete data
+        if not isinstance(data, Table) or sp.issparse(data.X) or \
+                data.has_weights() or \
+                not all(var.is_discrete for var in data.domain.variables) or \
+                not all(isinstance(pp, Discretize)
+                        for pp in self.active_preprocessors):
+            return None
+        conts = contingency.get_contingencies(data)
+        class_freq = np.array(np.diag(
+            contingency.get_contingency(data, data.domain.class_var)))
+        n_cls = len(class_freq)
+
+        y = data.Y
+        known_y = ~np.isnan(y)
+        own_class = np.zeros((len(data), n_cls))
+        own_class[known_y, y[known_y].astype(int)] = 1
+        # Class frequencies for each instance, without the instance
+        freqs = class_freq - own_class
+        class_prob = (freqs + 1) / (np.sum(freqs, axis=1) + n_cls)[:, None]
+        log_probs = 0
+        for attr_i, cont in enumerate(conts):
+            cont = np.array(cont)
+            column = data.X[:, attr_i]
+            known = ~np.isnan(column)
+            counts = cont[:, np.where(known, column, 0).astype(int)].T
+            counts -= own_class * known[:, None]
+            log_probs += np.where(
+                known[:, None],
+                np.log((counts + 1) / (freqs + cont.shape[1])), 0)
+        probs = np.exp(log_probs + np.log(class_prob))
+        probs /= probs.sum(axis=1)[:, None]
+        return probs.argmax(axis=1), probs
+
 
 class NaiveBayesModel(Model):
+    # Rows are processed in blocks, so that the gathered log-probabilities
+    # (rows x attributes x classes) have at most this many elements
+    MAX_BLOCK_ELEMENTS = 2 ** 20
+
     def __init__(self, cont, class_freq, domain):
         super().__init__(domain)
         self.cont = cont
         self.class_freq = class_freq
 
-    def predict_storage(self, data):
-        if isinstance(data, Instance):
-            data = [data]
+    def _log_cont_prob(self):
+        """Return log-probabilities of attribute values (rows) given the
+        class (columns) for all attributes, stacked into a single table
+        whose last row is zero and is used for unknown values, and the
+        offsets of attributes in the table"""
+        n_cls = len(self.class_freq)
+        class_freq = self.class_freq.reshape((n_cls, 1))
+        tables = [np.log(np.divide(np.array(c) + 1,
+                                   class_freq + c.shape[1])).T
+                  for c in self.cont]
+        offsets = np.cumsum([0] + [len(table) for table in tables[:-1]])
+        return np.vstack(tables + [np.zeros((1, n_cls))]), offsets
+
+    def predict(self, X):
         n_cls = len(self.class_freq)
         class_prob = (self.class_freq + 1) / (np.sum(self.class_freq) + n_cls)
-        if len(data.domain.attributes) == 0:
-            probs = np.tile(class_prob, (len(data), 1))
-        else:
-            log_cont_prob = [np.log(np.divide(np.array(c) + 1,
-                                              self.class_freq.reshape((n_cls, 1)) +
-                                              c.shape[1])) for c in self.cont]
-            probs = np.exp(np.array([np.sum(attr_prob[:, int(attr_val)]
-                                            for attr_val, attr_prob
-                                            in zip(ins, log_cont_prob)
-                                            if not np.isnan(attr_val))
-                                     for ins in data]) + np.log(class_prob))
+        log_probs = np.tile(np.log(class_prob), (X.shape[0], 1))
+        if len(self.cont):
+            table, offsets = self._log_cont_prob()
+            unknown = len(table) - 1
+            block_size = max(
+                1, self.MAX_BLOCK_ELEMENTS // (len(offsets) * n_cls))
+            for start in range(0, X.shape[0], block_size):
+                block = X[start:start + block_size]
+                if sp.issparse(block):
+                    block = block.toarray()
+                known = ~np.isnan(block)
+                indices = np.where(known, block, 0).astype(int) + offsets
+                indices[~known] = unknown
+                log_probs[start:start + block_size] += \
+                    np.sum(table[indices], axis=1)
+        # Subtracting the maximum prevents underflow for many attributes
+        probs = np.exp(log_probs - np.max(log_probs, axis=1)[:, None])
         probs /= probs.sum(axis=1)[:, None]
         values = probs.argmax(axis=1)
         return values, probs
 
+    def partial_fit(self, data):
+        """
+        Update the model by adding counts from the given data to the
+        contingencies and class frequencies, as if the model was fitted on
+        both, the original and the given data.
+
+        The data is transformed into the model's domain, so continuous
+        attributes are discretized with the intervals from the original
+        data.
+
+        :param data: additional training data
+        :type data: Orange.data.Table
+        :return: the updated model (`self`)
+        """
+        if data.domain != self.domain:
+            data = Table.from_table(self.domain, data)
+        for cont, new_cont in zip(self.cont,
+                                  contingency.get_contingencies(data)):
+            cont += new_cont
+        self.class_freq = self.class_freq + np.array(np.diag(
+            contingency.get_contingency(data, data.domain.class_var)))
+        return self
+
+
 NaiveBayesLearner.__returns__ = NaiveBayesModel
@@ -8,7 +8,10 @@ components.
 """
 
 import operator
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 from copy import copy
+from itertools import repeat
 from hashlib import sha1
 from collections import namedtuple
 import bottleneck as bn
@@ -16,7 +19,7 @@ import numpy as np
 from scipy.stats import chi2
 
 from Orange.data import Table, _contingency
-from Orange.classification import Learner, Model
+from Orange.classification import Learner, Model, _rules
 from Orange.preprocess.discretize import EntropyMDL
 from Orange.preprocess import RemoveNaNClasses, Impute, Average
 
@@ -88,6 +91,26 @@ def entropy(x):
     return x.sum()
 
 
+def entropies(x):
+    """
+    Calculate entropies of distributions in rows of a matrix.
+
+    Parameters
+    ----------
+    x : ndarray
+        Input distributions.
+
+    Returns
+    -------
+    res : ndarray
+        Entropy measure results.
+    """
+    x = x / x.sum(axis=1)[:, None]
+    nonzero = x != 0
+    x[nonzero] *= -np.log2(x[nonzero])
+    return x.sum(axis=1)
+
+
 def likelihood_ratio_statistic(x, y):
     """
     Calculate likelihood ratio statistic for given distributions.
@@ -152,6 +175,50 @@ def hash_dist(x):
     return int(sha1(bytes(x)).hexdigest(), base=16) & 0xffffffff
 
 
+# The number of set bits in each 16-bit word
+_POPCOUNT16 = np.sum(np.arange(1 << 16, dtype=np.uint16)[:, None] >>
+                     np.arange(16, dtype=np.uint16) & 1,
+                     axis=1).astype(np.uint8)
+
+
+def pack_coverage(covered):
+    """
+    Pack boolean coverage of examples into bitsets.
+
+    Parameters
+    ----------
+    covered : ndarray, bool
+        Coverage of examples (a vector or a matrix with a row for each
+        bitset).
+
+    Returns
+    -------
+    bits : ndarray, uint8
+        Coverage, packed along the last axis and padded with zeros to
+        a multiple of 16 bits.
+    """
+    bits = np.packbits(np.asarray(covered, dtype=bool), axis=-1)
+    if bits.shape[-1] % 2:
+        bits = np.concatenate(
+            (bits, np.zeros(bits.shape[:-1] + (1,), dtype=np.uint8)), axis=-1)
+    return bits
+
+
+def unpack_coverage(bits, n_examples):
+    """
+    Unpack bitsets into boolean coverage of `n_examples` examples.
+    """
+    return np.unpackbits(bits, axis=-1)[..., :n_examples].astype(bool)
+
+
+def count_coverage(bits):
+    """
+    Count the covered examples in bitsets (along the last axis).
+    """
+    bits = np.ascontiguousarray(bits)
+    return np.sum(_POPCOUNT16[bits.view(np.uint16)], axis=-1, dtype=np.int64)
+
+
 class Evaluator:
     def evaluate_rule(self, rule):
         """
@@ -172,6 +239,27 @@ class Evaluator:
         """
         raise NotImplementedError
 
+    def evaluate_rules(self, rules):
+        """
+        Evaluate rules that refine the same rule (and thus have the same
+        target class and length).
+
+        Descendants can override this method to evaluate all rules at once;
+        such implementations are used only if :obj:`evaluate_rule` is not
+        redefined in a further descendant.
+
+        Parameters
+        ----------
+        rules : list of Rule
+            Evaluate these rules.
+
+        Returns
+        -------
+        res : list of float
+            Evaluation function results.
+        """
+        return [self.evaluate_rule(rule) for rule in rules]
+
 
 class EntropyEvaluator(Evaluator):
     def evaluate_rule(self, rule):
@@ -181,6 +269,17 @@ class EntropyEvaluator(Evaluator):
              if tc is not None else dist.astype(float))
         return -entropy(x)
 
+    def evaluate_rules(self, rules):
+        if type(self).evaluate_rule is not EntropyEvaluator.evaluate_rule:
+            return super().evaluate_rules(rules)
+        if not rules:
+            return []
+        tc = rules[0].target_class
+        dists = np.array([rule.curr_class_dist for rule in rules], dtype=float)
+        x = (np.column_stack((dists[:, tc], dists.sum(axis=1) - dists[:, tc]))
+             if tc is not None else dists)
+        return list(-entropies(x))
+
 
 class LaplaceAccuracyEvaluator(Evaluator):
     def evaluate_rule(self, rule):
@@ -197,6 +296,22 @@ class LaplaceAccuracyEvaluator(Evaluator):
             target = bn.nanmax(dist)
         return (target + 1) / (dist.sum() + k)
 
+    def evaluate_rules(self, rules):
+        if type(self).evaluate_rule is not \
+                LaplaceAccuracyEvaluator.evaluate_rule:
+            return super().evaluate_rules(rules)
+        if not rules:
+            return []
+        tc = rules[0].target_class
+        dists = np.array([rule.curr_class_dist for rule in rules])
+        if tc is not None:
+            k = 2
+            target = dists[:, tc]
+        else:
+            k = dists.shape[1]
+            target = bn.nanmax(dists, axis=1)
+        return list((target + 1) / (dists.sum(axis=1) + k))
+
 
 class WeightedRelativeAccuracyEvaluator(Evaluator):
     def evaluate_rule(self, rule):
@@ -228,6 +343,11 @@ class LengthEvaluator(Evaluator):
     def evaluate_rule(self, rule):
         return -rule.length
 
+    def evaluate_rules(self, rules):
+        if type(self).evaluate_rule is not LengthEvaluator.evaluate_rule:
+            return super().evaluate_rules(rules)
+        return [-rule.length for rule in rules]
+
 
 class Validator:
     def validate_rule(self, rule):
@@ -247,6 +367,27 @@ class Validator:
         """
         raise NotImplementedError
 
+    def validate_rules(self, rules):
+        """
+        Validate rules that refine the same rule (and thus have the same
+        target class, length and parent rule).
+
+        Descendants can override this method to validate all rules at once;
+        such implementations are used only if :obj:`validate_rule` is not
+        redefined in a further descendant.
+
+        Parameters
+        ----------
+        rules : list of Rule
+            Validate these rules.
+
+        Returns
+        -------
+        res : list of bool
+            Validation function results.
+        """
+        return [self.validate_rule(rule) for rule in rules]
+
 
 class GuardianValidator(Validator):
     """
@@ -271,6 +412,23 @@ class GuardianValidator(Validator):
                  else not np.array_equal(rule.curr_class_dist,
                                          rule.parent_rule.curr_class_dist)))
 
+    def validate_rules(self, rules):
+        if type(self).validate_rule is not GuardianValidator.validate_rule:
+            return super().validate_rules(rules)
+        if not rules:
+            return []
+        rule = rules[0]
+        if rule.length > self.max_rule_length:
+            return [False] * len(rules)
+        dists = np.array([rule.curr_class_dist for rule in rules])
+        num_target_covered = (dists[:, rule.target_class]
+                              if rule.target_class is not None
+                              else dists.sum(axis=1))
+        valid = num_target_covered >= self.min_covered_examples
+        if rule.parent_rule is not None:
+            valid &= np.any(dists != rule.parent_rule.curr_class_dist, axis=1)
+        return list(valid)
+
 
 class LRSValidator(Validator):
     """
@@ -470,29 +628,53 @@ class TopDownSearchStrategy(SearchStrategy):
                 temp_rule.do_evaluate()
                 rules.append(temp_rule)
 
-        # optimisation: store covered examples when a selector is found
+        # optimisation: store covered examples (packed into bitsets) when
+        # a selector is found; selectors on discrete attributes are prepared
+        # in advance, so their coverage of any rule is computed at once
         self.storage = {}
+        self.discrete_values = {}
+        for i, attribute in enumerate(domain.attributes):
+            if attribute.is_discrete:
+                column = X[:, i]
+                values = np.unique(column)
+                # selectors on unknown values are never valid
+                values = values[~np.isnan(values)]
+                self.discrete_values[i] = values
+                equal = pack_coverage(column == values[:, None])
+                not_equal = pack_coverage(column != values[:, None])
+                for val, eq_bits, ne_bits in zip(values, equal, not_equal):
+                    self.storage[Selector(column=i, op="==", value=val)] = \
+                        eq_bits
+                    self.storage[Selector(column=i, op="!=", value=val)] = \
+                        ne_bits
+        self.class_bits = pack_coverage(
+            Y == np.arange(len(domain.class_var.values))[:, None])
         return rules
 
     def refine_rule(self, X, Y, W, candidate_rule):
-        (target_class, candidate_rule_covered_examples,
-         candidate_rule_selectors, domain, initial_class_dist,
-         prior_class_dist, quality_evaluator, complexity_evaluator,
-         significance_validator, general_validator) = candidate_rule.seed()
+        (target_class, _, candidate_rule_selectors, domain,
+         initial_class_dist, prior_class_dist, quality_evaluator,
+         complexity_evaluator, significance_validator,
+         general_validator) = candidate_rule.seed()
 
         # optimisation: to develop further rules is futile
         if candidate_rule.length == general_validator.max_rule_length:
             return []
 
-        possible_selectors = self.find_new_selectors(
-            X[candidate_rule_covered_examples],
-            Y[candidate_rule_covered_examples],
-            W[candidate_rule_covered_examples]
-            if W is not None else None,
-            domain, candidate_rule_selectors)
+        possible_selectors = self.candidate_selectors(X, Y, W, candidate_rule)
+        if not possible_selectors:
+            return []
+
+        # optimisation: coverage and class distributions of all
+        # refinements are computed at once
+        covered_bits = candidate_rule.covered_bits & np.array(
+            [self.selector_bits(X, selector)
+             for selector in possible_selectors])
+        class_dists = self.class_distributions(covered_bits, Y, W)
 
         new_rules = []
-        for curr_selector in possible_selectors:
+        for curr_selector, curr_bits, curr_dist in zip(
+                possible_selectors, covered_bits, class_dists):
             copied_selectors = copy(candidate_rule_selectors)
             copied_selectors.append(curr_selector)
 
@@ -506,19 +688,97 @@ class TopDownSearchStrategy(SearchStrategy):
                             significance_validator=significance_validator,
                             general_validator=general_validator)
 
-            if curr_selector not in self.storage:
-                self.storage[curr_selector] = curr_selector.filter_data(X)
-            # optimisation: faster calc. of covered examples
-            pdc = candidate_rule_covered_examples & self.storage[curr_selector]
-            # to ensure that the covered_examples matrices are of
-            # the same size throughout the rule_finder iteration
-            new_rule.filter_and_store(X, Y, W, target_class, predef_covered=pdc)
-            if new_rule.is_valid():
-                new_rule.do_evaluate()
-                new_rules.append(new_rule)
-
+            new_rule.store_coverage(curr_bits, X.shape[0], curr_dist,
+                                    target_class)
+            new_rules.append(new_rule)
+
+        # optimisation: validate and evaluate all refinements at once
+        new_rules = [rule for rule, valid in zip(
+            new_rules, general_validator.validate_rules(new_rules)) if valid]
+        for new_rule, quality, complexity in zip(
+                new_rules, quality_evaluator.evaluate_rules(new_rules),
+                complexity_evaluator.evaluate_rules(new_rules)):
+            new_rule.quality = quality
+            new_rule.complexity = complexity
         return new_rules
 
+    def selector_bits(self, X, selector):
+        """
+        Return the coverage of data by the selector, packed into a bitset.
+        """
+        if selector not in self.storage:
+            self.storage[selector] = pack_coverage(selector.filter_data(X))
+        return self.storage[selector]
+
+    def class_distributions(self, covered_bits, Y, W):
+        """
+        Return class distributions of examples covered by bitsets (rows
+        of `covered_bits`); counts of examples of each class are computed
+        from bits, and weighted distributions by a matrix product.
+        """
+        if W is None:
+            return np.column_stack([count_coverage(covered_bits & class_bits)
+                                    for class_bits in self.class_bits])
+        weights = np.zeros((len(Y), len(self.class_bits)))
+        weights[np.arange(len(Y)), Y] = W
+        return np.vstack([
+            unpack_coverage(bits, len(Y)).dot(weights)
+            for bits in np.array_split(
+                covered_bits, max(1, covered_bits.size // 2 ** 20))])
+
+    def candidate_selectors(self, X, Y, W, candidate_rule):
+        """
+        Return selectors that can refine the rule: for discrete attributes,
+        (in)equalities with values of examples covered by the rule, and
+        for continuous attributes, thresholds found by discretization of
+        covered examples (or their values, if continuous attributes are
+        not constrained).
+
+        Values of discrete attributes are found from precomputed bitsets;
+        descendants that override :obj:`find_new_selectors` get the
+        covered examples instead.
+        """
+        domain = candidate_rule.domain
+        existing_selectors = candidate_rule.selectors
+        if type(self).find_new_selectors is not \
+                TopDownSearchStrategy.find_new_selectors:
+            covered = candidate_rule.covered_examples
+            return self.find_new_selectors(
+                X[covered], Y[covered], W[covered] if W is not None else None,
+                domain, existing_selectors)
+
+        covered = None
+        possible_selectors = []
+        for i, attribute in enumerate(domain.attributes):
+            if attribute.is_discrete:
+                values = self.discrete_values[i]
+                if not len(values):
+                    continue
+                equal = np.array([
+                    self.storage[Selector(column=i, op="==", value=val)]
+                    for val in values])
+                present = np.any(equal & candidate_rule.covered_bits, axis=1)
+                for val in values[present]:
+                    possible_selectors.extend([
+                        Selector(column=i, op="==", value=val),
+                        Selector(column=i, op="!=", value=val)])
+            elif attribute.is_continuous:
+                if covered is None:
+                    covered = candidate_rule.covered_examples
+                column = X[covered, i]
+                values = (self.discretize(
+                    column, Y[covered], W[covered] if W is not None else None,
+                    domain) if self.constrain_continuous
+                          else np.unique(column))
+                for val in values:
+                    possible_selectors.extend([
+                        Selector(column=i, op="<=", value=val),
+                        Selector(column=i, op=">=", value=val)])
+
+        # remove redundant selectors
+        return [smh for smh in possible_selectors
+                if smh not in existing_selectors]
+
     def find_new_selectors(self, X, Y, W, domain, existing_selectors):
         existing_selectors = (existing_selectors if existing_selectors is not
                               None else [])
@@ -573,6 +833,14 @@ class Selector(namedtuple('Selector', 'column, op, value')):
         '>=': operator.ge
     }
 
+    # codes of operators in compiled rules (see compile_rules)
+    OPERATOR_CODES = {
+        '==': _rules.OP_EQ,
+        '!=': _rules.OP_NE,
+        '<=': _rules.OP_LE,
+        '>=': _rules.OP_GE
+    }
+
     def filter_instance(self, x):
         """
         Filter a single instance.
@@ -615,7 +883,14 @@ class Rule:
     Those can be easily gathered however, by following the trail of
     covered examples from rule to rule, provided that the original
     learning data reference is still known.
+
+    Covered examples are stored either as a boolean array or packed into
+    a bitset (see :obj:`pack_coverage`); the other representation is
+    computed when needed.
     """
+    _covered_examples = _covered_bits = None
+    _n_examples = 0
+
     def __init__(self, selectors=None, parent_rule=None, domain=None,
                  initial_class_dist=None, prior_class_dist=None,
                  quality_evaluator=None, complexity_evaluator=None,
@@ -690,6 +965,50 @@ class Rule:
                                         if W is not None else None,
                                         self.domain)
 
+    def store_coverage(self, covered_bits, n_examples, class_dist,
+                       target_class):
+        """
+        Apply coverage and class distribution computed by the search
+        strategy.
+
+        Parameters
+        ----------
+        covered_bits : ndarray, uint8
+            Covered examples, packed into a bitset.
+        n_examples : int
+            Number of learning examples.
+        class_dist : ndarray
+            Class distribution of covered examples.
+        target_class : int
+            Index of the class to model.
+        """
+        self.target_class = target_class
+        self._covered_examples = None
+        self._covered_bits = covered_bits
+        self._n_examples = n_examples
+        self.curr_class_dist = class_dist
+
+    @property
+    def covered_examples(self):
+        """Boolean array of covered learning examples."""
+        if self._covered_examples is None and self._covered_bits is not None:
+            self._covered_examples = unpack_coverage(self._covered_bits,
+                                                     self._n_examples)
+        return self._covered_examples
+
+    @covered_examples.setter
+    def covered_examples(self, covered):
+        self._covered_examples = covered
+        self._covered_bits = None
+
+    @property
+    def covered_bits(self):
+        """Covered learning examples, packed into a bitset."""
+        if self._covered_bits is None and self._covered_examples is not None:
+            self._covered_bits = pack_coverage(self._covered_examples)
+            self._n_examples = len(self._covered_examples)
+        return self._covered_bits
+
     def is_valid(self):
         """
         Return True if the rule passes the general validator's
@@ -769,7 +1088,11 @@ class Rule:
 
     def __eq__(self, other):
         # return self.selectors == other.selectors
-        return np.array_equal(self.covered_examples, other.covered_examples)
+        if self.covered_bits is None or other.covered_bits is None:
+            return np.array_equal(self.covered_examples,
+                                  other.covered_examples)
+        return (self._n_examples == other._n_examples and
+                np.array_equal(self.covered_bits, other.covered_bits))
 
     def __len__(self):
         return len(self.selectors)
@@ -1141,6 +1464,36 @@ class _RuleLearner(Learner):
         return default_rule
 
 
+CompiledRules = namedtuple('CompiledRules', 'offsets, columns, ops, values')
+
+
+def compile_rules(rules):
+    """
+    Pack selectors of rules into arrays for evaluation in compiled code.
+
+    Parameters
+    ----------
+    rules : list of Rule
+        Compile these rules.
+
+    Returns
+    -------
+    res : CompiledRules
+        Selectors of rule `i` are at indices from `offsets[i]` to
+        `offsets[i + 1]` of arrays `columns`, `ops` (operator codes, see
+        :obj:`Selector.OPERATOR_CODES`) and `values`.
+    """
+    selectors = [selector for rule in rules for selector in rule.selectors]
+    offsets = np.zeros(len(rules) + 1, dtype=np.intp)
+    np.cumsum([len(rule.selectors) for rule in rules], out=offsets[1:])
+    return CompiledRules(
+        offsets,
+        np.array([selector.column for selector in selectors], dtype=np.intp),
+        np.array([Selector.OPERATOR_CODES[selector.op]
+                  for selector in selectors], dtype=np.int8),
+        np.array([selector.value for selector in selectors], dtype=float))
+
+
 class _RuleClassifier(Model):
     """
     A rule induction classifier.
@@ -1172,16 +1525,13 @@ class _RuleClassifier(Model):
             Probabilistic classification.
         """
         num_classes = len(self.domain.class_var.values)
-        probabilities = np.array([np.zeros(num_classes, dtype=float)
-                                  for _ in range(X.shape[0])])
-
-        status = np.ones(X.shape[0], dtype=bool)
-        for rule in self.rule_list:
-            curr_covered = rule.evaluate_data(X)
-            curr_covered &= status
-            status &= np.bitwise_not(curr_covered)
-            probabilities[curr_covered] = rule.probabilities
-        return probabilities
+        # the last row is used for instances that no rule covers
+        rule_probabilities = np.vstack(
+            [rule.probabilities for rule in self.rule_list] +
+            [np.zeros(num_classes, dtype=float)])
+        first = _rules.first_covering_rules(
+            np.asarray(X, dtype=float), *compile_rules(self.rule_list))
+        return rule_probabilities[first]
 
     def unordered_predict(self, X):
         """
@@ -1207,26 +1557,18 @@ class _RuleClassifier(Model):
             Probabilistic classification.
         """
         num_classes = len(self.domain.class_var.values)
-        probabilities = np.array([np.zeros(num_classes, dtype=float)
-                                  for _ in range(X.shape[0])])
-
-        num_hits = np.zeros(X.shape[0], dtype=int)
-        total_weight = np.vstack(np.zeros(X.shape[0], dtype=float))
-        for rule in self.rule_list[:-1]:
-            if rule.length > 0:
-                curr_covered = rule.evaluate_data(X)
-                num_hits += curr_covered
-                temp = rule.curr_class_dist.sum()
-                probabilities[curr_covered] += rule.probabilities * temp
-                total_weight[curr_covered] += temp
-
+        rules = [rule for rule in self.rule_list[:-1] if rule.length > 0]
+        weights = np.array([rule.curr_class_dist.sum() for rule in rules],
+                           dtype=float)
+        weighted_probabilities = np.array(
+            [rule.probabilities * weight
+             for rule, weight in zip(rules, weights)],
+            dtype=float).reshape(len(rules), num_classes)
         default_rule = self.rule_list[-1]
-        weigh_down = num_hits > 0
-        apply_default = num_hits == 0
-
-        probabilities[weigh_down] /= total_weight[weigh_down]
-        probabilities[apply_default] = default_rule.probabilities
-        return probabilities
+        return _rules.covering_rules_probabilities(
+            np.asarray(X, dtype=float), *compile_rules(rules),
+            weighted_probabilities, weights,
+            np.asarray(default_rule.probabilities, dtype=float))
 
 
 class _BaseCN2Learner(_RuleLearner):
@@ -1307,6 +1649,9 @@ class CN2UnorderedLearner(_RuleLearner):
 
     .. literalinclude:: code/classification-cn2ruleinduction1.py
 
+    Rules for different classes are independent; with `n_jobs > 1`, they
+    are searched for in a pool of processes.
+
     References
     ----------
     .. [1] "Rule Induction with CN2: Some Recent Improvements", Peter
@@ -1315,16 +1660,27 @@ class CN2UnorderedLearner(_RuleLearner):
     """
     name = 'CN2 unordered inducer'
 
-    def __init__(self, preprocessors=None, base_rules=None):
+    def __init__(self, preprocessors=None, base_rules=None, n_jobs=1):
         super().__init__(preprocessors, base_rules)
         self.rule_finder.quality_evaluator = LaplaceAccuracyEvaluator()
+        self.n_jobs = n_jobs
 
     def fit(self, X, Y, W=None):
         Y = Y.astype(dtype=int)
-        rule_list = []
-        for curr_class in range(len(self.domain.class_var.values)):
-            rule_list.extend(self.find_rules(X, Y, W, curr_class,
-                                             self.base_rules, self.domain))
+        classes = range(len(self.domain.class_var.values))
+        # Worker processes (e.g. in evaluation) cannot start new processes
+        if self.n_jobs > 1 and len(classes) > 1 and \
+                not mp.current_process().daemon:
+            with ProcessPoolExecutor(min(self.n_jobs, len(classes))) \
+                    as executor:
+                class_rules = list(executor.map(
+                    self.find_rules, repeat(X), repeat(Y), repeat(W),
+                    classes, repeat(self.base_rules), repeat(self.domain)))
+        else:
+            class_rules = [self.find_rules(X, Y, W, curr_class,
+                                           self.base_rules, self.domain)
+                           for curr_class in classes]
+        rule_list = [rule for rules in class_rules for rule in rules]
         # add the default rule
         rule_list.append(self.generate_default_rule(X, Y, W, self.domain))
         return CN2UnorderedClassifier(domain=self.domain, rule_list=rule_list)
@@ -188,32 +188,67 @@ class SimpleTreeModel(Model):
     def __getstate__(self):
         dict = self.__dict__.copy()
         del dict['node']
-        py_node = self.__to_python(self.node)
-        return dict, py_node
+        return dict, self.__to_arrays(self.node)
 
     def __setstate__(self, state):
-        dict, py_node = state
+        dict, nodes = state
         self.__dict__.update(dict)
-        self.node = self.__from_python(py_node)
-
-    # for pickling a tree
-    def __to_python(self, node):
-        n = node.contents
-        py_node = SimpleTreeNode()
-        py_node.type = n.type
-        py_node.children_size = n.children_size
-        py_node.split_attr = n.split_attr
-        py_node.split = n.split
-        py_node.children = [
-            self.__to_python(n.children[i]) for i in range(n.children_size)]
+        if isinstance(nodes, SimpleTreeNode):  # pickled by older versions
+            self.node = self.__from_python(nodes)
+        else:
+            self.node = self.__from_arrays(nodes)
+
+    # for pickling a tree: nodes are stored in arrays in preorder
+    def __to_arrays(self, node):
+        nodes = []
+        stack = [node]
+        while stack:
+            n = stack.pop().contents
+            nodes.append(n)
+            stack.extend(n.children[i]
+                         for i in reversed(range(n.children_size)))
+        arrays = {
+            'type': np.array([n.type for n in nodes], dtype=np.int8),
+            'children_size': np.array([n.children_size for n in nodes],
+                                      dtype=np.int32),
+            'split_attr': np.array([n.split_attr for n in nodes],
+                                   dtype=np.int32),
+            'split': np.array([n.split for n in nodes], dtype=np.float32)}
         if self.type == Classification:
-            py_node.dist = [n.dist[i] for i in range(self.cls_vals)]
+            arrays['dist'] = np.array(
+                [n.dist[:self.cls_vals] for n in nodes],
+                dtype=np.float32).reshape(len(nodes), self.cls_vals)
         else:
-            py_node.n = n.n
-            py_node.sum = n.sum
-        return py_node
+            arrays['n'] = np.array([n.n for n in nodes], dtype=np.float32)
+            arrays['sum'] = np.array([n.sum for n in nodes], dtype=np.float32)
+        return arrays
 
     # for unpickling a tree
+    def __from_arrays(self, arrays):
+        def from_arrays():
+            nonlocal i
+            children_size = int(arrays['children_size'][i])
+            node = _tree.new_node(children_size, self.type, self.cls_vals)
+            n = node.contents
+            n.type = int(arrays['type'][i])
+            n.children_size = children_size
+            n.split_attr = int(arrays['split_attr'][i])
+            n.split = float(arrays['split'][i])
+            if self.type == Classification:
+                for j, p in enumerate(arrays['dist'][i]):
+                    n.dist[j] = float(p)
+            else:
+                n.n = float(arrays['n'][i])
+                n.sum = float(arrays['sum'][i])
+            i += 1
+            for j in range(children_size):
+                n.children[j] = from_arrays()
+            return node
+
+        i = 0
+        return from_arrays()
+
+    # for unpickling a tree pickled by older versions
     def __from_python(self, py_node):
         node = _tree.new_node(py_node.children_size, self.type, self.cls_vals)
         n = node.contents
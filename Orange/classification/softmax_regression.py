@@ -1,7 +1,9 @@
 import numpy as np
+import scipy.sparse as sp
 from scipy.optimize import fmin_l_bfgs_b
 
 from Orange.classification import Learner, Model
+from Orange.misc import minibatch
 from Orange.preprocess import (RemoveNaNClasses, Continuize, RemoveNaNColumns,
                                Impute, Normalize)
 
@@ -36,6 +38,30 @@ class SoftmaxRegressionLearner(Learner):
         - continuize all discrete attributes,
         - transform the dataset so that the columns are on a similar scale,
 
+    solver : str, optional (default="lbfgs")
+        "lbfgs" minimizes the cost on the entire data with L-BFGS; "sgd" and
+        "adam" use mini-batch gradient descent (see
+        :obj:`Orange.misc.minibatch.minimize`), which takes only a batch of
+        rows at a time and can thus train on sparse data without
+        densifying it, or on memory-mapped data larger than the memory.
+        Note that the default preprocessors center the data and therefore
+        do not support sparse data.
+
+    batch_size : int, optional (default=100)
+        The number of rows in a mini-batch.
+
+    n_epochs : int, optional (default=10)
+        The number of passes over the data with mini-batch solvers.
+
+    learning_rate : float, optional (default=0.001)
+        The step size of mini-batch solvers.
+
+    shuffle : bool, optional (default=True)
+        Whether to shuffle rows in each epoch of mini-batch solvers.
+
+    random_state : int, optional (default=None)
+        Seed for shuffling.
+
     fmin_args : dict, optional
         Parameters for L-BFGS algorithm.
     """
@@ -46,12 +72,24 @@ class SoftmaxRegressionLearner(Learner):
                      Continuize(),
                      Normalize()]
 
-    def __init__(self, lambda_=1.0, preprocessors=None, **fmin_args):
+    def __init__(self, lambda_=1.0, preprocessors=None, solver="lbfgs",
+                 batch_size=100, n_epochs=10, learning_rate=0.001,
+                 shuffle=True, random_state=None, **fmin_args):
         super().__init__(preprocessors=preprocessors)
+        if solver != "lbfgs" and solver not in minibatch.SOLVERS:
+            raise ValueError("Unknown solver '{}'".format(solver))
         self.lambda_ = lambda_
+        self.solver = solver
+        self.batch_size = batch_size
+        self.n_epochs = n_epochs
+        self.learning_rate = learning_rate
+        self.shuffle = shuffle
+        self.random_state = random_state
         self.fmin_args = fmin_args
 
-    def cost_grad(self, Theta_flat, X, Y):
+    def cost_grad(self, Theta_flat, X, Y, lambda_=None):
+        if lambda_ is None:
+            lambda_ = self.lambda_
         Theta = Theta_flat.reshape((self.num_classes, X.shape[1]))
 
         M = X.dot(Theta.T)
@@ -59,11 +97,11 @@ class SoftmaxRegressionLearner(Learner):
         P /= np.sum(P, axis=1)[:, None]
 
         cost = -np.sum(np.log(P) * Y)
-        cost += self.lambda_ * Theta_flat.dot(Theta_flat) / 2.0
+        cost += lambda_ * Theta_flat.dot(Theta_flat) / 2.0
         cost /= X.shape[0]
 
         grad = X.T.dot(P - Y).T
-        grad += self.lambda_ * Theta
+        grad += lambda_ * Theta
         grad /= X.shape[0]
 
         return cost, grad.ravel()
@@ -77,25 +115,47 @@ class SoftmaxRegressionLearner(Learner):
             raise ValueError('Softmax regression does not support '
                              'unknown values')
 
-        X = np.hstack((X, np.ones((X.shape[0], 1))))
-
         self.num_classes = np.unique(y).size
-        Y = np.eye(self.num_classes)[y.ravel().astype(int)]
-
-        theta = np.zeros(self.num_classes * X.shape[1])
-        theta, j, ret = fmin_l_bfgs_b(self.cost_grad, theta,
-                                      args=(X, Y), **self.fmin_args)
-        Theta = theta.reshape((self.num_classes, X.shape[1]))
+        y = y.ravel().astype(int)
+        theta = np.zeros(self.num_classes * (X.shape[1] + 1))
+
+        if self.solver == "lbfgs":
+            X = _add_intercept(X)
+            Y = np.eye(self.num_classes)[y]
+            theta, j, ret = fmin_l_bfgs_b(self.cost_grad, theta,
+                                          args=(X, Y), **self.fmin_args)
+        else:
+            n_rows = X.shape[0]
+
+            def batch_cost_grad(theta, X_batch, y_batch):
+                # Regularization is divided among batches by their size
+                return self.cost_grad(
+                    theta, _add_intercept(X_batch),
+                    np.eye(self.num_classes)[y_batch],
+                    self.lambda_ * X_batch.shape[0] / n_rows)
+
+            theta = minibatch.minimize(
+                batch_cost_grad, theta, X, y, self.solver, self.batch_size,
+                self.n_epochs, self.learning_rate, self.shuffle,
+                self.random_state)
+        Theta = theta.reshape((self.num_classes, -1))
 
         return SoftmaxRegressionModel(Theta)
 
 
+def _add_intercept(X):
+    ones = np.ones((X.shape[0], 1))
+    if sp.issparse(X):
+        return sp.hstack((X, ones), format="csr")
+    return np.hstack((X, ones))
+
+
 class SoftmaxRegressionModel(Model):
     def __init__(self, Theta):
         self.Theta = Theta
 
     def predict(self, X):
-        X = np.hstack((X, np.ones((X.shape[0], 1))))
+        X = _add_intercept(X)
         M = X.dot(self.Theta.T)
         P = np.exp(M - np.max(M, axis=1)[:, None])
         P /= np.sum(P, axis=1)[:, None]
@@ -1,14 +1,17 @@
 """Tree inducers: SKL and Orange's own inducer"""
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import sklearn.tree as skl_tree
 
 from Orange.classification import SklLearner, SklModel, Learner
 from Orange.classification import _tree_scorers
-from Orange.statistics import distribution, contingency
+from Orange.statistics import distribution, util
 from Orange.tree import Node, DiscreteNode, MappedDiscreteNode, \
-    NumericNode, TreeModel
+    NumericNode, TreeModel, ForestLearner, candidate_attributes, sort_rows, \
+    partition_sorted
 
-__all__ = ["SklTreeLearner", "TreeLearner"]
+__all__ = ["SklTreeLearner", "TreeLearner", "TreeForestLearner"]
 
 
 class TreeLearner(Learner):
@@ -45,6 +48,18 @@ class TreeLearner(Learner):
             a majority at which the data is not split
             further
 
+        n_jobs (int):
+            the number of threads for scoring attributes; the scorers
+            release the GIL, so attributes of large nodes are scored in
+            parallel
+
+        max_features (int, float or str):
+            the number of randomly chosen attributes considered for each
+            split (see :obj:`Orange.tree.candidate_attributes`); all
+            attributes if `None` (default)
+
+        random_state (int): the seed for choosing attributes
+
     Returns:
         instance of OrangeTreeModel
     """
@@ -53,30 +68,49 @@ class TreeLearner(Learner):
     # Binarization is exhaustive, so we set a limit on the number of values
     MAX_BINARIZATION = 16
 
+    # Attributes of smaller nodes are scored in a single thread
+    MIN_PARALLEL_INSTANCES = 1000
+
     def __init__(
             self, *args, binarize=False, max_depth=None,
             min_samples_leaf=1, min_samples_split=2, sufficient_majority=0.95,
-            **kwargs):
+            n_jobs=1, max_features=None, random_state=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.binarize = binarize
         self.min_samples_leaf = min_samples_leaf
         self.min_samples_split = min_samples_split
         self.sufficient_majority = sufficient_majority
         self.max_depth = max_depth
+        self.n_jobs = n_jobs
+        self.max_features = max_features
+        self.random_state = random_state
 
-    def _select_attr(self, data):
+    def _select_attr(self, data, rows, sorted_rows, executor=None,
+                     random=None):
         """Select the attribute for the next split.
 
+        Args:
+            data (Table): training data
+            rows (np.ndarray): indices of data instances in the node
+            sorted_rows (dict): indices of instances in the node with known
+                values of continuous attributes, sorted by the values
+            executor (concurrent.futures.Executor): executor for scoring
+                attributes in parallel
+            random (np.random.RandomState): generator for choosing
+                attributes if `max_features` is set
+
         Returns:
-            tuple with an instance of Node and a numpy array indicating
-            the branch index for each data instance, or -1 if data instance
-            is dropped
+            tuple with an instance of Node, a numpy array indicating
+            the branch index for each data instance in `rows`, or -1 if data
+            instance is dropped, and the number of branches
         """
-        # Prevent false warnings by pylint
-        attr = attr_no = None
         REJECT_ATTRIBUTE = 0, None, None, 0
+        domain = data.domain
+        class_var = domain.class_var
+        X, Y = data.X, data.Y
+        W = data.W if data.has_weights() else None
 
-        def _score_disc():
+        def _score_disc(attr_no, attr):
             """Scoring for discrete attributes, no binarization
 
             The class computes the entropy itself, not by calling other
@@ -87,9 +121,9 @@ class TreeLearner(Learner):
             if n_values < 2:
                 return REJECT_ATTRIBUTE
 
-            x = data.X[:, attr_no].flatten()
-            cont = _tree_scorers.contingency(x, len(data.domain.attributes[attr_no].values),
-                                             data.Y, len(data.domain.class_var.values))
+            x = X[rows, attr_no]
+            cont = _tree_scorers.contingency(x, n_values,
+                                             Y[rows], len(class_var.values))
             attr_distr = np.sum(cont, axis=0)
             null_nodes = attr_distr <= self.min_samples_leaf
             # This is just for speed. If there is only a single non-null-node,
@@ -108,7 +142,7 @@ class TreeLearner(Learner):
             attr_entr = np.sum(attr_distr * np.log(attr_distr))
             cont_entr = np.sum(cont * np.log(cont))
             score = (class_entr - attr_entr + cont_entr) / n / np.log(2)
-            score *= n / len(data)  # punishment for missing values
+            score *= n / len(rows)  # punishment for missing values
             branches = x
             branches[np.isnan(branches)] = -1
             if score == 0:
@@ -116,12 +150,16 @@ class TreeLearner(Learner):
             node = DiscreteNode(attr, attr_no, None)
             return score, node, branches, n_values
 
-        def _score_disc_bin():
+        def _score_disc_bin(attr_no, attr):
             """Scoring for discrete attributes, with binarization"""
             n_values = len(attr.values)
             if n_values <= 2:
-                return _score_disc()
-            cont = contingency.Discrete(data, attr)
+                return _score_disc(attr_no, attr)
+            x = X[rows, attr_no]
+            cont, unknowns = util.contingency(
+                x, Y[rows], n_values - 1, len(class_var.values) - 1,
+                None if W is None else W[rows])
+            cont = np.asarray(cont, dtype=np.float64)
             attr_distr = np.sum(cont, axis=0)
             # Skip instances with missing value of the attribute
             cls_distr = np.sum(cont, axis=1)
@@ -131,66 +169,127 @@ class TreeLearner(Learner):
                 cont, cls_distr, attr_distr, self.min_samples_leaf)
             if best_score <= 0:
                 return REJECT_ATTRIBUTE
-            best_score *= 1 - np.sum(cont.unknowns) / len(data)
+            best_score *= 1 - np.sum(unknowns) / len(rows)
             mapping, branches = MappedDiscreteNode.branches_from_mapping(
-                data.X[:, attr_no], best_mapping, n_values)
+                x, best_mapping, n_values)
             node = MappedDiscreteNode(attr, attr_no, mapping, None)
             return best_score, node, branches, 2
 
-        def _score_cont():
+        def _score_cont(attr_no, attr):
             """Scoring for numeric attributes"""
-            col_x = data.X[:, attr_no]
-            nans = np.sum(np.isnan(col_x))
-            non_nans = len(col_x) - nans
-            arginds = np.argsort(col_x)[:non_nans]
+            arginds = sorted_rows[attr_no]
+            non_nans = len(arginds)
             best_score, best_cut = _tree_scorers.find_threshold_entropy(
-                col_x, data.Y, arginds,
+                X[:, attr_no], Y, arginds,
                 len(class_var.values), self.min_samples_leaf)
             if best_score == 0:
                 return REJECT_ATTRIBUTE
-            best_score *= non_nans / len(col_x)
-            branches = np.full(len(col_x), -1, dtype=int)
-            mask = ~np.isnan(col_x)
-            branches[mask] = (col_x[mask] > best_cut).astype(int)
+            best_score *= non_nans / len(rows)
             node = NumericNode(attr, attr_no, best_cut, None)
-            return best_score, node, branches, 2
+            # Branches are computed only for the selected attribute
+            return best_score, node, None, 2
+
+        def _score(attr_no):
+            attr = domain.attributes[attr_no]
+            if attr.is_continuous:
+                return _score_cont(attr_no, attr)
+            return disc_scorer(attr_no, attr)
 
         #######################################
         # The real _select_attr starts here
-        domain = data.domain
-        class_var = domain.class_var
         best_score, *best_res = REJECT_ATTRIBUTE
         best_res = [Node(None, None, None)] + best_res[1:]
         disc_scorer = _score_disc_bin if self.binarize else _score_disc
-        for attr_no, attr in enumerate(domain.attributes):
-            sc, *res = disc_scorer() if attr.is_discrete else _score_cont()
+        attr_nos = candidate_attributes(
+            len(domain.attributes), self.max_features, random)
+        if executor is not None and \
+                len(rows) >= self.MIN_PARALLEL_INSTANCES:
+            scored = executor.map(_score, attr_nos)
+        else:
+            scored = map(_score, attr_nos)
+        for sc, *res in scored:
             if res[0] is not None and sc > best_score:
                 best_score, best_res = sc, res
-        best_res[0].value = distribution.Discrete(data, class_var)
+        node = best_res[0]
+        if isinstance(node, NumericNode):
+            col_x = X[rows, node.attr_idx]
+            branches = np.full(len(rows), -1, dtype=int)
+            mask = ~np.isnan(col_x)
+            branches[mask] = (col_x[mask] > node.threshold).astype(int)
+            best_res[1] = branches
         return best_res
 
-    def build_tree(self, data, active_inst, level=1):
+    def _distribution(self, data, rows):
+        W = data.W[rows] if data.has_weights() else None
+        class_var = data.domain.class_var
+        distr, unknowns = util.bincount(data.Y[rows], len(class_var.values) - 1, W)
+        return distribution.Discrete(distr, class_var, unknowns)
+
+    def build_tree(self, data, active_inst, level=1, sorted_rows=None,
+                   executor=None, random=None):
         """Induce a tree from the given data
 
+        The tree is induced from indices of instances; data is never
+        sliced. Continuous attributes are sorted once, and the sorted
+        indices are partitioned (stably) between the branches.
+
+        Args:
+            data (Table): training data
+            active_inst (np.ndarray): indices of instances in the node
+            level (int): depth of the node
+            sorted_rows (dict): indices of instances (`active_inst`) with
+                known values of continuous attributes, sorted by the values;
+                computed if not given
+            executor (concurrent.futures.Executor): executor for scoring
+                attributes in parallel
+            random (np.random.RandomState): generator for choosing
+                attributes if `max_features` is set
+
         Returns:
             root node (Node)"""
-        node_insts = data[active_inst]
-        distr = distribution.Discrete(node_insts, data.domain.class_var)
-        if len(node_insts) < self.min_samples_leaf:
+        if len(active_inst) < self.min_samples_leaf:
             return None
-        if len(node_insts) < self.min_samples_split or \
+        if sorted_rows is None:
+            sorted_rows = sort_rows(data, active_inst)
+        distr = self._distribution(data, active_inst)
+        if len(active_inst) < self.min_samples_split or \
                 max(distr) >= sum(distr) * self.sufficient_majority or \
                 self.max_depth is not None and level > self.max_depth:
-            node, branches, n_children = Node(None, None, distr), None, 0
+            node, branches, n_children = Node(None, None, None), None, 0
         else:
-            node, branches, n_children = self._select_attr(node_insts)
+            node, branches, n_children = self._select_attr(
+                data, active_inst, sorted_rows, executor, random)
+        node.value = distr
         node.subset = active_inst
         if branches is not None:
+            child_sorted = partition_sorted(
+                data, active_inst, branches, n_children, sorted_rows)
+            # Sorted indices of this node are no longer needed
+            sorted_rows.clear()
             node.children = [
-                self.build_tree(data, active_inst[branches == br], level + 1)
+                self.build_tree(data, active_inst[branches == br], level + 1,
+                                child_sorted[br], executor, random)
                 for br in range(n_children)]
         return node
 
+    def build_root(self, data, active_inst):
+        """Induce a tree from the given instances (indices into `data`,
+        which may repeat) and return its root"""
+        random = np.random.RandomState(self.random_state)
+        if self.n_jobs > 1:
+            with ThreadPoolExecutor(self.n_jobs) as executor:
+                root = self.build_tree(data, active_inst, executor=executor,
+                                       random=random)
+        else:
+            root = self.build_tree(data, active_inst, random=random)
+        if root is None:
+            distr = self._distribution(data, active_inst)
+            if np.sum(distr) == 0:
+                distr[:] = 1
+            root = Node(None, 0, distr)
+        root.subset = active_inst
+        return root
+
     def fit_storage(self, data):
         if self.binarize and any(
                 attr.is_discrete and len(attr.values) > self.MAX_BINARIZATION
@@ -202,15 +301,51 @@ class TreeLearner(Learner):
                              format(self.MAX_BINARIZATION))
 
         active_inst = np.nonzero(~np.isnan(data.Y))[0].astype(np.int32)
-        root = self.build_tree(data, active_inst)
-        if root is None:
-            distr = distribution.Discrete(data, data.domain.class_var)
-            if np.sum(distr) == 0:
-                distr[:] = 1
-            root = Node(None, 0, distr)
-        root.subset = active_inst
-        model = TreeModel(data, root)
-        return model
+        return TreeModel(data, self.build_root(data, active_inst))
+
+
+class TreeForestLearner(ForestLearner, Learner):
+    """
+    Random forest of trees induced by :obj:`TreeLearner`.
+
+    The model averages the class probabilities predicted by trees, which
+    are instances of :obj:`Orange.tree.TreeModel` and can be shown in
+    tree visualizations. Arguments are described in
+    :obj:`Orange.tree.ForestLearner` and :obj:`TreeLearner`.
+    """
+    name = 'tree forest'
+
+    def __init__(self, n_estimators=10, max_features="sqrt", bootstrap=True,
+                 binarize=False, max_depth=None, min_samples_leaf=1,
+                 min_samples_split=2, sufficient_majority=1.0,
+                 random_state=0, n_jobs=1, preprocessors=None):
+        super().__init__(n_estimators=n_estimators,
+                         max_features=max_features, bootstrap=bootstrap,
+                         random_state=random_state, n_jobs=n_jobs,
+                         preprocessors=preprocessors)
+        self.binarize = binarize
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.min_samples_split = min_samples_split
+        self.sufficient_majority = sufficient_majority
+
+    def tree_learner(self, random_state):
+        return TreeLearner(
+            binarize=self.binarize, max_depth=self.max_depth,
+            min_samples_leaf=self.min_samples_leaf,
+            min_samples_split=self.min_samples_split,
+            sufficient_majority=self.sufficient_majority,
+            max_features=self.max_features, random_state=random_state)
+
+    def fit_storage(self, data):
+        if self.binarize and any(
+                attr.is_discrete and
+                len(attr.values) > TreeLearner.MAX_BINARIZATION
+                for attr in data.domain.attributes):
+            raise ValueError("Exhaustive binarization does not handle "
+                             "attributes with more than {} values".
+                             format(TreeLearner.MAX_BINARIZATION))
+        return super().fit_storage(data)
 
 
 class SklTreeClassifier(SklModel):
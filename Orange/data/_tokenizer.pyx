@@ -0,0 +1,436 @@
+#cython: embedsignature=True
+#cython: boundscheck=False
+#cython: wraparound=False
+#cython: cdivision=True
+"""
+Tokenization of delimited text and conversion of its columns for the native
+engine of `Orange.data.io.CSVReader`.
+
+The tokenizer follows the rules of Python's `csv.reader` (non-strict, without
+an escape character) for a file opened with `newline=''`. It works on bytes,
+so it only supports encodings in which bytes of ASCII characters always
+represent these characters. Unquoted and unescaped contents of fields are
+written into an output buffer of the same size as the input, at positions
+that never exceed those of the input, so ranges of the input can be
+tokenized by concurrent threads.
+"""
+
+import numpy as np
+cimport numpy as np
+from libc.math cimport NAN
+from libc.stdint cimport int32_t, int64_t, uint64_t
+from libc.stdlib cimport realloc, free, strtod, calloc
+from libc.string cimport memchr, memcmp, memcpy
+
+cdef enum State:
+    START_RECORD, START_FIELD, IN_FIELD, IN_QUOTED_FIELD,
+    QUOTE_IN_QUOTED_FIELD, EAT_CRNL
+
+# The end of a line, which is what csv's state machine is given after each
+# line; NUL bytes are not allowed in data
+cdef enum:
+    EOL = 0
+
+# Longest number that is converted by strtod
+cdef enum:
+    MAX_NUMBER_LEN = 63
+
+
+cdef struct Int64Array:
+    int64_t *data
+    Py_ssize_t size
+    Py_ssize_t capacity
+
+
+cdef int append(Int64Array *arr, int64_t value) nogil:
+    cdef:
+        int64_t *data
+        Py_ssize_t capacity
+    if arr.size == arr.capacity:
+        capacity = max(1024, 2 * arr.capacity)
+        data = <int64_t *>realloc(arr.data, capacity * sizeof(int64_t))
+        if data == NULL:
+            return -1
+        arr.data = data
+        arr.capacity = capacity
+    arr.data[arr.size] = value
+    arr.size += 1
+    return 0
+
+
+cdef to_array(Int64Array *arr):
+    """Return the contents as numpy array and free the memory"""
+    result = np.empty(arr.size, dtype=np.int64)
+    cdef int64_t[:] view = result
+    if arr.size:
+        memcpy(&view[0], arr.data, arr.size * sizeof(int64_t))
+    free(arr.data)
+    arr.data = NULL
+    arr.size = arr.capacity = 0
+    return result
+
+
+cdef struct Tokenizer:
+    unsigned char *out
+    Py_ssize_t pos
+    Py_ssize_t field_start
+    State state
+    unsigned char delimiter
+    unsigned char quotechar
+    bint quoting
+    bint doublequote
+    bint skipinitialspace
+    Int64Array starts
+    Int64Array ends
+    Int64Array row_ends
+
+
+cdef inline int save_field(Tokenizer *t) nogil:
+    if append(&t.starts, t.field_start) < 0 or append(&t.ends, t.pos) < 0:
+        return -1
+    t.field_start = t.pos
+    return 0
+
+
+cdef inline void add_char(Tokenizer *t, unsigned char c) nogil:
+    t.out[t.pos] = c
+    t.pos += 1
+
+
+cdef inline bint is_newline(unsigned char c) nogil:
+    return c == b'\n' or c == b'\r' or c == EOL
+
+
+cdef int end_field(Tokenizer *t, unsigned char c) nogil:
+    # Save the field ended by a newline or by the end of line
+    if save_field(t) < 0:
+        return -1
+    t.state = START_RECORD if c == EOL else EAT_CRNL
+    return 0
+
+
+cdef int process(Tokenizer *t, unsigned char c) nogil:
+    """Process a character as csv's parse_process_char does"""
+    if t.state == START_RECORD:
+        if c == EOL:
+            return 0
+        if c == b'\n' or c == b'\r':
+            t.state = EAT_CRNL
+            return 0
+        t.state = START_FIELD
+    if t.state == START_FIELD:
+        if is_newline(c):
+            return end_field(t, c)
+        elif c == t.quotechar and t.quoting:
+            t.state = IN_QUOTED_FIELD
+        elif c == b' ' and t.skipinitialspace:
+            pass
+        elif c == t.delimiter:
+            return save_field(t)
+        else:
+            add_char(t, c)
+            t.state = IN_FIELD
+    elif t.state == IN_FIELD:
+        if is_newline(c):
+            return end_field(t, c)
+        elif c == t.delimiter:
+            t.state = START_FIELD
+            return save_field(t)
+        else:
+            add_char(t, c)
+    elif t.state == IN_QUOTED_FIELD:
+        if c == EOL:
+            pass
+        elif c == t.quotechar:
+            t.state = QUOTE_IN_QUOTED_FIELD if t.doublequote else IN_FIELD
+        else:
+            add_char(t, c)
+    elif t.state == QUOTE_IN_QUOTED_FIELD:
+        if c == t.quotechar:
+            add_char(t, c)
+            t.state = IN_QUOTED_FIELD
+        elif c == t.delimiter:
+            t.state = START_FIELD
+            return save_field(t)
+        elif is_newline(c):
+            return end_field(t, c)
+        else:
+            add_char(t, c)
+            t.state = IN_FIELD
+    elif t.state == EAT_CRNL:
+        if c == EOL:
+            t.state = START_RECORD
+    return 0
+
+
+cdef int end_line(Tokenizer *t) nogil:
+    if process(t, EOL) < 0:
+        return -1
+    if t.state == START_RECORD:
+        return append(&t.row_ends, t.starts.size)
+    return 0
+
+
+def find_byte(const unsigned char[:] buf, unsigned char byte,
+              Py_ssize_t start=0):
+    """Return the index of the first `byte` in `buf` from `start`, or -1"""
+    cdef const unsigned char *found
+    if start >= buf.shape[0]:
+        return -1
+    with nogil:
+        found = <const unsigned char *>memchr(
+            &buf[start], byte, buf.shape[0] - start)
+    return -1 if found == NULL else found - &buf[0]
+
+
+def tokenize(const unsigned char[:] buf, unsigned char[:] out,
+             Py_ssize_t start, Py_ssize_t end, delimiter, quotechar,
+             bint doublequote, bint skipinitialspace):
+    """
+    Split `buf[start:end]`, which must begin at the start of a record, into
+    records and fields, as `csv.reader` with the given dialect would.
+
+    Contents of fields are written into `out`. Return a tuple with arrays of
+    starts and ends of fields in `out`, an array with the number of fields
+    up to the end of each record, and a flag telling whether the range ends
+    at the end of a record; if not, the next range does not begin at the
+    start of a record. The range that ends at the end of `buf` is ended as
+    the file would be.
+    """
+    cdef:
+        Tokenizer t
+        Py_ssize_t i = start
+        unsigned char c
+        bint line_open = False
+        bint at_eof = end == buf.shape[0]
+        int error = 0
+
+    t.out = &out[0]
+    t.pos = t.field_start = start
+    t.state = START_RECORD
+    t.delimiter = ord(delimiter)
+    t.quoting = quotechar is not None
+    t.quotechar = ord(quotechar) if t.quoting else 0
+    t.doublequote = doublequote
+    t.skipinitialspace = skipinitialspace
+    t.starts = t.ends = t.row_ends = Int64Array(NULL, 0, 0)
+
+    with nogil:
+        # Lines end with \n, \r or \r\n, as in universal newlines mode
+        while i < end and error == 0:
+            c = buf[i]
+            i += 1
+            error = process(&t, c)
+            line_open = True
+            if c == b'\r' and i < end and buf[i] == b'\n' and error == 0:
+                i += 1
+                error = process(&t, b'\n')
+            if (c == b'\n' or c == b'\r') and error == 0:
+                error = end_line(&t)
+                line_open = False
+        if at_eof and error == 0 and line_open:
+            error = end_line(&t)
+        # Like csv.reader, yield an unterminated quoted field at the end
+        if at_eof and error == 0 and t.state == IN_QUOTED_FIELD:
+            error = save_field(&t)
+            if error == 0:
+                error = append(&t.row_ends, t.starts.size)
+            t.state = START_RECORD
+
+    ends_record = t.state == START_RECORD
+    arrays = to_array(&t.starts), to_array(&t.ends), to_array(&t.row_ends)
+    if error:
+        raise MemoryError
+    return arrays + (ends_record,)
+
+
+cdef inline bint is_space(unsigned char c) nogil:
+    # ASCII characters that are stripped by str.strip
+    return c == b' ' or b'\t' <= c <= b'\r' or 0x1c <= c <= 0x1f
+
+
+cdef inline void strip(const unsigned char *out, int64_t *start,
+                       int64_t *end) nogil:
+    while start[0] < end[0] and is_space(out[start[0]]):
+        start[0] += 1
+    while end[0] > start[0] and is_space(out[end[0] - 1]):
+        end[0] -= 1
+
+
+cdef inline bint is_missing(const unsigned char *s, int64_t length) nogil:
+    # Strings from Orange.data.variable.MISSING_VALUES
+    if length == 0:
+        return True
+    if length == 1:
+        return s[0] == b'?' or s[0] == b'.' or s[0] == b'~'
+    if length == 2:
+        return s[0] == b'N' and s[1] == b'A'
+    if length == 3:
+        return s[0] == b'n' and s[1] == b'a' and s[2] == b'n'
+    return False
+
+
+cdef inline bint is_digit(unsigned char c) nogil:
+    return b'0' <= c <= b'9'
+
+
+cdef bint parse_number(const unsigned char *s, int64_t length,
+                       double *value) nogil:
+    """
+    Convert a decimal number in plain or scientific notation; return False
+    for other strings, which are left to Python's float.
+    """
+    cdef:
+        int64_t i = 0, digits = 0, exp_digits = 0
+        char buffer[MAX_NUMBER_LEN + 1]
+        char *end
+    if length > MAX_NUMBER_LEN:
+        return False
+    if i < length and (s[i] == b'+' or s[i] == b'-'):
+        i += 1
+    while i < length and is_digit(s[i]):
+        i += 1
+        digits += 1
+    if i < length and s[i] == b'.':
+        i += 1
+        while i < length and is_digit(s[i]):
+            i += 1
+            digits += 1
+    if digits == 0:
+        return False
+    if i < length and (s[i] == b'e' or s[i] == b'E'):
+        i += 1
+        if i < length and (s[i] == b'+' or s[i] == b'-'):
+            i += 1
+        while i < length and is_digit(s[i]):
+            i += 1
+            exp_digits += 1
+        if exp_digits == 0:
+            return False
+    if i != length:
+        return False
+    memcpy(buffer, s, length)
+    buffer[length] = 0
+    value[0] = strtod(buffer, &end)
+    # strtod stops at the decimal point of locales that use another one
+    return end == buffer + length
+
+
+def parse_numbers(const unsigned char[:] out, const int64_t[:] starts,
+                  const int64_t[:] ends, const int64_t[:] cells,
+                  double[:] values):
+    """
+    Convert fields with indices `cells` (-1 for missing fields) into
+    `values`, with nan for missing values. Return False if some field is
+    not a number in plain or scientific notation.
+    """
+    cdef:
+        Py_ssize_t row
+        int64_t cell, start, end
+        bint ok = True
+    with nogil:
+        for row in range(cells.shape[0]):
+            cell = cells[row]
+            if cell < 0:
+                values[row] = NAN
+                continue
+            start, end = starts[cell], ends[cell]
+            strip(&out[0], &start, &end)
+            if is_missing(&out[start], end - start):
+                values[row] = NAN
+            elif not parse_number(&out[start], end - start, &values[row]):
+                ok = False
+                break
+    return ok
+
+
+cdef inline uint64_t fnv1a(const unsigned char *s, int64_t length) nogil:
+    cdef:
+        uint64_t h = 14695981039346656037ULL
+        int64_t i
+    for i in range(length):
+        h = (h ^ s[i]) * 1099511628211ULL
+    return h
+
+
+cdef int rehash(int32_t **table, Py_ssize_t capacity,
+                const unsigned char *out, Int64Array *uniques) nogil:
+    # Slots hold codes + 1, with 0 for an empty slot; `uniques` has starts
+    # and ends of unique values interleaved
+    cdef:
+        int32_t *new_table = <int32_t *>calloc(capacity, sizeof(int32_t))
+        Py_ssize_t code, slot, mask = capacity - 1
+        int64_t start
+    if new_table == NULL:
+        return -1
+    for code in range(uniques.size // 2):
+        start = uniques.data[2 * code]
+        slot = fnv1a(&out[start], uniques.data[2 * code + 1] - start) & mask
+        while new_table[slot]:
+            slot = (slot + 1) & mask
+        new_table[slot] = code + 1
+    free(table[0])
+    table[0] = new_table
+    return 0
+
+
+def encode(const unsigned char[:] out, const int64_t[:] starts,
+           const int64_t[:] ends, const int64_t[:] cells, int32_t[:] codes,
+           Py_ssize_t max_uniques=-1):
+    """
+    Store codes of stripped fields with indices `cells` into `codes`, with
+    -1 for missing values, and return the list of distinct values (as
+    bytes) in the order of appearance. Return None if there are more than
+    `max_uniques` distinct values (if `max_uniques` is not -1).
+    """
+    cdef:
+        Py_ssize_t row, slot, capacity = 64, code, i
+        int64_t cell, start, end, ustart
+        int32_t *table = NULL
+        Int64Array uniques = Int64Array(NULL, 0, 0)
+        int error = rehash(&table, capacity, &out[0], &uniques)
+        bint exceeded = False
+        const char *chars = <const char *>&out[0]
+        int64_t[:] bounds
+    with nogil:
+        for row in range(cells.shape[0]):
+            if error:
+                break
+            cell = cells[row]
+            if cell < 0:
+                codes[row] = -1
+                continue
+            start, end = starts[cell], ends[cell]
+            strip(&out[0], &start, &end)
+            if is_missing(&out[start], end - start):
+                codes[row] = -1
+                continue
+            slot = fnv1a(&out[start], end - start) & (capacity - 1)
+            while table[slot]:
+                code = table[slot] - 1
+                ustart = uniques.data[2 * code]
+                if uniques.data[2 * code + 1] - ustart == end - start and \
+                        memcmp(&out[ustart], &out[start], end - start) == 0:
+                    break
+                slot = (slot + 1) & (capacity - 1)
+            else:
+                code = uniques.size // 2
+                if code == max_uniques:
+                    exceeded = True
+                    break
+                if append(&uniques, start) < 0 or append(&uniques, end) < 0:
+                    error = -1
+                    break
+                table[slot] = code + 1
+                if 2 * (code + 1) > capacity:
+                    capacity *= 2
+                    error = rehash(&table, capacity, &out[0], &uniques)
+            codes[row] = code
+    free(table)
+    bounds = to_array(&uniques)
+    if error:
+        raise MemoryError
+    if exceeded:
+        return None
+    return [chars[bounds[i]:bounds[i + 1]]
+            for i in range(0, bounds.shape[0], 2)]
@@ -1,31 +1,36 @@
+import codecs
 import contextlib
 import csv
 import locale
 import pickle
 import re
+import struct
 import subprocess
 import sys
 import warnings
 
 from ast import literal_eval
 from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from itertools import chain, repeat
+from itertools import chain, repeat, islice
 from math import isnan
 from numbers import Number
-from os import path, unlink
+from os import path, unlink, cpu_count
 from tempfile import NamedTemporaryFile
 from urllib.parse import urlparse, urlsplit, urlunsplit, unquote as urlunquote
 from urllib.request import urlopen, Request
 
 import bottleneck as bn
 import numpy as np
+import scipy.sparse as sp
 from chardet.universaldetector import UniversalDetector
 
 from Orange.data import (
-    _io, is_discrete_values, MISSING_VALUES, Table, Domain, Variable,
+    _io, _tokenizer, is_discrete_values, MISSING_VALUES, Table, Domain, Variable,
     DiscreteVariable, StringVariable, ContinuousVariable, TimeVariable,
 )
+from Orange.data.variable import DISCRETE_MAX_VALUES
 from Orange.util import Registry, flatten, namegen
 
 
@@ -153,6 +158,119 @@ _RE_TYPES = re.compile(r'^\s*({}|{}|)\s*$'.format(_RE_DISCRETE_LIST.pattern,
 _RE_FLAGS = re.compile(r'^\s*( |{}|)*\s*$'.format('|'.join(flatten(filter(None, i) for i in Flags.ALL.items()))))
 
 
+class InferredTypeError(ValueError):
+    """
+    Raised by `FileFormat.data_table_chunked` when a value does not match
+    the type of the column that was inferred from the preceding rows.
+    """
+
+
+class _ColumnBuffer:
+    """
+    Values of a column that is read in chunks.
+
+    Values of numeric columns are stored as floats and values of other
+    columns as codes into the list of distinct values (-1 for missing).
+    The buffer grows geometrically.
+    """
+    def __init__(self, size=0, continuous=False, heuristic=False):
+        self.heuristic = heuristic
+        self._can_be_numeric = heuristic
+        self.size = 0
+        self.index, self.uniques = {}, []
+        self.has_missing = False
+        self.buffer = np.empty(max(size, 16),
+                               dtype=float if continuous else np.int32)
+        if size:
+            self.extend([''] * size)
+
+    @classmethod
+    def from_array(cls, buffer, uniques=None, heuristic=False):
+        """
+        Return a buffer with floats or, if `uniques` are given, with codes
+        into `uniques`.
+        """
+        column = cls(heuristic=heuristic)
+        column.buffer, column.size = buffer, len(buffer)
+        if uniques is not None:
+            column.uniques = uniques
+            column.index = {value: i for i, value in enumerate(uniques)}
+            column.has_missing = bool(np.any(buffer == -1))
+        return column
+
+    @property
+    def is_numeric(self):
+        return self.buffer.dtype == float
+
+    @property
+    def codes(self):
+        """Codes of values of a non-numeric column (-1 for missing)"""
+        return self.buffer[:self.size]
+
+    def extend(self, values):
+        """
+        Append stripped values; raise ValueError if the column is numeric
+        and a value is not a number.
+        """
+        if self.is_numeric:
+            new = [np.nan if i in MISSING_VALUES else float(i) for i in values]
+        else:
+            index, uniques = self.index, self.uniques
+
+            def code(value):
+                if value in MISSING_VALUES:
+                    return -1
+                value_code = index.get(value)
+                if value_code is None:
+                    value_code = index[value] = len(uniques)
+                    uniques.append(value)
+                return value_code
+
+            new = [code(i) for i in values]
+            self.has_missing = self.has_missing or -1 in new
+
+        size = self.size + len(new)
+        if size > len(self.buffer):
+            buffer = np.empty(max(size, 2 * len(self.buffer)),
+                              dtype=self.buffer.dtype)
+            buffer[:self.size] = self.buffer[:self.size]
+            self.buffer = buffer
+        self.buffer[self.size:size] = new
+        self.size = size
+
+    def infer_numeric(self):
+        """
+        Convert the values of a column without a type header to floats if
+        the column cannot be discrete and all its values are numbers, which
+        is how `FileFormat.data_table` would treat it.
+        """
+        if not self._can_be_numeric or \
+                len(self.uniques) + self.has_missing <= DISCRETE_MAX_VALUES:
+            return
+        self._can_be_numeric = False
+        uniques = self.uniques + [np.nan]
+        try:
+            # The first values decide whether the column is numeric;
+            # see `is_discrete_values`
+            if self.buffer[0] != -1:
+                [float(uniques[i]) for i in self.buffer[:3]]
+            lookup = np.array([float(i) for i in uniques])
+        except ValueError:
+            return
+        self.buffer = lookup[self.buffer[:self.size]]
+        self.index, self.uniques = {}, []
+
+    def values(self):
+        """
+        Return the values as floats for numeric columns, or else as an
+        object array of strings with missing values replaced by nan.
+        """
+        values = self.buffer[:self.size]
+        if self.is_numeric:
+            return values
+        return np.array(self.uniques + [np.nan], dtype=object)[values]
+
+
 class FileFormatMeta(Registry):
 
     def __new__(cls, name, bases, attrs):
@@ -417,7 +535,133 @@ class FileFormat(metaclass=FileFormatMeta):
         """
         if not headers:
             headers, data = self.parse_headers(data)
+        names, types, flags = self.header_fields(headers)
+
+        # Determine maximum row length
+        rowlen = max(map(len, (names, types, flags)))
+
+        def _equal_length(lst):
+            lst.extend(['']*(rowlen - len(lst)))
+            return lst
+
+        # Ensure all data is of equal width in a column-contiguous array
+        data = np.array([_equal_length(list(row)) for row in data if any(row)],
+                        copy=False, dtype=object, order='F')
 
+        # Data may actually be longer than headers were
+        try:
+            rowlen = data.shape[1]
+        except IndexError:
+            pass
+        else:
+            for lst in (names, types, flags):
+                _equal_length(lst)
+
+        def column_values(col):
+            try:
+                return [np.nan if i in MISSING_VALUES else i
+                        for i in (i.strip() for i in data[:, col])]
+            except IndexError:
+                # No data instances leads here
+                return []
+
+        return self._table_from_columns(names, types, flags, rowlen,
+                                        len(headers), len(data), column_values)
+
+    @classmethod
+    def data_table_chunked(cls, data, headers=None, chunk_size=10000):
+        """
+        Return Orange.data.Table given rows of `headers` and `data`, like
+        `data_table`, but read `data` in chunks of `chunk_size` rows.
+
+        The rows are not stored; the values of each column are appended to
+        a buffer that grows geometrically. Columns with declared or inferred
+        numeric types are kept as floats, and other columns as codes into
+        the list of their distinct values. Thus the memory used is close to
+        that of the resulting table plus a single chunk.
+
+        A column without a type header is stored as floats once its first
+        rows show that it cannot be discrete and all its values so far are
+        numbers. If a non-numeric value appears in such column later, the
+        function raises `InferredTypeError`.
+        """
+        data = iter(data)
+        if not headers:
+            headers, data = cls.parse_headers(data)
+        names, types, flags = cls.header_fields(headers)
+        rowlen = max(map(len, (names, types, flags)))
+        for lst in (names, types, flags):
+            lst.extend([''] * (rowlen - len(lst)))
+
+        def new_column(col, size):
+            if col >= len(flags):
+                return _ColumnBuffer(size, heuristic=True)
+            if Flags(Flags.split(flags[col])).i:
+                return None
+            type_flag = types[col].strip()
+            return _ColumnBuffer(
+                size, continuous=type_flag in ContinuousVariable.TYPE_HEADERS,
+                heuristic=not any(type_flag in var.TYPE_HEADERS for var in (
+                    StringVariable, ContinuousVariable, TimeVariable,
+                    DiscreteVariable)) and not _RE_DISCRETE_LIST.match(type_flag))
+
+        columns = [new_column(col, 0) for col in range(rowlen)]
+        n_rows = 0
+        rows = (row for row in data if any(row))
+        while True:
+            chunk = [list(row) for row in islice(rows, chunk_size)]
+            if not chunk:
+                break
+            width = max(len(columns), max(map(len, chunk)))
+            columns += [new_column(col, n_rows)
+                        for col in range(len(columns), width)]
+            for row in chunk:
+                row.extend([''] * (width - len(row)))
+            for col, values in enumerate(zip(*chunk)):
+                column = columns[col]
+                if column is None:
+                    continue
+                values = [i.strip() for i in values]
+                try:
+                    column.extend(values)
+                except ValueError:
+                    if column.heuristic:
+                        raise InferredTypeError(
+                            "Column {} is not numeric".format(col + 1))
+                    for row, num in enumerate(values):
+                        if num not in MISSING_VALUES:
+                            try:
+                                float(num)
+                            except ValueError:
+                                break
+                    raise ValueError('Non-continuous value in (1-based) '
+                                     'line {}, column {}'.format(
+                                         n_rows + row + len(headers) + 1,
+                                         col + 1))
+                column.infer_numeric()
+            n_rows += len(chunk)
+
+        rowlen = len(columns)
+        for lst in (names, types, flags):
+            lst.extend([''] * (rowlen - len(lst)))
+        for col, column in enumerate(columns):
+            if column is not None and column.heuristic and column.is_numeric:
+                # Inferred as numeric, which is what the heuristic would do
+                types[col] = ContinuousVariable.TYPE_HEADERS[0]
+
+        def column_values(col):
+            column, columns[col] = columns[col], None
+            return column
+
+        return cls._table_from_columns(names, types, flags, rowlen,
+                                       len(headers), n_rows, column_values)
+
+    @staticmethod
+    def header_fields(headers):
+        """
+        Return lists of names, types and flags of columns given `headers`
+        with either one, two or three rows, or no headers.
+        """
         # Consider various header types (single-row, two-row, three-row, none)
         if 3 == len(headers):
             names, types, flags = map(list, headers)
@@ -438,27 +682,17 @@ class FileFormat(metaclass=FileFormatMeta):
                 names, _flags = [], []
             types = [''.join(filter(str.isupper, flag)).lower() for flag in _flags]
             flags = [Flags.join(filter(str.islower, flag)) for flag in _flags]
+        return names, types, flags
 
-        # Determine maximum row length
-        rowlen = max(map(len, (names, types, flags)))
-
-        def _equal_length(lst):
-            lst.extend(['']*(rowlen - len(lst)))
-            return lst
-
-        # Ensure all data is of equal width in a column-contiguous array
-        data = np.array([_equal_length(list(row)) for row in data if any(row)],
-                        copy=False, dtype=object, order='F')
-
-        # Data may actually be longer than headers were
-        try:
-            rowlen = data.shape[1]
-        except IndexError:
-            pass
-        else:
-            for lst in (names, types, flags):
-                _equal_length(lst)
-
+    @classmethod
+    def _table_from_columns(cls, names, types, flags, rowlen, n_headers,
+                            n_rows, column_values):
+        """
+        Return Orange.data.Table with `rowlen` columns described by `names`,
+        `types` and `flags`. Callable `column_values` is given a column index
+        and returns stripped values of the column with missing values
+        replaced by nan, or a `_ColumnBuffer` with them.
+        """
         NAMEGEN = namegen('Feature ', 1)
         Xcols, attrs = [], []
         Mcols, metas = [], []
@@ -477,22 +711,23 @@ class FileFormat(metaclass=FileFormatMeta):
                     names[i] = "{}_{}".format(name, uses[name])
 
         # Iterate through the columns
+        converted = {}
         for col in range(rowlen):
             flag = Flags(Flags.split(flags[col]))
             if flag.i:
                 continue
 
             type_flag = types and types[col].strip()
-            try:
-                orig_values = [np.nan if i in MISSING_VALUES else i
-                               for i in (i.strip() for i in data[:, col])]
-            except IndexError:
-                # No data instances leads here
-                orig_values = []
-                # In this case, coltype could be anything. It's set as-is
-                # only to satisfy test_table.TableTestCase.test_append
-                coltype = DiscreteVariable
-
+            orig_values = column_values(col)
+            # Discrete values of buffers are mapped through their codes
+            coded = None
+            if isinstance(orig_values, _ColumnBuffer):
+                if not orig_values.is_numeric:
+                    coded = orig_values
+                orig_values = orig_values.values()
+            # Without data instances, coltype could be anything. It's set
+            # as-is only to satisfy test_table.TableTestCase.test_append
+            coltype = DiscreteVariable
             coltype_kwargs = {}
             valuemap = []
             values = orig_values
@@ -502,7 +737,10 @@ class FileFormat(metaclass=FileFormatMeta):
             elif type_flag in ContinuousVariable.TYPE_HEADERS:
                 coltype = ContinuousVariable
                 try:
-                    values = [float(i) for i in orig_values]
+                    if getattr(orig_values, "dtype", None) == float:
+                        values = orig_values  # already parsed
+                    else:
+                        values = [float(i) for i in orig_values]
                 except ValueError:
                     for row, num in enumerate(orig_values):
                         try:
@@ -510,7 +748,7 @@ class FileFormat(metaclass=FileFormatMeta):
                         except ValueError:
                             break
                     raise ValueError('Non-continuous value in (1-based) '
-                                     'line {}, column {}'.format(row + len(headers) + 1,
+                                     'line {}, column {}'.format(row + n_headers + 1,
                                                                  col + 1))
 
             elif type_flag in TimeVariable.TYPE_HEADERS:
@@ -521,6 +759,8 @@ class FileFormat(metaclass=FileFormatMeta):
                 if _RE_DISCRETE_LIST.match(type_flag):
                     valuemap = Flags.split(type_flag)
                     coltype_kwargs.update(ordered=True)
+                elif coded is not None:
+                    valuemap = sorted(coded.uniques)
                 else:
                     valuemap = sorted(set(orig_values) - {np.nan})
 
@@ -544,14 +784,19 @@ class FileFormat(metaclass=FileFormatMeta):
                         coltype = ContinuousVariable
 
             if valuemap:
-                # Map discrete data to ints
-                def valuemap_index(val):
-                    try:
-                        return valuemap.index(val)
-                    except ValueError:
-                        return np.nan
-
-                values = np.vectorize(valuemap_index, otypes=[float])(orig_values)
+                # Map discrete data to ints through a dict; unknown values
+                # map to nan
+                valuemap_index = {}
+                for i, val in enumerate(valuemap):
+                    valuemap_index.setdefault(val, i)
+                if coded is not None:
+                    lookup = np.array(
+                        [valuemap_index.get(val, np.nan)
+                         for val in coded.uniques] + [np.nan], dtype=float)
+                    values = lookup[coded.codes]
+                else:
+                    values = np.array([valuemap_index.get(val, np.nan)
+                                       for val in orig_values], dtype=float)
                 coltype = DiscreteVariable
                 coltype_kwargs.update(values=valuemap)
 
@@ -586,7 +831,7 @@ class FileFormat(metaclass=FileFormatMeta):
                     new_order, old_order = var.values, coltype_kwargs.get('values', var.values)
                     if new_order != old_order:
                         offset = len(new_order)
-                        column = values if data.ndim > 1 else data
+                        column = values
                         column += offset
                         for i, val in enumerate(var.values):
                             try:
@@ -601,23 +846,26 @@ class FileFormat(metaclass=FileFormatMeta):
                 _var = var if isinstance(var, TimeVariable) else TimeVariable('_')
                 values = [_var.parse(i) for i in orig_values]
 
-            # Write back the changed data. This is needeed to pass the
-            # correct, converted values into Table.from_numpy below
-            try:
-                data[:, col] = values
-            except IndexError:
-                pass
+            # Keep the converted values, which are passed into
+            # Table.from_numpy below
+            converted[col] = values
 
         domain = Domain(attrs, clses, metas)
 
-        if not data.size:
+        if not n_rows or not rowlen:
             return Table.from_domain(domain, 0)
 
+        def _stack(cols, dtype):
+            arr = np.empty((n_rows, len(cols)), dtype=dtype)
+            for i, col in enumerate(cols):
+                arr[:, i] = converted.pop(col)
+            return arr
+
         table = Table.from_numpy(domain,
-                                 data[:, Xcols].astype(float, order='C'),
-                                 data[:, Ycols].astype(float, order='C'),
-                                 data[:, Mcols].astype(object, order='C'),
-                                 data[:, Wcols].astype(float, order='C'))
+                                 _stack(Xcols, float),
+                                 _stack(Ycols, float),
+                                 _stack(Mcols, object),
+                                 _stack(Wcols, float))
         return table
 
     @staticmethod
@@ -674,6 +922,109 @@ class FileFormat(metaclass=FileFormatMeta):
                    for var, val in zip(vars, flatten(row))])
 
 
+# The smallest part of a file that is tokenized by a thread of the native
+# engine of CSVReader
+_NATIVE_RANGE_SIZE = 1 << 20
+
+
+def _decodes(buf, encoding, chunk_size=1 << 20):
+    """Tell whether the bytes in array `buf` decode in `encoding`"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        for start in range(0, len(buf), chunk_size):
+            decoder.decode(buf[start:start + chunk_size].tobytes())
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _ascii_compatible(encoding):
+    """
+    Tell whether bytes of ASCII characters always represent these characters
+    in `encoding`, so that files can be split into fields as bytes.
+    """
+    name = codecs.lookup(encoding).name
+    if name in ('ascii', 'utf-8', 'utf-8-sig'):
+        return True
+    # Single-byte extensions of ASCII
+    ascii_bytes = bytes(range(128))
+    try:
+        return ascii_bytes.decode(name) == ascii_bytes.decode('ascii') and \
+            len(bytes(range(256)).decode(name, 'replace')) == 256
+    except UnicodeDecodeError:
+        return False
+
+
+def _tokenize_native(executor, n_threads, buf, start, delimiter, quotechar,
+                     doublequote):
+    """
+    Tokenize `buf[start:]` in ranges of lines that are processed by threads
+    of `executor`. Return an array with contents of fields, arrays with
+    starts and ends of fields in it, and offsets of the first fields of
+    rows, followed by the number of fields.
+    """
+    out = np.empty(len(buf), dtype=np.uint8)
+    n_ranges = max(1, min(n_threads, (len(buf) - start) // _NATIVE_RANGE_SIZE))
+    bounds = [start]
+    for i in range(1, n_ranges):
+        newline = _tokenizer.find_byte(
+            buf, ord('\n'),
+            max(bounds[-1], start + i * (len(buf) - start) // n_ranges))
+        if newline == -1 or newline + 1 == len(buf):
+            break
+        bounds.append(newline + 1)
+    bounds.append(len(buf))
+
+    def tokenize(range_start, range_end):
+        return _tokenizer.tokenize(buf, out, range_start, range_end,
+                                   delimiter, quotechar, doublequote, True)
+
+    results = list(executor.map(tokenize, bounds[:-1], bounds[1:]))
+    # A range that ends within a quoted field with a newline is tokenized
+    # again, together with the next range
+    parts = []
+    first, result = bounds[0], results[0]
+    for i in range(1, len(results)):
+        if result[3]:
+            parts.append(result)
+            first, result = bounds[i], results[i]
+        else:
+            result = tokenize(first, bounds[i + 1])
+    parts.append(result)
+
+    n_fields = np.cumsum([0] + [len(part[0]) for part in parts])
+    return (out,
+            np.hstack([part[0] for part in parts]),
+            np.hstack([part[1] for part in parts]),
+            np.hstack([[0]] + [part[2] + offset
+                               for part, offset in zip(parts, n_fields)]))
+
+
+def _decode_uniques(codes, uniques, encoding):
+    """
+    Decode distinct values from the native tokenizer and strip them; it
+    strips only ASCII whitespace. Values that become equal are merged and
+    those that become missing are coded as -1. Return codes and values.
+    """
+    values = [value.decode(encoding) for value in uniques]
+    stripped = [value.strip() for value in values]
+    if stripped == values:
+        return codes, values
+    index, merged = {}, []
+    lookup = np.empty(len(values) + 1, dtype=np.int32)
+    lookup[-1] = -1
+    for i, value in enumerate(stripped):
+        if value in MISSING_VALUES:
+            lookup[i] = -1
+            continue
+        if value not in index:
+            index[value] = len(merged)
+            merged.append(value)
+        lookup[i] = index[value]
+    return lookup[codes], merged
+
+
 class CSVReader(FileFormat):
     """Reader for comma separated files"""
 
@@ -682,15 +1033,52 @@ class CSVReader(FileFormat):
     DELIMITERS = ',;:\t$ '
     SUPPORT_COMPRESSED = True
     PRIORITY = 20
+    # Number of rows parsed at once (see `FileFormat.data_table_chunked`);
+    # if None, all rows are read before the table is constructed
+    CHUNK_SIZE = None
+    # Parsing engine: 'python' uses the csv module, and 'native' tokenizes
+    # and converts the file in compiled code in multiple threads, giving the
+    # same table; files that the native engine does not support (e.g. in
+    # encodings that are not ASCII-compatible) are read with 'python'
+    ENGINE = 'python'
+    # Number of threads of the native engine; None for the number of CPUs
+    N_THREADS = None
+
+    def _encodings(self):
+        """Yield encodings (with error handlers) to try, in order"""
+        yield 'us-ascii', None                                 # fast
+        yield detect_encoding(self.filename), None             # precise
+        yield locale.getpreferredencoding(False), None
+        yield sys.getdefaultencoding(), None                   # desperate
+        yield 'utf-8', None                                    # ...
+        yield 'utf-8', 'ignore'                                # fallback
+
+    def _sniff(self, sample):
+        """Return the CSV dialect (delimiter, quotes, ...) of `sample`"""
+        try:
+            dialect = csv.Sniffer().sniff(sample, self.DELIMITERS)
+        except csv.Error:
+            dialect = csv.excel()
+            dialect.delimiter = self.DELIMITERS[0]
+        return dialect
 
     def read(self):
-        for encoding in (lambda: ('us-ascii', None),                 # fast
-                         lambda: (detect_encoding(self.filename), None),  # precise
-                         lambda: (locale.getpreferredencoding(False), None),
-                         lambda: (sys.getdefaultencoding(), None),   # desperate
-                         lambda: ('utf-8', None),                    # ...
-                         lambda: ('utf-8', 'ignore')):               # fallback
-            encoding, errors = encoding()
+        data = None
+        if self.ENGINE == 'native':
+            try:
+                data = self._read_native()
+            except (ValueError, UnicodeDecodeError, csv.Error):
+                # The Python engine reproduces and reports the error
+                data = None
+        if data is not None:
+            self._set_name(data)
+            self.set_table_metadata(self.filename, data)
+            return data
+
+        # Dialects sniffed from the samples of the file, so the file is not
+        # sniffed again if it decodes to the same sample in other encodings
+        dialects = {}
+        for encoding, errors in self._encodings():
             # Clear the error flag for all except the last check, because
             # the error of second-to-last check is stored and shown as warning in owfile
             if errors != 'ignore':
@@ -699,28 +1087,33 @@ class CSVReader(FileFormat):
                            encoding=encoding, errors=errors) as file:
                 # Sniff the CSV dialect (delimiter, quotes, ...)
                 try:
-                    dialect = csv.Sniffer().sniff(file.read(1024), self.DELIMITERS)
+                    sample = file.read(1024)
                 except UnicodeDecodeError as e:
                     error = e
                     continue
-                except csv.Error:
-                    dialect = csv.excel()
-                    dialect.delimiter = self.DELIMITERS[0]
+                dialect = dialects.get(sample)
+                if dialect is None:
+                    dialect = dialects[sample] = self._sniff(sample)
 
                 file.seek(0)
                 dialect.skipinitialspace = True
 
                 try:
                     reader = csv.reader(file, dialect=dialect)
-                    data = self.data_table(reader)
-
-                    # TODO: Name can be set unconditionally when/if
-                    # self.filename will always be a string with the file name.
-                    # Currently, some tests pass StringIO instead of
-                    # the file name to a reader.
-                    if isinstance(self.filename, str):
-                        data.name = path.splitext(
-                            path.split(self.filename)[-1])[0]
+                    if self.CHUNK_SIZE:
+                        try:
+                            data = self.data_table_chunked(
+                                reader, chunk_size=self.CHUNK_SIZE)
+                        except InferredTypeError:
+                            # Column types inferred from the first chunks
+                            # were wrong; read the entire file at once
+                            file.seek(0)
+                            reader = csv.reader(file, dialect=dialect)
+                            data = self.data_table(reader)
+                    else:
+                        data = self.data_table(reader)
+
+                    self._set_name(data)
                     if error and isinstance(error, UnicodeDecodeError):
                         pos, endpos = error.args[2], error.args[3]
                         warning = ('Skipped invalid byte(s) in position '
@@ -734,6 +1127,150 @@ class CSVReader(FileFormat):
                     continue
         raise ValueError('Cannot parse dataset {}: {}'.format(self.filename, error)) from error
 
+    def _set_name(self, data):
+        # TODO: Name can be set unconditionally when/if
+        # self.filename will always be a string with the file name.
+        # Currently, some tests pass StringIO instead of
+        # the file name to a reader.
+        if isinstance(self.filename, str):
+            data.name = path.splitext(path.split(self.filename)[-1])[0]
+
+    def _load_bytes(self):
+        """Return the contents of the file as an array of bytes"""
+        if self.filename.endswith(Compression.all):
+            with self.open(self.filename, 'rb') as file:
+                return np.frombuffer(file.read(), dtype=np.uint8)
+        if not path.getsize(self.filename):
+            # Empty files cannot be mapped
+            return np.empty(0, dtype=np.uint8)
+        return np.memmap(self.filename, dtype=np.uint8, mode='r')
+
+    def _native_encoding(self, buf):
+        """
+        Return the encoding in which the Python engine would read the file
+        if the native engine supports it, else None.
+        """
+        for encoding, errors in self._encodings():
+            if errors is not None:
+                return None
+            # Files are opened in the locale's encoding if it is None
+            encoding = encoding or locale.getpreferredencoding(False)
+            if _decodes(buf, encoding):
+                return encoding if _ascii_compatible(encoding) else None
+
+    def _read_native(self):
+        """
+        Read the file with the native engine; return None if the engine
+        does not support the file.
+        """
+        if not isinstance(self.filename, str):
+            return None
+        buf = self._load_bytes()
+        if not len(buf) or _tokenizer.find_byte(buf, 0) != -1:
+            return None
+        encoding = self._native_encoding(buf)
+        if encoding is None:
+            return None
+        start = 0
+        if codecs.lookup(encoding).name == 'utf-8-sig':
+            # The BOM is skipped by the decoder of the Python engine
+            encoding = 'utf-8'
+            if buf[:3].tobytes() == codecs.BOM_UTF8:
+                start = 3
+
+        # The Python engine sniffs the first 1024 characters
+        decoder = codecs.getincrementaldecoder(encoding)()
+        dialect = self._sniff(
+            decoder.decode(buf[start:start + 4096].tobytes())[:1024])
+        quotechar = None if dialect.quoting == csv.QUOTE_NONE \
+            else dialect.quotechar
+        if dialect.escapechar or dialect.quoting == csv.QUOTE_NONNUMERIC or \
+                any(ord(char) > 127 for char in (dialect.delimiter,
+                                                 quotechar or '')):
+            return None
+
+        n_threads = self.N_THREADS or cpu_count() or 1
+        with ThreadPoolExecutor(n_threads) as executor:
+            fields = _tokenize_native(
+                executor, n_threads, buf, start, dialect.delimiter,
+                quotechar, dialect.doublequote)
+            return self._native_table(executor, fields, encoding)
+
+    @classmethod
+    def _native_table(cls, executor, fields, encoding):
+        """
+        Return the table from tokenized fields (see `_tokenize_native`),
+        constructed as `FileFormat.data_table` would construct it from
+        the rows of fields, or None if the rows are of unequal lengths
+        that the Python engine would not handle.
+        """
+        out, starts, ends, row_offsets = fields
+
+        def field(i):
+            return out[starts[i]:ends[i]].tobytes().decode(encoding)
+
+        first_rows = [[field(i) for i in range(row_offsets[row],
+                                               row_offsets[row + 1])]
+                      for row in range(min(4, len(row_offsets) - 1))]
+        headers, _ = cls.parse_headers(first_rows)
+        names, types, flags = cls.header_fields(headers)
+        rowlen = max(map(len, (names, types, flags)))
+
+        # Rows without any non-empty field are skipped
+        non_empty = np.hstack(([0], np.cumsum(ends - starts > 0)))
+        rows = np.flatnonzero(non_empty[row_offsets[1:]] >
+                              non_empty[row_offsets[:-1]])
+        rows = rows[rows >= len(headers)]
+        lengths = row_offsets[rows + 1] - row_offsets[rows]
+        if len(rows):
+            # Like data_table, pad rows to the length of headers
+            padded = np.maximum(lengths, rowlen)
+            if np.any(padded != padded[0]):
+                return None
+            rowlen = padded[0]
+        for lst in (names, types, flags):
+            lst.extend([''] * (rowlen - len(lst)))
+
+        def convert(col):
+            if Flags(Flags.split(flags[col])).i:
+                return None
+            type_flag = types[col].strip()
+            cells = np.where(col < lengths, row_offsets[rows] + col, -1)
+            numbers = np.empty(len(rows))
+            heuristic = not any(
+                type_flag in var.TYPE_HEADERS for var in (
+                    StringVariable, ContinuousVariable, TimeVariable,
+                    DiscreteVariable)) and \
+                not _RE_DISCRETE_LIST.match(type_flag)
+            if type_flag in ContinuousVariable.TYPE_HEADERS or heuristic:
+                if _tokenizer.parse_numbers(out, starts, ends, cells,
+                                            numbers):
+                    if not heuristic:
+                        return _ColumnBuffer.from_array(numbers)
+                    # Numeric columns with more than DISCRETE_MAX_VALUES
+                    # values (with missing) cannot be discrete
+                    codes = np.empty(len(rows), dtype=np.int32)
+                    uniques = _tokenizer.encode(out, starts, ends, cells,
+                                                codes, DISCRETE_MAX_VALUES)
+                    if uniques is None or len(uniques) + \
+                            np.any(codes == -1) > DISCRETE_MAX_VALUES:
+                        types[col] = ContinuousVariable.TYPE_HEADERS[0]
+                        return _ColumnBuffer.from_array(numbers)
+            codes = np.empty(len(rows), dtype=np.int32)
+            uniques = _tokenizer.encode(out, starts, ends, cells, codes)
+            return _ColumnBuffer.from_array(
+                *_decode_uniques(codes, uniques, encoding),
+                heuristic=heuristic)
+
+        columns = list(executor.map(convert, range(rowlen)))
+
+        def column_values(col):
+            column, columns[col] = columns[col], None
+            return column
+
+        return cls._table_from_columns(names, types, flags, rowlen,
+                                       len(headers), len(rows), column_values)
+
     @classmethod
     def write_file(cls, filename, data):
         with cls.open(filename, mode='wt', newline='', encoding='utf-8') as file:
@@ -766,6 +1303,125 @@ class PickleReader(FileFormat):
             pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
 
 
+class MemmapReader(FileFormat):
+    """Reader for memory-mapped binary tables
+
+    The file starts with a pickled header (domain, table attributes and
+    block layout), followed by X, Y, metas, W and ids stored as raw binary
+    blocks. Reading maps the blocks with `np.memmap` instead of parsing
+    them, so opening a file is cheap regardless of its size and the pages
+    are loaded only when the data is accessed. Processes that open the same
+    file share the page cache.
+
+    The arrays of the resulting table are read-only views into the file;
+    `Table.ensure_copy` replaces them with private copies. Metas that
+    include string variables are pickled and loaded eagerly.
+    """
+    EXTENSIONS = ('.mmap',)
+    DESCRIPTION = 'Memory-mapped Orange table'
+
+    MAGIC = b'ORANGEMM'
+    VERSION = 1
+    ALIGNMENT = 64
+    _PREFIX = struct.Struct('<8sIQ')  # magic, version, header length
+
+    def read(self):
+        with open(self.filename, 'rb') as f:
+            magic, version, header_len = self._PREFIX.unpack(
+                f.read(self._PREFIX.size))
+            if magic != self.MAGIC:
+                raise ValueError('{} is not a memory-mapped Orange table'
+                                 .format(self.filename))
+            if version > self.VERSION:
+                raise ValueError('Unsupported version of memory-mapped '
+                                 'table: {}'.format(version))
+            header = pickle.loads(f.read(header_len))
+            start = self._align(self._PREFIX.size + header_len)
+
+            def load(block):
+                kind = block['kind']
+                if kind == 'dense':
+                    dtype, shape = np.dtype(block['dtype']), block['shape']
+                    if not np.prod(shape):
+                        return np.empty(shape, dtype)
+                    return np.memmap(self.filename, dtype, 'r',
+                                     start + block['offset'],
+                                     shape).view(np.ndarray)
+                elif kind == 'pickle':
+                    f.seek(start + block['offset'])
+                    return pickle.loads(f.read(block['size']))
+                else:
+                    matrix = getattr(sp, kind + '_matrix')
+                    return matrix((load(block['data']),
+                                   load(block['indices']),
+                                   load(block['indptr'])),
+                                  shape=block['shape'], copy=False)
+
+            blocks = header['blocks']
+            table = Table()
+            table.domain = header['domain']
+            table.X = load(blocks['X'])
+            table.Y = load(blocks['Y'])
+            table.metas = load(blocks['metas'])
+            table.W = load(blocks['W'])
+            table.ids = load(blocks['ids'])
+            table.attributes = header['attributes']
+        table.name = path.splitext(path.split(self.filename)[-1])[0]
+        return table
+
+    @classmethod
+    def write_file(cls, filename, data):
+        chunks = []
+        offset = 0
+
+        def add(arr):
+            nonlocal offset
+            if sp.issparse(arr):
+                arr = arr if arr.format in ('csr', 'csc') else arr.tocsr()
+                return {'kind': arr.format, 'shape': arr.shape,
+                        'data': add(arr.data),
+                        'indices': add(arr.indices),
+                        'indptr': add(arr.indptr)}
+            if arr.dtype == object:
+                buffer = pickle.dumps(arr, pickle.HIGHEST_PROTOCOL)
+                block = {'kind': 'pickle', 'size': len(buffer)}
+            else:
+                buffer = np.ascontiguousarray(arr)
+                block = {'kind': 'dense', 'dtype': buffer.dtype.str,
+                         'shape': buffer.shape}
+            offset = cls._align(offset)
+            block['offset'] = offset
+            chunks.append((offset, buffer))
+            offset += len(buffer) if block['kind'] == 'pickle' else buffer.nbytes
+            return block
+
+        metas = data.metas
+        if not sp.issparse(metas) and metas.dtype == object and \
+                all(var.is_primitive() for var in data.domain.metas):
+            metas = metas.astype(float)
+        blocks = OrderedDict((('X', add(data.X)),
+                              ('Y', add(data._Y)),
+                              ('metas', add(metas)),
+                              ('W', add(data.W)),
+                              ('ids', add(data.ids))))
+        header = pickle.dumps({'domain': data.domain,
+                               'attributes': getattr(data, 'attributes', {}),
+                               'blocks': blocks},
+                              pickle.HIGHEST_PROTOCOL)
+        start = cls._align(cls._PREFIX.size + len(header))
+        with open(filename, 'wb') as f:
+            f.write(cls._PREFIX.pack(cls.MAGIC, cls.VERSION, len(header)))
+            f.write(header)
+            for block_offset, buffer in chunks:
+                f.seek(start + block_offset)
+                f.write(buffer if isinstance(buffer, bytes) else
+                        buffer.data if buffer.size else b'')
+
+    @classmethod
+    def _align(cls, offset):
+        return -(-offset // cls.ALIGNMENT) * cls.ALIGNMENT
+
+
 class BasketReader(FileFormat):
     """Reader for basket (sparse) files"""
     EXTENSIONS = ('.basket', '.bsk')
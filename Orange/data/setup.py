@@ -29,6 +29,10 @@ def configuration(parent_package='', top_path=None):
                          sources=['_variable.c'],
                          include_dirs=[numpy.get_include()],
                          libraries=libraries)
+    config.add_extension('_tokenizer',
+                         sources=['_tokenizer.c'],
+                         include_dirs=[numpy.get_include()],
+                         libraries=libraries)
     return config
 
 if __name__ == '__main__':
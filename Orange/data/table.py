@@ -2,11 +2,11 @@ import operator
 import os
 import zlib
 
-from collections import MutableSequence, Iterable, Sequence, Sized
+from collections import MutableSequence, Iterable, Sequence, Sized, \
+    OrderedDict
 from itertools import chain
 from numbers import Real, Integral
 from functools import reduce
-from warnings import warn
 from threading import Lock
 
 import numpy as np
@@ -19,10 +19,12 @@ from Orange.data import (
     ContinuousVariable, DiscreteVariable, MISSING_VALUES
 )
 from Orange.data.util import SharedComputeValue
+from Orange.misc.cache import LRUCache
 from Orange.statistics.util import bincount, countnans, contingency, stats as fast_stats
 from Orange.util import flatten
 
-__all__ = ["dataset_dirs", "get_sample_datasets_dir", "RowInstance", "Table"]
+__all__ = ["dataset_dirs", "get_sample_datasets_dir", "RowInstance", "Table",
+           "TableBuilder"]
 
 
 def get_sample_datasets_dir():
@@ -39,6 +41,11 @@ chaining of domain conversions also works with caching even with descendants
 of Table."""
 _conversion_cache = None
 
+"""Cache of domain conversions that persists across calls of
+Table.from_table. It is disabled (None) unless enabled by
+Table.enable_conversion_cache."""
+_persistent_conversion_cache = None
+
 
 class RowInstance(Instance):
     sparse_x = None
@@ -78,6 +85,7 @@ class RowInstance(Instance):
         if not self.table.has_weights():
             self.table.set_weights()
         self.table.W[self.row_index] = weight
+        self.table._invalidate_conversions()
 
     def set_class(self, value):
         self._check_single_class()
@@ -86,6 +94,7 @@ class RowInstance(Instance):
         self._y[0] = value
         if self.sparse_y:
             self.table._Y[self.row_index, 0] = value
+        self.table._invalidate_conversions()
 
     def __setitem__(self, key, value):
         if not isinstance(key, Integral):
@@ -109,6 +118,7 @@ class RowInstance(Instance):
             self._metas[-1 - key] = value
             if self.sparse_metas:
                 self.table.metas[self.row_index, -1 - key] = value
+        self.table._invalidate_conversions()
 
     def _str(self, limit):
         def sp_values(matrix, variables):
@@ -153,6 +163,8 @@ class Columns:
 class Table(MutableSequence, Storage):
     __file__ = None
     name = "untitled"
+    _cache_token = None
+    _csc_cache = None
 
     @property
     def columns(self):
@@ -289,52 +301,70 @@ class Table(MutableSequence, Storage):
                 return _subarray(source._Y, row_indices,
                                  [x - n_src_attrs for x in src_cols])
 
-            if is_sparse:
-                a = sp.dok_matrix((n_rows, len(src_cols)), dtype=dtype)
-            else:
-                a = np.empty((n_rows, len(src_cols)), dtype=dtype)
-
             def match_type(x):
                 """ Assure that matrix and column are both dense or sparse. """
                 if is_sparse == sp.issparse(x):
                     return x
                 elif is_sparse:
-                    return sp.csc_matrix(x.reshape(-1, 1).astype(np.float))
-                else:
+                    x = np.asarray(x, dtype=np.float)
+                    return sp.csc_matrix(x.reshape(x.shape[0], -1))
+                elif x.shape[1] == 1:
                     return np.ravel(x.toarray())
+                else:
+                    return x.toarray()
 
+            # Transformations that can be computed together are grouped by
+            # their type; other columns are computed one by one
             shared_cache = _conversion_cache
+            columns, groups = [], OrderedDict()
             for i, col in enumerate(src_cols):
                 if col is None:
-                    a[:, i] = Unknown
+                    column = np.full(n_rows, Unknown)
                 elif not isinstance(col, Integral):
                     if isinstance(col, SharedComputeValue):
                         if (id(col.compute_shared), id(source)) not in shared_cache:
                             shared_cache[id(col.compute_shared), id(source)] = col.compute_shared(source)
                         shared = shared_cache[id(col.compute_shared), id(source)]
-                        if row_indices is not ...:
-                            a[:, i] = match_type(
-                                col(source, shared_data=shared)[row_indices])
-                        else:
-                            a[:, i] = match_type(
-                                col(source, shared_data=shared))
+                        column = col(source, shared_data=shared)
+                    elif _supports_group_transform(col):
+                        groups.setdefault(type(col), []).append((i, col))
+                        continue
                     else:
-                        if row_indices is not ...:
-                            a[:, i] = match_type(col(source)[row_indices])
-                        else:
-                            a[:, i] = match_type(col(source))
+                        column = col(source)
+                    if row_indices is not ...:
+                        column = column[row_indices]
                 elif col < 0:
-                    a[:, i] = match_type(source.metas[row_indices, -1 - col])
+                    column = source.metas[row_indices, -1 - col]
                 elif col < n_src_attrs:
-                    a[:, i] = match_type(source.X[row_indices, col])
+                    column = source.X[row_indices, col]
                 else:
-                    a[:, i] = match_type(
-                        source._Y[row_indices, col - n_src_attrs])
-
-            if is_sparse:
-                a = a.tocsr()
+                    column = source._Y[row_indices, col - n_src_attrs]
+                columns.append(([i], column))
+            for transformation_type, group in groups.items():
+                indices, transformations = zip(*group)
+                block = transformation_type.compute_group(transformations,
+                                                          source)
+                if row_indices is not ...:
+                    block = block[row_indices]
+                columns.append((list(indices), block))
+
+            if not is_sparse:
+                a = np.empty((n_rows, len(src_cols)), dtype=dtype)
+                for indices, column in columns:
+                    column = match_type(column)
+                    if column.ndim == 1:
+                        a[:, indices[0]] = column
+                    else:
+                        a[:, indices] = column
+                return a
 
-            return a
+            # Stack sparse columns and then put them in the right order
+            if not n_rows:
+                return sp.csr_matrix((0, len(src_cols)), dtype=dtype)
+            order = np.argsort(np.hstack([ind for ind, _ in columns]))
+            a = sp.hstack([match_type(column) for _, column in columns],
+                          format="csc")
+            return a[:, order].tocsr().astype(dtype)
 
         new_cache = _conversion_cache is None
         try:
@@ -347,6 +377,14 @@ class Table(MutableSequence, Storage):
             if domain == source.domain:
                 return cls.from_table_rows(source, row_indices)
 
+            persistent_key = None
+            if _persistent_conversion_cache is not None and \
+                    row_indices is ... and isinstance(source, Table):
+                persistent_key = (source._conversion_token(), id(domain), cls)
+                cached = _persistent_conversion_cache.get(persistent_key)
+                if cached is not None:
+                    return cached._read_only_view()
+
             if isinstance(row_indices, slice):
                 start, stop, stride = row_indices.indices(source.X.shape[0])
                 n_rows = (stop - start) // stride
@@ -386,11 +424,110 @@ class Table(MutableSequence, Storage):
                 cls._init_ids(self)
             self.attributes = getattr(source, 'attributes', {})
             _conversion_cache[(id(domain), id(source))] = self
+            if persistent_key is not None:
+                # The cached table also keeps the domain alive, so its id
+                # cannot be reused while the conversion is cached
+                _persistent_conversion_cache[persistent_key] = self
+                return self._read_only_view()
             return self
         finally:
             if new_cache:
                 _conversion_cache = None
 
+    @classmethod
+    def enable_conversion_cache(cls, max_size=256 * 2 ** 20):
+        """
+        Enable caching of domain conversions across calls of `from_table`.
+
+        Conversions of entire tables are kept in a cache with at most
+        `max_size` bytes of data, keyed by the source table and the target
+        domain; the least recently used conversions are evicted first.
+        Converting the same table into the same domain again (for instance,
+        when a model is repeatedly applied to the same data) then does not
+        recompute the derived columns.
+
+        Tables returned from the cache share their (read-only) arrays with
+        the cached table, so `ensure_copy` must be called before modifying
+        them. Modifying the source table through its methods invalidates
+        its cached conversions; changes made directly to its arrays (e.g.
+        `data.X[0, 0] = 42`) are not detected.
+
+        :param max_size: maximal size of cached data in bytes
+        :type max_size: int
+        """
+        global _persistent_conversion_cache
+        _persistent_conversion_cache = LRUCache(max_size, _table_nbytes)
+
+    @classmethod
+    def disable_conversion_cache(cls):
+        """Disable and clear the cache of domain conversions."""
+        global _persistent_conversion_cache
+        _persistent_conversion_cache = None
+
+    def _conversion_token(self):
+        # Token identifies the current content of the table in the cache
+        # of conversions; unlike id, it is not reused and does not survive
+        # pickling
+        if self._cache_token is None:
+            self._cache_token = object()
+        return self._cache_token
+
+    def _invalidate_conversions(self):
+        self._csc_cache = None
+        token, self._cache_token = self._cache_token, None
+        if token is not None and _persistent_conversion_cache is not None:
+            _persistent_conversion_cache.discard_if(
+                lambda key: key[0] is token)
+
+    def _get_csc(self, name):
+        """
+        Return the table's sparse matrix `name` ('X', '_Y' or 'metas') in
+        CSC format for column-wise access; dense arrays and CSC matrices are
+        returned as they are.
+
+        The converted matrix is kept until the table is modified or the
+        matrix is replaced, so column statistics, distributions and
+        contingencies convert it only once.
+        """
+        matrix = getattr(self, name)
+        if not sp.issparse(matrix) or sp.isspmatrix_csc(matrix):
+            return matrix
+        if self._csc_cache is None:
+            self._csc_cache = {}
+        cached = self._csc_cache.get(name)
+        if cached is None or cached[0] is not matrix:
+            cached = self._csc_cache[name] = (matrix, matrix.tocsc())
+        return cached[1]
+
+    def __getstate__(self):
+        # Do not pickle cached conversions
+        state = self.__dict__.copy()
+        state.pop("_csc_cache", None)
+        return state
+
+    def _read_only_view(self):
+        """
+        Return a table of the same type whose arrays are read-only views of
+        this table's arrays. Sparse matrices are shared.
+        """
+        def view(x):
+            if sp.issparse(x):
+                return x
+            x = x.view()
+            x.flags.writeable = False
+            return x
+
+        table = type(self)()
+        table.domain = self.domain
+        table.X = view(self.X)
+        table._Y = view(self._Y)
+        table.metas = view(self.metas)
+        table.W = view(self.W)
+        table.ids = view(self.ids)
+        table.name = self.name
+        table.attributes = self.attributes
+        return table
+
     @classmethod
     def from_table_rows(cls, source, row_indices):
         """
@@ -700,6 +837,7 @@ class Table(MutableSequence, Storage):
         if not self._check_all_dense():
             raise ValueError(
                 "Assignment to rows of sparse data is not supported")
+        self._invalidate_conversions()
         if not isinstance(key, tuple):
             if isinstance(value, Real):
                 self.X[key, :] = value
@@ -787,6 +925,7 @@ class Table(MutableSequence, Storage):
     def __delitem__(self, key):
         if not self._check_all_dense():
             raise ValueError("Rows of sparse data cannot be deleted")
+        self._invalidate_conversions()
         if key is ...:
             key = range(len(self))
         self.X = np.delete(self.X, key, axis=0)
@@ -867,6 +1006,7 @@ class Table(MutableSequence, Storage):
         :param instances: additional instances
         :type instances: Orange.data.Table or a sequence of instances
         """
+        self._invalidate_conversions()
         old_length = len(self)
         self._resize_all(old_length + len(instances))
         try:
@@ -949,10 +1089,21 @@ class Table(MutableSequence, Storage):
         """
         Ensure that the table owns its data; copy arrays when necessary.
         """
+        self._invalidate_conversions()
+
         def is_view(x):
             # Sparse matrices don't have views like numpy arrays. Since indexing on
-            # them creates copies in constructor we can skip this check here.
-            return not sp.issparse(x) and x.base is not None
+            # them creates copies in constructor we only need to copy them when
+            # their components are mapped from a file or read-only.
+            if sp.issparse(x):
+                return any(isinstance(part, np.memmap) or
+                           isinstance(part.base, np.memmap) or
+                           not part.flags.writeable
+                           for part in (getattr(x, name, None)
+                                        for name in ("data", "indices",
+                                                     "indptr", "row", "col"))
+                           if part is not None)
+            return x.base is not None
 
         if is_view(self.X):
             self.X = self.X.copy()
@@ -962,6 +1113,8 @@ class Table(MutableSequence, Storage):
             self.metas = self.metas.copy()
         if is_view(self.W):
             self.W = self.W.copy()
+        if is_view(self.ids):
+            self.ids = self.ids.copy()
 
     def copy(self):
         """
@@ -999,6 +1152,7 @@ class Table(MutableSequence, Storage):
         """
         Set weights of data instances; create a vector of weights if necessary.
         """
+        self._invalidate_conversions()
         if not self.W.shape[-1]:
             self.W = np.empty(len(self))
         self.W[:] = weight
@@ -1041,6 +1195,7 @@ class Table(MutableSequence, Storage):
         """Randomly shuffle the rows of the table."""
         if not self._check_all_dense():
             raise ValueError("Rows of sparse data cannot be shuffled")
+        self._invalidate_conversions()
         ind = np.arange(self.X.shape[0])
         np.random.shuffle(ind)
         self.X = self.X[ind]
@@ -1048,6 +1203,27 @@ class Table(MutableSequence, Storage):
         self.metas = self.metas[ind]
         self.W = self.W[ind]
 
+    def iter_blocks(self, block_size=1024):
+        """
+        Iterate over consecutive blocks of rows without constructing data
+        instances.
+
+        Each block is a tuple `(start, stop, X, Y, metas, W)` with the rows
+        from `start` to `stop`. For dense data, the arrays are views into
+        the table's arrays, not copies. `Y` has a column for each class
+        variable and `W` has no columns if the table has no weights.
+
+        :param block_size: the (maximal) number of rows in a block
+        :type block_size: int
+        :return: generator of tuples `(start, stop, X, Y, metas, W)`
+        """
+        if block_size < 1:
+            raise ValueError("Block size must be positive")
+        for start in range(0, len(self), block_size):
+            stop = min(start + block_size, len(self))
+            yield (start, stop, self.X[start:stop], self._Y[start:stop],
+                   self.metas[start:stop], self.W[start:stop])
+
     def get_column_view(self, index):
         """
         Return a vector - as a view, not a copy - with a column of the table,
@@ -1171,25 +1347,26 @@ class Table(MutableSequence, Storage):
                         sel += (col == val)
             elif isinstance(f, data_filter.FilterStringList):
                 if not f.case_sensitive:
-                    # noinspection PyTypeChecker
-                    col = np.char.lower(np.array(col, dtype=str))
-                    vals = [val.lower() for val in f.values]
+                    col = _lower(col)
+                    vals = set(val.lower() for val in f.values)
                 else:
-                    vals = f.values
+                    vals = set(f.values)
+                col = _vectorized_test(vals.__contains__, col)
                 if conjunction:
-                    sel *= reduce(operator.add,
-                                  (col == val for val in vals))
+                    sel *= col
                 else:
-                    sel = reduce(operator.add,
-                                 (col == val for val in vals), sel)
+                    sel += col
             elif isinstance(f, data_filter.FilterRegex):
-                sel = np.vectorize(f)(col)
+                col = _vectorized_test(f, col)
+                if conjunction:
+                    sel *= col
+                else:
+                    sel += col
             elif isinstance(f, (data_filter.FilterContinuous,
                                 data_filter.FilterString)):
                 if (isinstance(f, data_filter.FilterString) and
                         not f.case_sensitive):
-                    # noinspection PyTypeChecker
-                    col = np.char.lower(np.array(col, dtype=str))
+                    col = _lower(col)
                     fmin = f.min.lower()
                     if f.oper in [f.Between, f.Outside]:
                         fmax = f.max.lower()
@@ -1214,14 +1391,11 @@ class Table(MutableSequence, Storage):
                 elif not isinstance(f, data_filter.FilterString):
                     raise TypeError("Invalid operator")
                 elif f.oper == f.Contains:
-                    col = np.fromiter((fmin in e for e in col),
-                                      dtype=bool)
+                    col = _vectorized_test(str.__contains__, col, fmin)
                 elif f.oper == f.StartsWith:
-                    col = np.fromiter((e.startswith(fmin) for e in col),
-                                      dtype=bool)
+                    col = _vectorized_test(str.startswith, col, fmin)
                 elif f.oper == f.EndsWith:
-                    col = np.fromiter((e.endswith(fmin) for e in col),
-                                      dtype=bool)
+                    col = _vectorized_test(str.endswith, col, fmin)
                 else:
                     raise TypeError("Invalid operator")
                 if conjunction:
@@ -1249,19 +1423,22 @@ class Table(MutableSequence, Storage):
         stats = []
         if not columns:
             if self.domain.attributes:
-                rr.append(fast_stats(self.X, W))
+                rr.append(fast_stats(self._get_csc("X"), W))
             if self.domain.class_vars:
-                rr.append(fast_stats(self._Y, W))
+                rr.append(fast_stats(self._get_csc("_Y"), W))
             if include_metas and self.domain.metas:
-                rr.append(fast_stats(self.metas, W))
+                rr.append(fast_stats(self._get_csc("metas"), W))
             if len(rr):
                 stats = np.vstack(tuple(rr))
         else:
             columns = [self.domain.index(c) for c in columns]
             nattrs = len(self.domain.attributes)
-            Xs = any(0 <= c < nattrs for c in columns) and fast_stats(self.X, W)
-            Ys = any(c >= nattrs for c in columns) and fast_stats(self._Y, W)
-            ms = any(c < 0 for c in columns) and fast_stats(self.metas, W)
+            Xs = any(0 <= c < nattrs for c in columns) and \
+                fast_stats(self._get_csc("X"), W)
+            Ys = any(c >= nattrs for c in columns) and \
+                fast_stats(self._get_csc("_Y"), W)
+            ms = any(c < 0 for c in columns) and \
+                fast_stats(self._get_csc("metas"), W)
             for column in columns:
                 if 0 <= column < nattrs:
                     stats.append(Xs[column, :])
@@ -1272,34 +1449,24 @@ class Table(MutableSequence, Storage):
         return stats
 
     def _compute_distributions(self, columns=None):
-        def _get_matrix(M, cachedM, col):
-            nonlocal single_column
+        def _get_matrix(name, col):
+            # Sparse matrices are sliced in (cached) CSC format
             W = self.W if self.has_weights() else None
-            if not sp.issparse(M):
-                return M[:, col], W, None
-            if cachedM is None:
-                if single_column:
-                    warn("computing distributions on sparse data "
-                         "for a single column is inefficient")
-                cachedM = sp.csc_matrix(self.X)
-            return cachedM[:, col], W, cachedM
+            return self._get_csc(name)[:, col], W
 
         if columns is None:
             columns = range(len(self.domain.variables))
-            single_column = False
         else:
             columns = [self.domain.index(var) for var in columns]
-            single_column = len(columns) == 1 and len(self.domain) > 1
         distributions = []
-        Xcsc = Ycsc = None
         for col in columns:
             var = self.domain[col]
             if 0 <= col < self.X.shape[1]:
-                m, W, Xcsc = _get_matrix(self.X, Xcsc, col)
+                m, W = _get_matrix("X", col)
             elif col < 0:
-                m, W, Xcsc = _get_matrix(self.metas, Xcsc, col * (-1) - 1)
+                m, W = _get_matrix("metas", col * (-1) - 1)
             else:
-                m, W, Ycsc = _get_matrix(self._Y, Ycsc, col - self.X.shape[1])
+                m, W = _get_matrix("_Y", col - self.X.shape[1])
             if var.is_discrete:
                 if W is not None:
                     W = W.ravel()
@@ -1377,16 +1544,20 @@ class Table(MutableSequence, Storage):
                 unknown_rows = np.sum(W[nan_inds])
 
         contingencies = [None] * len(col_desc)
-        for arr, f_cond, f_ind in (
-                (self.X, lambda i: 0 <= i < n_atts, lambda i: i),
-                (self._Y, lambda i: i >= n_atts, lambda i: i - n_atts),
-                (self.metas, lambda i: i < 0, lambda i: -1 - i)):
+        for name, f_cond, f_ind in (
+                ("X", lambda i: 0 <= i < n_atts, lambda i: i),
+                ("_Y", lambda i: i >= n_atts, lambda i: i - n_atts),
+                ("metas", lambda i: i < 0, lambda i: -1 - i)):
 
+            arr_indi = [e for e, ind in enumerate(col_indi) if f_cond(ind)]
+            if not arr_indi:
+                continue
+
+            # Sparse matrices are sliced in (cached) CSC format
+            arr = self._get_csc(name)
             if nan_inds is not None:
                 arr = arr[~nan_inds]
 
-            arr_indi = [e for e, ind in enumerate(col_indi) if f_cond(ind)]
-
             vars = [(e, f_ind(col_indi[e]), col_desc[e]) for e in arr_indi]
             disc_vars = [v for v in vars if v[2].is_discrete]
             if disc_vars:
@@ -1529,6 +1700,148 @@ class Table(MutableSequence, Storage):
         return self
 
 
+class TableBuilder:
+    """
+    Build a :obj:`Table` by adding data instances one by one or in blocks.
+
+    Unlike :obj:`Table.append` and :obj:`Table.extend`, which resize the
+    table's arrays on each call, the builder over-allocates the arrays and
+    grows them geometrically, so adding a row takes amortized constant time.
+    :obj:`get_table` shrinks the arrays in place and returns a table that
+    owns them, without copying the data.
+
+    :param domain: domain of the table
+    :type domain: Orange.data.Domain
+    :param capacity: the number of rows to allocate initially
+    :type capacity: int
+    :param weights: indicates whether the table has instance weights
+    :type weights: bool
+    """
+    def __init__(self, domain, capacity=16, weights=False):
+        self.domain = domain
+        self.weights = weights
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        capacity = max(capacity, 1)
+        domain = self.domain
+        self.n_rows = 0
+        self._X = np.empty((capacity, len(domain.attributes)))
+        self._Y = np.empty((capacity, len(domain.class_vars)))
+        self._metas = np.empty((capacity, len(domain.metas)), object)
+        self._W = np.empty(capacity if self.weights else (capacity, 0))
+        self._ids = np.empty(capacity, dtype=int)
+
+    def _arrays(self):
+        return self._X, self._Y, self._metas, self._W, self._ids
+
+    def _reserve(self, n_new):
+        capacity = len(self._ids)
+        if self.n_rows + n_new <= capacity:
+            return
+        capacity = max(self.n_rows + n_new, 2 * capacity)
+        for arr in self._arrays():
+            arr.resize((capacity, ) + arr.shape[1:], refcheck=False)
+
+    @staticmethod
+    def _new_ids(n):
+        with Table._next_instance_lock:
+            start = Table._next_instance_id
+            Table._next_instance_id += n
+        return np.arange(start, start + n)
+
+    def __len__(self):
+        return self.n_rows
+
+    def append(self, instance):
+        """
+        Add a data instance.
+
+        :param instance: a data instance
+        :type instance: Orange.data.Instance or a sequence of values of
+            attributes, class variables and, optionally, meta attributes
+        """
+        self._reserve(1)
+        row = self.n_rows
+        x, y, metas = self.domain.convert(instance)
+        self._X[row] = x
+        self._Y[row] = y
+        self._metas[row] = metas
+        if isinstance(instance, Instance):
+            weight, self._ids[row] = instance.weight, instance.id
+        else:
+            weight, self._ids[row] = 1, Table.new_id()
+        if self.weights:
+            self._W[row] = weight
+        self.n_rows += 1
+
+    def extend(self, instances):
+        """
+        Add data instances given as a table, a two-dimensional numpy array
+        or a sequence of instances.
+
+        Tables from other domains are converted to the builder's domain.
+        Numeric arrays contain values of attributes, class variables and,
+        optionally, meta attributes in the same representation as in
+        :obj:`Table.from_numpy`. Instances in sequences can be given as
+        :obj:`~Orange.data.Instance` or sequences of values.
+
+        :param instances: additional instances
+        :type instances: Orange.data.Table, numpy.ndarray or a sequence
+        """
+        domain = self.domain
+        if isinstance(instances, Table):
+            if instances.domain != domain:
+                instances = Table.from_table(domain, instances)
+            if not instances._check_all_dense():
+                raise ValueError("Tables with sparse data cannot be added")
+            weights = instances.W if instances.has_weights() else 1
+            self._add_block(instances.X, instances._Y, instances.metas,
+                            weights, instances.ids)
+        elif isinstance(instances, np.ndarray) and instances.ndim == 2 and \
+                instances.dtype != object:
+            n_attrs = len(domain.attributes)
+            n_vars = len(domain.variables)
+            if instances.shape[1] not in (n_vars, n_vars + len(domain.metas)):
+                raise ValueError("invalid data length for domain")
+            metas = instances[:, n_vars:] if instances.shape[1] > n_vars \
+                else [var.Unknown for var in domain.metas]
+            self._add_block(instances[:, :n_attrs],
+                            instances[:, n_attrs:n_vars], metas, 1,
+                            self._new_ids(len(instances)))
+        else:
+            for instance in instances:
+                self.append(instance)
+
+    def _add_block(self, X, Y, metas, W, ids):
+        n = len(ids)
+        self._reserve(n)
+        rows = slice(self.n_rows, self.n_rows + n)
+        self._X[rows] = X
+        self._Y[rows] = Y
+        self._metas[rows] = metas
+        if self.weights:
+            self._W[rows] = W
+        self._ids[rows] = ids
+        self.n_rows += n
+
+    def get_table(self):
+        """
+        Return a table with the added instances and reset the builder.
+
+        :return: a new table
+        :rtype: Orange.data.Table
+        """
+        for arr in self._arrays():
+            arr.resize((self.n_rows, ) + arr.shape[1:], refcheck=False)
+        table = Table()
+        table.domain = self.domain
+        table.X, table._Y, table.metas, table.W, table.ids = self._arrays()
+        table.attributes = {}
+        self._allocate(16)
+        return table
+
+
 def _check_arrays(*arrays, dtype=None):
     checked = []
     if not len(arrays):
@@ -1573,6 +1886,46 @@ def _check_inf(array):
            np.isinf(array.data).any()
 
 
+def _vectorized_test(func, col, *args):
+    """
+    Return a boolean array with results of `func` applied to elements of
+    (object) array `col`. Unlike `np.vectorize`, the function is applied
+    by a ufunc loop, without converting the array or the results.
+    """
+    return np.frompyfunc(func, 1 + len(args), 1)(col, *args).astype(bool)
+
+
+def _lower(col):
+    """Return an object array with lower-case string representations of
+    elements of `col`."""
+    return np.frompyfunc(lambda x: str(x).lower(), 1, 1)(col)
+
+
+def _table_nbytes(table):
+    """Return the size of table's data in bytes."""
+    def nbytes(x):
+        if sp.issparse(x):
+            return sum(getattr(x, name).nbytes
+                       for name in ("data", "indices", "indptr", "row", "col")
+                       if hasattr(x, name))
+        return x.nbytes
+
+    return sum(nbytes(x)
+               for x in (table.X, table._Y, table.metas, table.W, table.ids))
+
+
+def _supports_group_transform(compute_value):
+    """
+    Tell whether `compute_value` is a transformation (see
+    `Orange.preprocess.transformation.Transformation`) of a primitive
+    variable whose class can compute multiple columns at once.
+    """
+    supports = getattr(compute_value, "supports_group_transform", None)
+    variable = getattr(compute_value, "variable", None)
+    return supports is not None and supports() and \
+        isinstance(variable, Variable) and variable.is_primitive()
+
+
 def _subarray(arr, rows, cols):
     return arr[_rxc_ix(rows, cols)]
 
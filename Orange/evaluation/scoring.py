@@ -18,7 +18,8 @@ import sklearn.metrics as skl_metrics
 from Orange.misc.wrapper_meta import WrapperMeta
 
 __all__ = ["CA", "Precision", "Recall", "F1", "PrecisionRecallFSupport", "AUC",
-           "MSE", "RMSE", "MAE", "R2", "compute_CD", "graph_ranks", "LogLoss"]
+           "MSE", "RMSE", "MAE", "R2", "compute_CD", "graph_ranks", "LogLoss",
+           "bootstrap_ci"]
 
 
 class Score(metaclass=WrapperMeta):
@@ -55,18 +56,36 @@ class Score(metaclass=WrapperMeta):
     def scores_by_folds(self, results, **kwargs):
         nfolds = len(results.folds)
         nmodels = len(results.predicted)
+        values = self.instance_scores(results, **kwargs)
+        if values is not None:
+            membership = np.zeros((nfolds, len(results.actual)))
+            for fold, rows in enumerate(results.folds):
+                membership[fold, rows] = 1
+            return _average_over(membership, values)
         if self.is_scalar:
             scores = np.empty((nfolds, nmodels), dtype=np.float64)
         else:
             scores = [None] * nfolds
         for fold in range(nfolds):
             fold_results = results.get_fold(fold)
-            scores[fold] = self.compute_score(fold_results, **kwargs)
+            scores[fold] = self.compute_score(
+                fold_results, **_restrict_kwargs(kwargs, results.folds[fold]))
         return scores
 
     def compute_score(self, results):
         return NotImplementedError
 
+    def instance_scores(self, results, **kwargs):
+        """
+        Return an array of values for each method (rows) and test instance
+        (columns) whose means are the scores, or `None` if the score is not
+        an average over instances.
+
+        Scores by folds and bootstrap estimates of such scores are computed
+        without constructing results for each fold or sample.
+        """
+        return None
+
     @staticmethod
     def from_predicted(results, score_function, **kwargs):
         return np.fromiter(
@@ -77,27 +96,90 @@ class Score(metaclass=WrapperMeta):
 
 ## Classification scores
 
+def _restrict_kwargs(kwargs, rows):
+    """
+    Return `kwargs` with per-instance `sample_weight` (if given) restricted
+    to the given rows, e.g. to a fold or a bootstrap sample.
+    """
+    if kwargs.get("sample_weight") is None:
+        return kwargs
+    return dict(kwargs, sample_weight=np.asarray(kwargs["sample_weight"])[rows])
+
+
+def _average_over(weights, values):
+    """
+    Return weighted averages of rows of `values` (methods x instances) for
+    each row of `weights` (e.g. folds or bootstrap samples x instances).
+    """
+    return np.dot(weights, np.asarray(values, dtype=np.float64).T) / \
+        np.sum(weights, axis=1)[:, None]
+
+
+def _confusion_matrices(results):
+    """
+    Return confusion matrices (methods x actual x predicted) of all methods,
+    computed with a single `np.bincount`.
+    """
+    actual = np.asarray(results.actual, dtype=int)
+    predicted = np.asarray(results.predicted, dtype=int)
+    nmethods = len(predicted)
+    nclasses = 1 + max([0] + [values.max() for values in (actual, predicted)
+                              if values.size])
+    if results.domain is not None and results.domain.has_discrete_class:
+        nclasses = max(nclasses, len(results.domain.class_var.values))
+    cells = (np.arange(nmethods)[:, None] * nclasses + actual) * nclasses \
+        + predicted
+    return np.bincount(cells.ravel(), minlength=nmethods * nclasses ** 2) \
+        .reshape(nmethods, nclasses, nclasses)
+
+
+def _precision_recall_f(confusion):
+    """
+    Return precision, recall and F1 (methods x classes) and support of
+    classes from confusion matrices, as computed by scikit-learn
+    (scores with zero denominators are 0).
+    """
+    true_pos = np.diagonal(confusion, axis1=1, axis2=2).astype(np.float64)
+    pred_sum = np.sum(confusion, axis=1)
+    true_sum = np.sum(confusion, axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(pred_sum > 0, true_pos / pred_sum, 0)
+        recall = np.where(true_sum > 0, true_pos / true_sum, 0)
+        f_score = np.where(true_pos > 0,
+                           2 * precision * recall / (precision + recall), 0)
+    return precision, recall, f_score, true_sum
+
+
+def _weighted_by_support(scores, support):
+    return np.sum(scores * support, axis=1) / np.sum(support, axis=1)
+
+
 class CA(Score):
     __wraps__ = skl_metrics.accuracy_score
 
     def compute_score(self, results):
-        return self.from_predicted(results, skl_metrics.accuracy_score)
+        return np.mean(self.instance_scores(results), axis=1)
+
+    def instance_scores(self, results):
+        return results.predicted == results.actual
 
 
 class Precision(Score):
     __wraps__ = skl_metrics.precision_score
 
     def compute_score(self, results):
-        return self.from_predicted(results, skl_metrics.precision_score,
-                                   average="weighted")
+        precision, _, _, support = \
+            _precision_recall_f(_confusion_matrices(results))
+        return _weighted_by_support(precision, support)
 
 
 class Recall(Score):
     __wraps__ = skl_metrics.recall_score
 
     def compute_score(self, results):
-        return self.from_predicted(results, skl_metrics.recall_score,
-                                   average="weighted")
+        _, recall, _, support = \
+            _precision_recall_f(_confusion_matrices(results))
+        return _weighted_by_support(recall, support)
 
 
 class F1(Score):
@@ -120,16 +202,14 @@ class F1(Score):
     __wraps__ = skl_metrics.f1_score
 
     def compute_score(self, results, target=None):
+        _, _, f_score, support = \
+            _precision_recall_f(_confusion_matrices(results))
         if target is None:
             if len(results.domain.class_var.values) <= 2:
-                return self.from_predicted(results, skl_metrics.f1_score, average='binary')
+                target = 1
             else:
-                return self.from_predicted(results, skl_metrics.f1_score, average='weighted')
-        else:
-            return np.fromiter(
-                (skl_metrics.f1_score(results.actual, predicted, average=None)[target]
-                 for predicted in results.predicted),
-                dtype=np.float64, count=len(results.predicted))
+                return _weighted_by_support(f_score, support)
+        return f_score[:, target]
 
 
 class PrecisionRecallFSupport(Score):
@@ -141,6 +221,47 @@ class PrecisionRecallFSupport(Score):
             results, skl_metrics.precision_recall_fscore_support)
 
 
+def _average_ranks(values):
+    """
+    Return ranks (starting with 1) of values in each row of a 2d array;
+    tied values get the average of their ranks.
+    """
+    nrows, ncols = values.shape
+    rows = np.arange(nrows)[:, None]
+    order = np.argsort(values, axis=1, kind="mergesort")
+    sorted_values = values[rows, order]
+    columns = np.arange(ncols)
+    starts = np.ones(values.shape, dtype=bool)
+    starts[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    ends = np.ones(values.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, columns, 0), axis=1)
+    last = np.minimum.accumulate(
+        np.where(ends, columns, ncols)[:, ::-1], axis=1)[:, ::-1]
+    ranks = np.empty(values.shape)
+    ranks[rows, order] = (first + last) / 2 + 1
+    return ranks
+
+
+def _auc(actual, scores):
+    """
+    Return areas under ROC curves for rows of `scores` given binary
+    `actual` values (a single row or one row for each row of scores).
+
+    The area is computed from ranks of scores (as the Mann-Whitney U
+    statistic), so all curves require a single sort.
+    """
+    actual = np.broadcast_to(actual, scores.shape).astype(bool)
+    positive = np.sum(actual, axis=1)
+    negative = actual.shape[1] - positive
+    if np.any(positive == 0) or np.any(negative == 0):
+        raise ValueError("Only one class present in actual values; "
+                         "ROC AUC score is not defined in that case.")
+    ranks = _average_ranks(np.asarray(scores, dtype=np.float64))
+    return (np.sum(ranks * actual, axis=1) - positive * (positive + 1) / 2) \
+        / (positive * negative)
+
+
 class AUC(Score):
     """
     ${sklpar}
@@ -156,11 +277,9 @@ class AUC(Score):
     separate_folds = True
 
     def calculate_weights(self, results):
-        classes = np.unique(results.actual)
-        class_cases = [sum(results.actual == class_)
-                       for class_ in classes]
+        _, class_cases = np.unique(results.actual, return_counts=True)
         N = results.actual.shape[0]
-        weights = np.array([c * (N - c) for c in class_cases])
+        weights = class_cases * (N - class_cases)
         wsum = np.sum(weights)
         if wsum == 0:
             raise ValueError("Class variable has less than two values")
@@ -170,16 +289,15 @@ class AUC(Score):
     def multi_class_auc(self, results):
         classes = np.unique(results.actual)
         weights = self.calculate_weights(results)
+        nmethods, nrows = results.predicted.shape
 
-        auc_array = np.array([np.fromiter(
-            (skl_metrics.roc_auc_score(
-                results.actual == class_,
-                (predicted == class_).astype(float))
-             for predicted in results.predicted),
-            dtype=np.float64, count=len(results.predicted))
-                              for class_ in classes])
+        # Curves for all classes and methods are computed at once
+        actual = np.repeat(results.actual == classes[:, None], nmethods, 0)
+        predicted = results.predicted == classes[:, None, None]
+        auc_array = _auc(actual, predicted.reshape(-1, nrows)) \
+            .reshape(len(classes), nmethods)
 
-        return np.sum(auc_array.T * weights, axis=1)
+        return np.dot(weights, auc_array)
 
     def compute_score(self, results, target=None):
         domain = results.domain
@@ -188,16 +306,13 @@ class AUC(Score):
         if n_classes < 2:
             raise ValueError("Class variable has less than two values")
         elif n_classes == 2:
-            return self.from_predicted(results, skl_metrics.roc_auc_score)
+            return _auc(results.actual, results.predicted)
         else:
             if target is None:
                 return self.multi_class_auc(results)
             else:
-                y = np.array(results.actual == target, dtype=int)
-                return np.fromiter(
-                    (skl_metrics.roc_auc_score(y, probabilities[:, target])
-                     for probabilities in results.probabilities),
-                    dtype=np.float64, count=len(results.predicted))
+                return _auc(results.actual == target,
+                            results.probabilities[:, :, target])
 
 
 class LogLoss(Score):
@@ -228,14 +343,30 @@ class LogLoss(Score):
     __wraps__ = skl_metrics.log_loss
 
     def compute_score(self, results, eps=1e-15, normalize=True, sample_weight=None):
-        return np.fromiter(
-            (skl_metrics.log_loss(results.actual,
-                                  probabilities,
-                                  eps=eps,
-                                  normalize=normalize,
-                                  sample_weight=sample_weight)
-             for probabilities in results.probabilities),
-            dtype=np.float64, count=len(results.probabilities))
+        losses = self._losses(results, eps)
+        if normalize:
+            return np.average(losses, axis=1, weights=sample_weight)
+        elif sample_weight is None:
+            return np.sum(losses, axis=1)
+        else:
+            return np.dot(losses, sample_weight)
+
+    def instance_scores(self, results, eps=1e-15, normalize=True,
+                        sample_weight=None):
+        # Sums and weighted means are not plain averages over instances;
+        # they are computed from results for each fold or sample
+        if not normalize or sample_weight is not None:
+            return None
+        return self._losses(results, eps)
+
+    @staticmethod
+    def _losses(results, eps):
+        # Probabilities may be stored with a type too small for clipping
+        probabilities = np.clip(
+            np.asarray(results.probabilities, dtype=np.float64), eps, 1 - eps)
+        probabilities /= np.sum(probabilities, axis=2)[:, :, None]
+        actual = np.asarray(results.actual, dtype=int)
+        return -np.log(probabilities[:, np.arange(len(actual)), actual])
 
 
 ## Regression scores
@@ -246,6 +377,9 @@ class MSE(Score):
     def compute_score(self, results):
         return self.from_predicted(results, skl_metrics.mean_squared_error)
 
+    def instance_scores(self, results):
+        return (results.predicted - results.actual) ** 2
+
 
 class RMSE(Score):
     def compute_score(self, results):
@@ -258,6 +392,9 @@ class MAE(Score):
     def compute_score(self, results):
         return self.from_predicted(results, skl_metrics.mean_absolute_error)
 
+    def instance_scores(self, results):
+        return np.abs(results.predicted - results.actual)
+
 
 class R2(Score):
     __wraps__ = skl_metrics.r2_score
@@ -266,6 +403,78 @@ class R2(Score):
         return self.from_predicted(results, skl_metrics.r2_score)
 
 
+## Confidence intervals
+
+def _resampled(results, rows):
+    """Return results for the given rows (without folds)"""
+    # Imported here to avoid circular imports
+    from Orange.evaluation.testing import Results
+    resampled = Results()
+    resampled.domain = results.domain
+    resampled.actual = results.actual[rows]
+    resampled.predicted = results.predicted[:, rows]
+    if getattr(results, "probabilities", None) is not None:
+        resampled.probabilities = results.probabilities[:, rows]
+    return resampled
+
+
+def bootstrap_ci(results, score, n_resamples=1000, alpha=0.05,
+                 random_state=0, **kwargs):
+    """
+    Return bootstrap (percentile) confidence intervals of scores.
+
+    Test instances are resampled with replacement; the samples are
+    represented by a matrix of row indices. Scores that are averages over
+    instances (see :obj:`Score.instance_scores`) are computed for all
+    samples with a single matrix product; other scores are computed on
+    results restricted to the sampled rows. Folds are disregarded.
+
+    Samples on which the score is not defined (e.g. AUC on samples with a
+    single class) are skipped.
+
+    :param results: results of testing
+    :type results: Orange.evaluation.Results
+    :param score: score (a class or an instance)
+    :type score: Score
+    :param n_resamples: the number of bootstrap samples
+    :type n_resamples: int
+    :param alpha: one minus the confidence level
+    :type alpha: float
+    :param random_state: seed for sampling
+    :type random_state: int
+    :param kwargs: additional arguments for the score (e.g. `target`)
+    :return: lower and upper bounds of intervals for each method
+    :rtype: tuple of np.ndarray
+    """
+    if isinstance(score, type):
+        score = score()
+    random = np.random.RandomState(random_state)
+    nrows = len(results.actual)
+    values = score.instance_scores(results, **kwargs)
+    # Samples are drawn in chunks to bound the size of index matrices
+    chunk = max(1, 2 ** 22 // max(nrows, 1))
+    scores = np.full((n_resamples, len(results.predicted)), np.nan)
+    for start in range(0, n_resamples, chunk):
+        size = min(chunk, n_resamples - start)
+        rows = random.randint(nrows, size=(size, nrows))
+        if values is not None:
+            counts = np.bincount(
+                (rows + nrows * np.arange(size)[:, None]).ravel(),
+                minlength=size * nrows).reshape(size, nrows)
+            scores[start:start + size] = _average_over(counts, values)
+            continue
+        for i, sample in enumerate(rows, start=start):
+            try:
+                scores[i] = score.compute_score(
+                    _resampled(results, sample),
+                    **_restrict_kwargs(kwargs, sample))
+            except ValueError:
+                pass
+    low, high = np.nanpercentile(
+        scores, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+    return low, high
+
+
 ## CD scores and plot
 
 def compute_CD(avranks, N, alpha="0.05", test="nemenyi"):
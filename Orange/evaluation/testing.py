@@ -1,7 +1,13 @@
+import os
 import sys
+import hashlib
+import shutil
+import tempfile
 import multiprocessing as mp
 from threading import Thread
 from collections import namedtuple
+from functools import lru_cache
+from itertools import chain
 import pickle
 import warnings
 
@@ -10,11 +16,16 @@ import numpy as np
 import joblib
 import sklearn.cross_validation as skl_cross_validation
 
+from Orange.base import Learner, reuse_preprocessing
+from Orange.misc import environ
+from Orange.misc.cache import LRUCache
 from Orange.util import OrangeWarning
 from Orange.data import Table, Domain, ContinuousVariable, DiscreteVariable
+from Orange.preprocess.preprocess import Preprocess
 
 __all__ = ["Results", "CrossValidation", "LeaveOneOut", "TestOnTrainingData",
-           "ShuffleSplit", "TestOnTestData", "sample"]
+           "ShuffleSplit", "TestOnTestData", "sample", "EvaluationCache",
+           "ResultsStorage", "TopKProbabilities"]
 
 _MpResults = namedtuple('_MpResults', ('fold_i', 'learner_i', 'model',
                                        'failed', 'n_values', 'values', 'probs'))
@@ -24,8 +35,18 @@ def _identity(x):
     return x
 
 
-def _mp_worker(fold_i, train_data, test_data, learner_i, learner,
-               store_models, mp_queue):
+def _mp_worker(fold_i, train_data, test_data, learners, store_models,
+               mp_queue):
+    """Fit and test the given `(learner_i, learner)` pairs on a fold.
+    Learners with the same preprocessors preprocess the fold only once."""
+    with reuse_preprocessing():
+        return [_fit_and_test(fold_i, train_data, test_data, learner_i,
+                              learner, store_models, mp_queue)
+                for learner_i, learner in learners]
+
+
+def _fit_and_test(fold_i, train_data, test_data, learner_i, learner,
+                  store_models, mp_queue):
     predicted, probs, model, failed = None, None, None, False
     try:
         if len(train_data) == 0 or len(test_data) == 0:
@@ -43,6 +64,280 @@ def _mp_worker(fold_i, train_data, test_data, learner_i, learner,
                       failed, len(test_data), predicted, probs)
 
 
+@lru_cache(maxsize=2)
+def _open_shared(filename, name):
+    """Open a memory-mapped table written by `_share_data`; each worker
+    process maps the file once and reuses it for all its tasks."""
+    from Orange.data.io import MemmapReader
+    data = MemmapReader(filename).read()
+    data.name = name
+    return data
+
+
+def _share_data(data, dirname, name):
+    """Write `data` into a memory-mapped file in `dirname` and return the
+    arguments of `_open_shared` that reconstruct it."""
+    filename = os.path.join(dirname, name + ".mmap")
+    data.save(filename)
+    return filename, data.name
+
+
+def _mp_shared_worker(fold_i, train_file, train_i, test_file, test_i,
+                      preprocessor, learners, store_models, mp_queue):
+    """Like `_mp_worker`, but receives only row indices of the fold and
+    takes the rows from the shared (memory-mapped) tables."""
+    try:
+        train_data = preprocessor(_open_shared(*train_file)[train_i])
+        test_data = _open_shared(*test_file)[test_i]
+    except Exception:
+        for _ in learners:
+            mp_queue.put("dummy text; use for printing when debugging")
+        raise
+    return _mp_worker(fold_i, train_data, test_data, learners,
+                      store_models, mp_queue)
+
+
+class EvaluationCache:
+    """
+    Persistent cache of predictions of evaluated learners.
+
+    Predictions and probabilities of each learner are stored in a separate
+    file, keyed by the checksums and domains of training and testing data,
+    the indices of all folds, the preprocessor and the configuration (type
+    and attributes) of the learner and its preprocessors. Evaluation
+    methods given the cache fit only the learners whose results are not
+    cached. Learners that cannot be pickled are not cached.
+
+    When the total size of files exceeds `max_size` bytes, the least
+    recently used results are removed.
+
+    :param directory: directory with cached results; defaults to a
+        subdirectory of Orange's cache directory
+    :type directory: str
+    :param max_size: maximal total size of cached results in bytes
+    :type max_size: int
+    """
+    SUFFIX = ".pkl"
+
+    def __init__(self, directory=None, max_size=256 * 2 ** 20):
+        if directory is None:
+            directory = os.path.join(environ.cache_dir(), "evaluation")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._index = LRUCache(max_size, _identity, self._remove)
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith(self.SUFFIX):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._index[name[:-len(self.SUFFIX)]] = size
+
+    def _filename(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def _remove(self, key, _):
+        try:
+            os.remove(self._filename(key))
+        except OSError:
+            pass
+
+    def learner_keys(self, results, train_data, test_data):
+        """
+        Return a list of keys for learners of `results`, which are being
+        tested on folds given by `results.indices`. Keys of learners that
+        cannot be cached are `None`.
+        """
+        def data_signature(data):
+            domain = data.domain
+            include_metas = bool(domain.metas) and data.metas.dtype != object
+            return (data.checksum(include_metas=include_metas),
+                    data.X.shape, data.metas.shape,
+                    [(type(var).__name__, var.name,
+                      getattr(var, "values", None))
+                     for var in domain.variables + domain.metas])
+
+        try:
+            folds = hashlib.sha1(pickle.dumps(
+                (data_signature(train_data), data_signature(test_data),
+                 results.preprocessor)))
+        except Exception:  # pylint: disable=broad-except
+            # Sparse data or unpicklable preprocessor
+            return [None] * len(results.learners)
+        for train_i, test_i in results.indices:
+            for indices in (train_i, test_i):
+                folds.update(b"..." if indices is Ellipsis else
+                             np.asarray(indices, dtype=np.int64).tobytes())
+                folds.update(b"|")
+
+        keys = []
+        for learner in results.learners:
+            try:
+                learner_key = pickle.dumps(self._configuration(learner))
+            except Exception:  # pylint: disable=broad-except
+                keys.append(None)
+                continue
+            key = folds.copy()
+            key.update(learner_key)
+            keys.append(key.hexdigest())
+        return keys
+
+    @classmethod
+    def _configuration(cls, obj):
+        """Return a picklable description of the configuration of a learner
+        or preprocessor, excluding the data they store when used"""
+        if isinstance(obj, (list, tuple)):
+            return type(obj), [cls._configuration(x) for x in obj]
+        if isinstance(obj, dict):
+            return type(obj), [(key, cls._configuration(value))
+                               for key, value in sorted(obj.items(), key=str)]
+        if hasattr(obj, "get_params"):  # scikit-learn estimators
+            return type(obj), cls._configuration(obj.get_params(deep=False))
+        if isinstance(obj, (Learner, Preprocess)):
+            # Learners store the domain and SklImpute the imputer fitted on
+            # the last data they were used on
+            return type(obj), cls._configuration(
+                {name: value for name, value in vars(obj).items()
+                 if name not in ("domain", "imputer")})
+        return obj
+
+    def get(self, key):
+        """
+        Return a tuple with predicted values and probabilities (or `None`
+        for regression) for the key, or `None` if the results are not cached.
+        """
+        if key not in self._index:
+            return None
+        filename = self._filename(key)
+        try:
+            with open(filename, "rb") as f:
+                cached = pickle.load(f)
+            os.utime(filename)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self._index.discard(key)
+            return None
+        self._index.get(key)  # mark as recently used
+        return cached
+
+    def put(self, key, predicted, probabilities):
+        """Store predicted values and probabilities for the key."""
+        value = pickle.dumps((predicted, probabilities),
+                             pickle.HIGHEST_PROTOCOL)
+        if len(value) > self._index.max_size:
+            return
+        filename = self._filename(key)
+        with tempfile.NamedTemporaryFile(dir=self.directory,
+                                         delete=False) as f:
+            f.write(value)
+        os.replace(f.name, filename)
+        self._index[key] = len(value)
+
+    def clear(self):
+        """Remove all cached results."""
+        for key in self._index.keys():
+            self._remove(key, None)
+        self._index.clear()
+
+
+class ResultsStorage:
+    """
+    Storage of predictions and probabilities in :obj:`Results`.
+
+    By default, the arrays are kept in memory and probabilities are stored
+    as `np.float32`. For large numbers of instances and classes, the
+    probabilities can be stored with a smaller type, only the `top_k`
+    highest probabilities of each instance can be kept (see
+    :obj:`TopKProbabilities`), and the arrays can be backed by temporary
+    memory-mapped files.
+
+    :param dtype: type of stored probabilities (e.g. `np.float16`)
+    :type dtype: np.dtype
+    :param top_k: the number of highest probabilities that are stored for
+        each instance; `None` to store all
+    :type top_k: int
+    :param directory: directory for temporary files that back the arrays;
+        `None` to keep the arrays in memory
+    :type directory: str
+    """
+    def __init__(self, dtype=np.float32, top_k=None, directory=None):
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k must be positive")
+        self.dtype = dtype
+        self.top_k = top_k
+        self.directory = directory
+
+    def empty(self, shape, dtype):
+        """Return an uninitialized array of the given shape and type"""
+        if self.directory is None or not np.prod(shape):
+            return np.empty(shape, dtype=dtype)
+        # The mapping remains valid after the (unnamed) file is closed
+        with tempfile.TemporaryFile(dir=self.directory) as f:
+            return np.memmap(f, dtype=dtype, mode="w+", shape=shape)
+
+    def probabilities(self, nmethods, nrows, nclasses):
+        """Return an uninitialized array of probabilities"""
+        if self.top_k is None or self.top_k >= nclasses:
+            return self.empty((nmethods, nrows, nclasses), self.dtype)
+        return TopKProbabilities(nmethods, nrows, nclasses, self)
+
+
+class TopKProbabilities:
+    """
+    Probabilities that store only the `top_k` highest probabilities of each
+    instance and their class indices; other probabilities are 0.
+
+    The object behaves as a read-only array of shape
+    `(nmethods, nrows, nclasses)`: indexing and iteration over methods give
+    dense arrays, which are constructed on the fly. Indexing supports a
+    method index, sequence or slice, followed by (at most) a row index and
+    a class index. Probabilities of a method are set by assigning a dense
+    array to `probabilities[method, rows]`.
+    """
+    ndim = 3
+
+    def __init__(self, nmethods, nrows, nclasses, storage):
+        self.shape = (nmethods, nrows, nclasses)
+        self.dtype = np.dtype(storage.dtype)
+        k = storage.top_k
+        self.values = storage.empty((nmethods, nrows, k), storage.dtype)
+        self.indices = storage.empty(
+            (nmethods, nrows, k),
+            np.uint16 if nclasses <= np.iinfo(np.uint16).max else np.int32)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __array__(self, dtype=None):
+        return self[:].astype(dtype or self.dtype, copy=False)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, )
+        rows_key, classes_key = key[:2], key[2:]
+        if rows_key and isinstance(rows_key[0], tuple):
+            rows_key = (list(rows_key[0]), ) + rows_key[1:]
+        values, indices = self.values[rows_key], self.indices[rows_key]
+        k = values.shape[-1]
+        dense = np.zeros(values.shape[:-1] + (self.shape[2], ), self.dtype)
+        flat = dense.reshape(-1, self.shape[2])
+        flat[np.arange(len(flat))[:, None], indices.reshape(-1, k)] = \
+            values.reshape(-1, k)
+        return dense[(Ellipsis, ) + classes_key] if classes_key else dense
+
+    def __setitem__(self, key, probabilities):
+        method, rows = key if isinstance(key, tuple) else (key, slice(None))
+        probabilities = np.atleast_2d(probabilities)
+        k = self.values.shape[2]
+        indices = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+        self.values[method, rows] = \
+            probabilities[np.arange(len(probabilities))[:, None], indices]
+        self.indices[method, rows] = indices
+
+
 class Results:
     """
     Class for storing predictions in model testing.
@@ -72,7 +367,8 @@ class Results:
         probabilities (Optional[np.ndarray]): Predicted probabilities
             (for discrete target variables);
             a numpy array of shape (number-of-methods, `nrows`, number-of-classes)
-            of type `np.float32`.
+            of type `np.float32`, or an array-like object as determined by
+            the `storage` given to the constructor.
 
         folds (List[Slice or List[int]]): A list of indices (or slice objects)
             corresponding to rows of each fold.
@@ -85,7 +381,8 @@ class Results:
                  store_data=False, store_models=False,
                  domain=None, actual=None, row_indices=None,
                  predicted=None, probabilities=None,
-                 preprocessor=None, callback=None, n_jobs=1):
+                 preprocessor=None, callback=None, n_jobs=1,
+                 shared_memory=False, cache=None, storage=None):
         """
         Construct an instance with default values: `None` for :obj:`data` and
         :obj:`models`.
@@ -124,15 +421,33 @@ class Results:
             on. -1 to parallelize on all but one CPUs. 1 for no
             parallelization.
         :type n_jobs: int
+        :param shared_memory: A flag that tells whether to pass the data to
+            the worker processes through a memory-mapped temporary file
+            instead of pickling the training and testing data for each fold
+            and learner; the workers then receive only the row indices of
+            folds. Used only when `n_jobs` is greater than 1.
+        :type shared_memory: bool
+        :param cache: A cache of results; learners whose results on the same
+            data and folds are cached are not fitted again. The cache is not
+            used for retrieving results when models are stored.
+        :type cache: EvaluationCache
+        :param storage: Storage of predictions and probabilities computed
+            by learners; by default, they are kept in memory, with
+            probabilities stored as `np.float32`
+        :type storage: ResultsStorage
         """
         self.store_data = store_data
         self.store_models = store_models
         self.dtype = np.float32
         self.n_jobs = max(1, joblib.cpu_count() - 1 if n_jobs < 0 else n_jobs)
+        self.shared_memory = shared_memory
+        self.cache = cache
+        self.storage = storage or ResultsStorage()
 
         self.models = None
         self.folds = None
         self.indices = None
+        self.probabilities = None
 
         self.row_indices = row_indices
         self.preprocessor = preprocessor or _identity
@@ -211,11 +526,11 @@ class Results:
         if self.store_models:
             self.models = np.tile(None, (len(self.indices), nmethods))
         # Initialize `predicted` and `probabilities` (only for discrete classes)
-        self.predicted = np.empty((nmethods, self.nrows), dtype=self.dtype)
+        self.predicted = self.storage.empty((nmethods, self.nrows), self.dtype)
         if data.domain.has_discrete_class:
             nclasses = len(data.domain.class_var.values)
-            self.probabilities = np.empty((nmethods, self.nrows, nclasses),
-                                          dtype=np.float32)
+            self.probabilities = self.storage.probabilities(
+                nmethods, self.nrows, nclasses)
 
     def get_fold(self, fold):
         results = Results()
@@ -317,7 +632,22 @@ class Results:
         self.prepare_arrays(test_data)
         self._prepare_arrays(test_data)
 
-        n_callbacks = len(self.learners) * len(self.indices)
+        learners = list(enumerate(self.learners))
+        keys = [None] * len(learners)
+        if self.cache is not None:
+            keys = self.cache.learner_keys(self, train_data, test_data)
+            if not self.store_models:
+                learners = [(learner_i, learner)
+                            for learner_i, learner in learners
+                            if not self._set_cached(learner_i, keys[learner_i])]
+        learners = [(learner_i, learner) for learner_i, learner in learners
+                    if not self._fit_shortcut(learner_i, learner, train_data,
+                                              test_data)]
+        if not learners:
+            self._callback(1)
+            return self
+
+        n_callbacks = len(learners) * len(self.indices)
         n_jobs = max(1, min(self.n_jobs, n_callbacks))
 
         def _is_picklable(obj):
@@ -326,7 +656,7 @@ class Results:
             except (AttributeError, TypeError, pickle.PicklingError):
                 return False
 
-        if n_jobs > 1 and not all(_is_picklable(learner) for learner in self.learners):
+        if n_jobs > 1 and not all(_is_picklable(learner) for _, learner in learners):
             n_jobs = 1
             warnings.warn("Not all arguments (learners) are picklable. "
                           "Setting n_jobs=1", OrangeWarning)
@@ -377,17 +707,47 @@ class Results:
         to evaluation methods, i.e. {}(..., n_jobs=1). Setting n_jobs to 1.
             '''.format(self.__class__.__name__), OrangeWarning)
 
-        data_splits = (
-            (fold_i, self.preprocessor(train_data[train_i]), test_data[test_i])
-            for fold_i, (train_i, test_i) in enumerate(self.indices))
-
-        args_iter = (
-            (fold_i, train_data, test_data, learner_i, learner,
-             self.store_models, mp_queue)
-            # NOTE: If this nested for loop doesn't work, try
-            # itertools.product
-            for (fold_i, train_data, test_data) in data_splits
-            for (learner_i, learner) in enumerate(self.learners))
+        # Fit all learners on a fold in the same task, so the fold is
+        # transferred and preprocessed only once, unless there are too few
+        # folds to keep all processes busy
+        if len(self.indices) >= n_jobs:
+            learner_groups = [learners]
+        else:
+            learner_groups = [[pair] for pair in learners]
+
+        shared = n_jobs > 1 and self.shared_memory
+        if shared and not _is_picklable(self.preprocessor):
+            shared = False
+            warnings.warn("Preprocessor is not picklable; the data will be "
+                          "pickled for each fold instead of being shared "
+                          "between processes", OrangeWarning)
+
+        shared_dir = None
+        if shared:
+            shared_dir = tempfile.mkdtemp(prefix="orange-evaluation-")
+            train_file = _share_data(train_data, shared_dir, "train")
+            test_file = train_file if test_data is train_data else \
+                _share_data(test_data, shared_dir, "test")
+            worker = _mp_shared_worker
+            args_iter = (
+                (fold_i, train_file, train_i, test_file, test_i,
+                 self.preprocessor, learners, self.store_models, mp_queue)
+                for fold_i, (train_i, test_i) in enumerate(self.indices)
+                for learners in learner_groups)
+        else:
+            data_splits = (
+                (fold_i, self.preprocessor(train_data[train_i]),
+                 test_data[test_i])
+                for fold_i, (train_i, test_i) in enumerate(self.indices))
+
+            worker = _mp_worker
+            args_iter = (
+                (fold_i, train_data, test_data, learners, self.store_models,
+                 mp_queue)
+                # NOTE: If this nested for loop doesn't work, try
+                # itertools.product
+                for (fold_i, train_data, test_data) in data_splits
+                for learners in learner_groups)
 
         def _callback_percent(n_steps, queue):
             """Block until one of the subprocesses completes, before
@@ -403,16 +763,21 @@ class Results:
                     pass
 
         results = []
-        with joblib.Parallel(n_jobs=n_jobs, backend=mp_ctx) as parallel:
-            tasks = (joblib.delayed(_mp_worker)(*args) for args in args_iter)
-            # Start the tasks from another thread ...
-            thread = Thread(target=lambda: results.append(parallel(tasks)))
-            thread.start()
-            # ... so that we can update the GUI (callback) from the main thread
-            _callback_percent(n_callbacks, mp_queue)
-            thread.join()
-
-        results = sorted(results[0])
+        try:
+            with joblib.Parallel(n_jobs=n_jobs, backend=mp_ctx) as parallel:
+                tasks = (joblib.delayed(worker)(*args) for args in args_iter)
+                # Start the tasks from another thread ...
+                thread = Thread(target=lambda: results.append(parallel(tasks)))
+                thread.start()
+                # ... so that we can update the GUI (callback) from the main
+                # thread
+                _callback_percent(n_callbacks, mp_queue)
+                thread.join()
+        finally:
+            if shared_dir is not None:
+                shutil.rmtree(shared_dir, ignore_errors=True)
+
+        results = sorted(chain.from_iterable(results[0]))
 
         ptr, prev_fold_i, prev_n_values = 0, 0, 0
         for res in results:
@@ -431,11 +796,33 @@ class Results:
 
             self.predicted[res.learner_i][result_slice] = res.values
             if train_data.domain.has_discrete_class:
-                self.probabilities[res.learner_i][result_slice, :] = res.probs
+                self.probabilities[res.learner_i, result_slice] = res.probs
+
+        for learner_i, _ in learners:
+            if keys[learner_i] is not None and not self.failed[learner_i]:
+                self.cache.put(keys[learner_i], self.predicted[learner_i],
+                               self.probabilities[learner_i]
+                               if test_data.domain.has_discrete_class
+                               else None)
 
         self._callback(1)
         return self
 
+    def _fit_shortcut(self, learner_i, learner, train_data, test_data):
+        """Set the results of the learner without fitting a model for each
+        fold, if the sampling procedure and the learner support it"""
+        return False
+
+    def _set_cached(self, learner_i, key):
+        """Set the results of the learner from the cache, if available"""
+        cached = key is not None and self.cache.get(key)
+        if not cached:
+            return False
+        self.predicted[learner_i], probabilities = cached
+        if probabilities is not None:
+            self.probabilities[learner_i] = probabilities
+        return True
+
     def prepare_arrays(self, test_data):
         """Initialize arrays that will be used by `fit` method.
         """
@@ -503,7 +890,8 @@ class CrossValidation(Results):
     """
     def __init__(self, data, learners, k=10, stratified=True, random_state=0, store_data=False,
                  store_models=False, preprocessor=None, callback=None, warnings=None,
-                 n_jobs=1):
+                 n_jobs=1, shared_memory=False,
+                 cache=None, storage=None):
         self.k = k
         self.stratified = stratified
         self.random_state = random_state
@@ -514,7 +902,9 @@ class CrossValidation(Results):
 
         super().__init__(data, learners=learners, store_data=store_data,
                          store_models=store_models, preprocessor=preprocessor,
-                         callback=callback, n_jobs=n_jobs)
+                         callback=callback, n_jobs=n_jobs,
+                         shared_memory=shared_memory, cache=cache,
+                         storage=storage)
 
     def setup_indices(self, train_data, test_data):
         self.indices = None
@@ -533,18 +923,47 @@ class CrossValidation(Results):
 
 
 class LeaveOneOut(Results):
-    """Leave-one-out testing"""
+    """Leave-one-out testing
+
+    Learners that implement :obj:`Orange.base.Learner.leave_one_out` give
+    predictions for all instances at once; for other learners, a model is
+    fitted for each instance.
+    """
     score_by_folds = False
 
     def __init__(self, data, learners, store_data=False, store_models=False,
-                 preprocessor=None, callback=None, n_jobs=1):
+                 preprocessor=None, callback=None, n_jobs=1,
+                 shared_memory=False, cache=None, storage=None):
         super().__init__(data, learners=learners, store_data=store_data,
                          store_models=store_models, preprocessor=preprocessor,
-                         callback=callback, n_jobs=n_jobs)
+                         callback=callback, n_jobs=n_jobs,
+                         shared_memory=shared_memory, cache=cache,
+                         storage=storage)
 
     def setup_indices(self, train_data, test_data):
         self.indices = skl_cross_validation.LeaveOneOut(len(test_data))
 
+    def _fit_shortcut(self, learner_i, learner, train_data, test_data):
+        # Learners may implement `leave_one_out`, which gives predictions
+        # for all instances at once
+        leave_one_out = getattr(learner, "leave_one_out", None)
+        if leave_one_out is None or self.store_models or \
+                self.preprocessor is not _identity or \
+                train_data is not test_data or len(test_data) < 2:
+            return False
+        try:
+            predicted = leave_one_out(test_data)
+        # Different models can fail at any time raising any exception
+        except Exception as ex:  # pylint: disable=broad-except
+            self.failed[learner_i] = ex
+            return True
+        if predicted is None:
+            return False
+        self.predicted[learner_i], probabilities = predicted
+        if probabilities is not None:
+            self.probabilities[learner_i] = probabilities
+        return True
+
     def prepare_arrays(self, test_data):
         # sped up version of super().prepare_arrays(data)
         self.row_indices = np.arange(len(test_data))
@@ -555,7 +974,8 @@ class LeaveOneOut(Results):
 class ShuffleSplit(Results):
     def __init__(self, data, learners, n_resamples=10, train_size=None,
                  test_size=0.1, stratified=True, random_state=0, store_data=False,
-                 store_models=False, preprocessor=None, callback=None, n_jobs=1):
+                 store_models=False, preprocessor=None, callback=None, n_jobs=1,
+                 shared_memory=False, cache=None, storage=None):
         self.n_resamples = n_resamples
         self.train_size = train_size
         self.test_size = test_size
@@ -564,7 +984,9 @@ class ShuffleSplit(Results):
 
         super().__init__(data, learners=learners, store_data=store_data,
                          store_models=store_models, preprocessor=preprocessor,
-                         callback=callback, n_jobs=n_jobs)
+                         callback=callback, n_jobs=n_jobs,
+                         shared_memory=shared_memory, cache=cache,
+                         storage=storage)
 
     def setup_indices(self, train_data, test_data):
         if self.stratified and test_data.domain.has_discrete_class:
@@ -584,11 +1006,14 @@ class TestOnTestData(Results):
     Test on a separate test data set.
     """
     def __init__(self, train_data, test_data, learners, store_data=False,
-                 store_models=False, preprocessor=None, callback=None, n_jobs=1):
+                 store_models=False, preprocessor=None, callback=None, n_jobs=1,
+                 shared_memory=False, cache=None, storage=None):
         super().__init__(test_data, train_data=train_data, learners=learners,
                          store_data=store_data,
                          store_models=store_models, preprocessor=preprocessor,
-                         callback=callback, n_jobs=n_jobs)
+                         callback=callback, n_jobs=n_jobs,
+                         shared_memory=shared_memory, cache=cache,
+                         storage=storage)
 
     def setup_indices(self, train_data, test_data):
         self.indices = ((Ellipsis, Ellipsis),)
@@ -605,14 +1030,17 @@ class TestOnTrainingData(TestOnTestData):
     """
 
     def __init__(self, data, learners, store_data=False, store_models=False,
-                 preprocessor=None, callback=None, n_jobs=1):
+                 preprocessor=None, callback=None, n_jobs=1,
+                 shared_memory=False, cache=None, storage=None):
 
         if preprocessor is not None:
             data = preprocessor(data)
 
         super().__init__(train_data=data, test_data=data, learners=learners,
                          store_data=store_data, store_models=store_models,
-                         preprocessor=None, callback=callback, n_jobs=n_jobs)
+                         preprocessor=None, callback=callback, n_jobs=n_jobs,
+                         shared_memory=shared_memory, cache=cache,
+                         storage=storage)
         self.preprocessor = preprocessor
 
 
@@ -0,0 +1,248 @@
+"""
+Search for parameters of learners (``tuning``).
+
+Examples
+--------
+>>> import Orange
+>>> data = Orange.data.Table('iris')
+>>> search = Orange.evaluation.GridSearch(
+...     Orange.classification.KNNLearner(), {'n_neighbors': [1, 5, 10]})
+>>> model = search(data)
+>>> search.best_params
+{'n_neighbors': 5}
+
+"""
+import copy
+import inspect
+
+import numpy as np
+import sklearn.cross_validation as skl_cross_validation
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from Orange.base import Learner, SklLearner
+from Orange.evaluation.scoring import CA, R2
+from Orange.evaluation.testing import Results
+
+__all__ = ["ParameterSearch", "GridSearch", "RandomSearch"]
+
+
+class _GivenFolds(Results):
+    """Testing on the given folds"""
+    def __init__(self, data, learners, folds, n_jobs=1):
+        self.given_folds = folds
+        super().__init__(data, learners=learners, n_jobs=n_jobs)
+
+    def setup_indices(self, train_data, test_data):
+        self.indices = self.given_folds
+
+
+class ParameterSearch(Learner):
+    """
+    Base class for learners that choose the parameters of a `learner` by
+    cross validation and return the model fitted with the best parameters.
+
+    Parameters of scikit-learn wrappers (:obj:`SklLearner.params`) and
+    attributes of other learners can be tuned. The configurations are
+    evaluated on the same folds; all configurations and folds are
+    evaluated in a single pool of processes (see :obj:`Results`) and
+    learners fitted on a fold preprocess the fold only once.
+
+    If `abandon` is given, the folds are evaluated one after another.
+    After each fold, starting with the second, configurations whose
+    average score is lower than the best average score by more than
+    `abandon` are not evaluated on the remaining folds.
+
+    Attributes set when the learner is called:
+
+    configurations (List[dict]): Evaluated configurations of parameters.
+
+    scores (np.ndarray): Scores of configurations (rows) on folds
+        (columns); scores of abandoned and failed configurations are `nan`.
+
+    best_params (dict): Configuration with the highest average score.
+
+    best_learner (Learner): Learner with the best parameters.
+
+    :param learner: learner whose parameters are tuned
+    :type learner: Orange.base.Learner
+    :param scorer: score to maximize; by default, classification accuracy
+        for discrete and R2 for continuous classes
+    :type scorer: Orange.evaluation.Score
+    :param k: the number of folds
+    :type k: int
+    :param stratified: a flag that tells whether to use stratified folds
+    :type stratified: bool
+    :param random_state: seed for sampling of folds (and configurations)
+    :type random_state: int
+    :param n_jobs: the number of processes
+    :type n_jobs: int
+    :param abandon: the largest difference in score for which a
+        configuration is evaluated on further folds; `None` to evaluate
+        all configurations on all folds
+    :type abandon: float
+    """
+    name = 'parameter search'
+
+    def __init__(self, learner, scorer=None, k=5, stratified=True,
+                 random_state=0, n_jobs=1, abandon=None, preprocessors=None):
+        super().__init__(preprocessors=preprocessors)
+        self.learner = learner
+        self.scorer = scorer
+        self.k = k
+        self.stratified = stratified
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.abandon = abandon
+        self.configurations = self.scores = None
+        self.best_params = self.best_learner = None
+
+    @property
+    def learner_adequacy_err_msg(self):
+        return self.learner.learner_adequacy_err_msg
+
+    def check_learner_adequacy(self, domain):
+        return self.learner.check_learner_adequacy(domain)
+
+    def get_configurations(self):
+        """Return a list of configurations (dictionaries of parameters)"""
+        raise NotImplementedError
+
+    def configure(self, params):
+        """Return a copy of the learner with the given parameters"""
+        learner = copy.copy(self.learner)
+        if isinstance(learner, SklLearner):
+            names = inspect.getargs(learner.__wraps__.__init__.__code__).args
+            unknown = set(params) - set(names[1:])
+            values = dict(learner.params, **params)
+        else:
+            unknown = {name for name in params if not hasattr(learner, name)}
+        if unknown:
+            raise ValueError("{} has no parameters {}".format(
+                type(learner).__name__, ", ".join(sorted(unknown))))
+        if isinstance(learner, SklLearner):
+            learner.params = values
+        else:
+            for name, value in params.items():
+                setattr(learner, name, value)
+        return learner
+
+    def get_folds(self, data):
+        """Return a list of pairs of training and testing indices"""
+        if self.stratified and data.domain.has_discrete_class:
+            try:
+                return list(skl_cross_validation.StratifiedKFold(
+                    data.Y, self.k, shuffle=True,
+                    random_state=self.random_state))
+            except ValueError:
+                pass
+        return list(skl_cross_validation.KFold(
+            len(data), self.k, shuffle=True, random_state=self.random_state))
+
+    def _fold_scores(self, results, scorer):
+        failed = [bool(failed) for failed in results.failed]
+        # Predictions of failed learners are undefined and may not be scored
+        results.predicted[failed] = 0
+        if results.probabilities is not None:
+            results.probabilities[failed] = 1 / results.probabilities.shape[2]
+        scores = np.array([scorer(results.get_fold(fold))
+                           for fold in range(len(results.folds))],
+                          dtype=float).T
+        scores[failed] = np.nan
+        return scores
+
+    def __call__(self, data):
+        if not self.check_learner_adequacy(data.domain):
+            raise ValueError(self.learner_adequacy_err_msg)
+        origdomain = data.domain
+        data = self.preprocess(data)
+        configurations = self.configurations = self.get_configurations()
+        learners = [self.configure(params) for params in configurations]
+        scorer = self.scorer or \
+            (CA() if data.domain.has_discrete_class else R2())
+        folds = self.get_folds(data)
+
+        if self.abandon is None:
+            results = _GivenFolds(data, learners, folds, self.n_jobs)
+            scores = self._fold_scores(results, scorer)
+        else:
+            scores = np.full((len(learners), len(folds)), np.nan)
+            active = np.arange(len(learners))
+            for fold_i, fold in enumerate(folds):
+                results = _GivenFolds(data, [learners[i] for i in active],
+                                      [fold], self.n_jobs)
+                scores[active, fold_i] = self._fold_scores(results, scorer)[:, 0]
+                # Failed configurations are abandoned, too
+                active = active[~np.isnan(scores[active, fold_i])]
+                if fold_i > 0 and len(active):
+                    means = np.mean(scores[active, :fold_i + 1], axis=1)
+                    active = active[means >= np.max(means) - self.abandon]
+        self.scores = scores
+
+        # Abandoned configurations have lower averages on evaluated folds
+        completed = ~np.any(np.isnan(scores), axis=1)
+        if not np.any(completed):
+            raise ValueError("All configurations failed")
+        means = np.where(completed, np.mean(scores, axis=1), -np.inf)
+        best = int(np.argmax(means))
+        self.best_params = configurations[best]
+        self.best_learner = learners[best]
+        model = self.best_learner(data)
+        model.original_domain = origdomain
+        return model
+
+
+class GridSearch(ParameterSearch):
+    """
+    Search through all combinations of parameter values.
+
+    :param learner: learner whose parameters are tuned
+    :type learner: Orange.base.Learner
+    :param param_grid: a dictionary with lists of values of parameters, or
+        a list of such dictionaries (see `sklearn.model_selection.ParameterGrid`)
+    :type param_grid: dict or list of dict
+
+    Other parameters are described in :obj:`ParameterSearch`.
+    """
+    name = 'grid search'
+
+    def __init__(self, learner, param_grid, scorer=None, k=5,
+                 stratified=True, random_state=0, n_jobs=1, abandon=None,
+                 preprocessors=None):
+        super().__init__(learner, scorer=scorer, k=k, stratified=stratified,
+                         random_state=random_state, n_jobs=n_jobs,
+                         abandon=abandon, preprocessors=preprocessors)
+        self.param_grid = param_grid
+
+    def get_configurations(self):
+        return list(ParameterGrid(self.param_grid))
+
+
+class RandomSearch(ParameterSearch):
+    """
+    Search through randomly chosen combinations of parameter values.
+
+    :param learner: learner whose parameters are tuned
+    :type learner: Orange.base.Learner
+    :param param_distributions: a dictionary with lists of values of
+        parameters or distributions (with method `rvs`, e.g. from
+        `scipy.stats`) from which the values are sampled
+    :type param_distributions: dict
+    :param n_iter: the number of sampled configurations
+    :type n_iter: int
+
+    Other parameters are described in :obj:`ParameterSearch`.
+    """
+    name = 'random search'
+
+    def __init__(self, learner, param_distributions, n_iter=10, scorer=None,
+                 k=5, stratified=True, random_state=0, n_jobs=1,
+                 abandon=None, preprocessors=None):
+        super().__init__(learner, scorer=scorer, k=k, stratified=stratified,
+                         random_state=random_state, n_jobs=n_jobs,
+                         abandon=abandon, preprocessors=preprocessors)
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+
+    def get_configurations(self):
+        return list(ParameterSampler(self.param_distributions, self.n_iter,
+                                     random_state=self.random_state))
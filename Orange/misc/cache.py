@@ -1,5 +1,7 @@
 """Common caching methods, using `lru_cache` sometimes has its downsides."""
+from collections import OrderedDict
 from functools import wraps, lru_cache
+from threading import RLock
 import weakref
 
 
@@ -58,3 +60,88 @@ def memoize_method(*lru_args, **lru_kwargs):
         return _wrapped_func
 
     return _decorator
+
+
+class LRUCache:
+    """
+    A cache with a limited total size of items, which evicts the least
+    recently used items first.
+
+    The cache is thread-safe.
+
+    Parameters
+    ----------
+    max_size : int
+        maximal total size of cached items
+    sizeof : callable, optional
+        a function that returns the size of an item; by default, all items
+        have size 1, so `max_size` limits the number of items
+    on_evict : callable, optional
+        a function that is called with the key and the item when the item is
+        evicted to make room for new items
+    """
+    def __init__(self, max_size, sizeof=None, on_evict=None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda _: 1)
+        self.on_evict = on_evict
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __getitem__(self, key):
+        with self._lock:
+            value, _ = self._items[key]
+            self._items.move_to_end(key)
+            return value
+
+    def get(self, key, default=None):
+        """Return the item for `key` or `default` if the key is not cached"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            self.discard(key)
+            if size > self.max_size:
+                return
+            self._items[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                evicted_key, (evicted, evicted_size) = \
+                    self._items.popitem(last=False)
+                self.size -= evicted_size
+                if self.on_evict is not None:
+                    self.on_evict(evicted_key, evicted)
+
+    def discard(self, key):
+        """Remove the item for `key`, if cached"""
+        with self._lock:
+            if key in self._items:
+                _, size = self._items.pop(key)
+                self.size -= size
+
+    def discard_if(self, predicate):
+        """Remove all items whose keys satisfy the `predicate`"""
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                self.discard(key)
+
+    def keys(self):
+        """Return a list of keys, from the least to the most recently used"""
+        with self._lock:
+            return list(self._items)
+
+    def clear(self):
+        """Remove all items"""
+        with self._lock:
+            self._items.clear()
+            self.size = 0
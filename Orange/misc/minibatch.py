@@ -0,0 +1,97 @@
+"""
+Mini-batch gradient descent for learners that minimize a cost given by a
+`cost_grad(theta, X, Y)` function.
+
+Only one batch of rows is taken from `X` and `Y` at a time, so `X` can be
+a sparse (CSR) matrix, which is never densified, or a memory-mapped array
+that is larger than the available memory.
+"""
+import numpy as np
+
+__all__ = ["batches", "minimize", "SOLVERS"]
+
+SOLVERS = ("sgd", "adam")
+
+
+def batches(n_rows, batch_size, shuffle=True, random=None):
+    """
+    Return a list of indices of rows of consecutive batches.
+
+    Without shuffling, batches are slices of consecutive rows. Otherwise
+    rows are shuffled, and indices within each batch are sorted, so rows
+    of memory-mapped and sparse matrices are read in order.
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be positive")
+    starts = range(0, n_rows, batch_size)
+    if not shuffle:
+        return [slice(start, min(start + batch_size, n_rows))
+                for start in starts]
+    random = random or np.random
+    order = random.permutation(n_rows)
+    return [np.sort(order[start:start + batch_size]) for start in starts]
+
+
+def minimize(cost_grad, theta, X, Y, solver="adam", batch_size=100,
+             max_iter=10, learning_rate=0.001, shuffle=True,
+             random_state=None, beta_1=0.9, beta_2=0.999, epsilon=1e-8):
+    """
+    Minimize the cost over mini-batches of rows of `X` and `Y`.
+
+    `cost_grad(theta, X_batch, Y_batch)` must return the cost and the
+    gradient of the batch, averaged over its rows.
+
+    Parameters
+    ----------
+    cost_grad : callable
+        Function that returns a tuple with the cost and the gradient
+    theta : np.ndarray
+        Initial parameters; the array is not changed
+    X : np.ndarray, scipy.sparse.csr_matrix or np.memmap
+        Data; only rows of a single batch are taken from it at once
+    Y : np.ndarray
+        Target values, indexed by rows just like `X`
+    solver : str, optional (default="adam")
+        "sgd" for plain stochastic gradient descent or "adam" for
+        Adam (Kingma and Ba, 2014)
+    batch_size : int, optional (default=100)
+        The number of rows in a batch
+    max_iter : int, optional (default=10)
+        The number of passes (epochs) over the data
+    learning_rate : float, optional (default=0.001)
+        The step size
+    shuffle : bool, optional (default=True)
+        Whether to shuffle rows in each epoch
+    random_state : int, optional (default=None)
+        Seed for shuffling
+    beta_1, beta_2, epsilon : float, optional
+        Parameters of Adam
+
+    Returns
+    -------
+    theta : np.ndarray
+        Parameters after the last epoch
+    """
+    if solver not in SOLVERS:
+        raise ValueError("Unknown solver '{}'".format(solver))
+    random = np.random.RandomState(random_state)
+    theta = np.array(theta, dtype=float)
+    if solver == "adam":
+        moment_1 = np.zeros_like(theta)
+        moment_2 = np.zeros_like(theta)
+    step = 0
+    for _ in range(max_iter):
+        for rows in batches(X.shape[0], batch_size, shuffle, random):
+            _, grad = cost_grad(theta, X[rows], Y[rows])
+            if solver == "sgd":
+                theta -= learning_rate * grad
+                continue
+            step += 1
+            moment_1 *= beta_1
+            moment_1 += (1 - beta_1) * grad
+            moment_2 *= beta_2
+            moment_2 += (1 - beta_2) * grad ** 2
+            rate = learning_rate * \
+                np.sqrt(1 - beta_2 ** step) / (1 - beta_1 ** step)
+            theta -= rate * moment_1 / (np.sqrt(moment_2) + epsilon)
+    return theta
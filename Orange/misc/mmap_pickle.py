@@ -0,0 +1,98 @@
+"""
+Pickling of objects with large numpy arrays into files from which the
+arrays are memory-mapped.
+
+The file starts with a pickle of the object in which numeric arrays are
+replaced by references to raw binary blocks that follow the pickle.
+Loading maps the blocks with `np.memmap` instead of reading them, so
+loading is cheap regardless of the size of arrays, the pages are read only
+when the data is accessed, and processes that load the same file share the
+page cache. Loaded arrays are read-only.
+"""
+import io
+import pickle
+import struct
+
+import numpy as np
+
+__all__ = ["dump", "load"]
+
+MAGIC = b'ORANGEPM'
+VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sIQ')  # magic, version, pickle length
+
+# Smaller arrays are pickled as usual
+MIN_MAPPED_SIZE = 4096
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.blocks = []
+        self.size = 0
+        self._ids = {}
+
+    def persistent_id(self, obj):
+        # pylint: disable=unidiomatic-typecheck
+        if type(obj) not in (np.ndarray, np.memmap) \
+                or obj.dtype.hasobject or obj.nbytes < MIN_MAPPED_SIZE:
+            return None
+        if id(obj) not in self._ids:
+            self._ids[id(obj)] = \
+                ("block", obj.dtype.str, obj.shape, self.size)
+            self.blocks.append((self.size, np.ascontiguousarray(obj)))
+            self.size = _align(self.size + obj.nbytes)
+        return self._ids[id(obj)]
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, filename, start):
+        super().__init__(file)
+        self.filename = filename
+        self.start = start
+
+    def persistent_load(self, pid):
+        _, dtype, shape, offset = pid
+        return np.memmap(self.filename, np.dtype(dtype), 'r',
+                         self.start + offset, shape).view(np.ndarray)
+
+
+def dump(obj, filename):
+    """
+    Pickle `obj` into file `filename`; numeric arrays with at least
+    `MIN_MAPPED_SIZE` bytes are stored as raw blocks.
+    """
+    header = io.BytesIO()
+    pickler = _Pickler(header)
+    pickler.dump(obj)
+    header = header.getvalue()
+    start = _align(_PREFIX.size + len(header))
+    with open(filename, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for offset, arr in pickler.blocks:
+            f.seek(start + offset)
+            f.write(arr.data)
+
+
+def load(filename):
+    """
+    Load an object pickled by :obj:`dump`; its large arrays are read-only
+    arrays mapped from the file.
+    """
+    with open(filename, 'rb') as f:
+        magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError('{} is not a memory-mapped pickle'
+                             .format(filename))
+        if version > VERSION:
+            raise ValueError('Unsupported version of memory-mapped pickle: {}'
+                             .format(version))
+        header = io.BytesIO(f.read(header_len))
+    start = _align(_PREFIX.size + header_len)
+    return _Unpickler(header, filename, start).load()
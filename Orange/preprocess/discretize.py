@@ -37,6 +37,17 @@ class Discretizer(Transformation):
         else:
             return np.array([], dtype=int)
 
+    @classmethod
+    def transform_group(cls, transformations, columns):
+        if sp.issparse(columns) or not columns.size:
+            return super().transform_group(transformations, columns)
+        result = np.zeros(columns.shape)
+        for i, t in enumerate(transformations):
+            if len(t.points):
+                result[:, i] = np.digitize(columns[:, i], t.points)
+        result[np.isnan(columns)] = np.nan
+        return result
+
     @staticmethod
     def _fmt_interval(low, high, decimals):
         assert low is not None or high is not None
@@ -30,6 +30,13 @@ class ReplaceUnknowns(Transformation):
         else:
             return numpy.where(numpy.isnan(c), self.value, c)
 
+    @classmethod
+    def transform_group(cls, transformations, columns):
+        if issparse(columns):
+            return columns
+        values = numpy.array([t.value for t in transformations], dtype=float)
+        return numpy.where(numpy.isnan(columns), values, columns)
+
 
 class BaseImputeMethod:
     name = ""
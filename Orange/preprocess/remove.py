@@ -273,6 +273,9 @@ def sort_var_values(var):
 
 
 class Lookup(Lookup):
+    # Vectorized lookup in the base class also maps unknowns to unknowns
+    consistent_with_group_transform = True
+
     def transform(self, column):
         column = np.array(column, dtype=np.float64)
         mask = np.isnan(column)
@@ -1,3 +1,6 @@
+from collections import OrderedDict
+
+import numpy as np
 import scipy.sparse as sp
 
 from Orange.data import Instance, Table, Domain
@@ -8,6 +11,10 @@ class Transformation:
     Base class for simple transformations of individual variables. Derived
     classes are used in continuization, imputation, discretization...
     """
+    #: Set to `True` in a class that redefines `transform` without changing
+    #: the results of the inherited `transform_group`
+    consistent_with_group_transform = False
+
     def __init__(self, variable):
         """
         :param variable: The variable whose transformed value is returned.
@@ -46,6 +53,64 @@ class Transformation:
         raise NotImplementedError(
             "ColumnTransformations must implement method 'transform'.")
 
+    @classmethod
+    def transform_group(cls, transformations, columns):
+        """
+        Return the results of `transformations` (instances of this class)
+        as columns of a 2d array or a sparse matrix. The i-th column of
+        `columns` contains the values of the variable of the i-th
+        transformation.
+
+        Derived classes can override this method to compute all columns at
+        once. The default implementation calls `transform` for each column.
+        """
+        if sp.issparse(columns):
+            return sp.hstack([t.transform(columns[:, i])
+                              for i, t in enumerate(transformations)])
+        return np.column_stack([t.transform(columns[:, i])
+                                for i, t in enumerate(transformations)])
+
+    @classmethod
+    def supports_group_transform(cls):
+        """
+        Return `True` if the class overrides `transform_group` with a
+        vectorized implementation that is consistent with its `transform`,
+        that is, if `transform` is not redefined in a derived class, or the
+        class that redefines it sets `consistent_with_group_transform`.
+        """
+        def owner(name):
+            return next(c for c in cls.__mro__ if name in vars(c))
+
+        group_owner = owner("transform_group")
+        transform_owner = owner("transform")
+        consistent = vars(transform_owner).get(
+            "consistent_with_group_transform", False)
+        return group_owner is not Transformation and (
+            consistent or issubclass(group_owner, transform_owner))
+
+    @classmethod
+    def compute_group(cls, transformations, data):
+        """
+        Compute the values of `transformations` (instances of this class) on
+        `data` with `transform_group`. The values of all source variables
+        are extracted from the data in a single conversion.
+
+        :param transformations: transformations of primitive variables
+        :type transformations: list of Transformation
+        :param data: data
+        :type data: Orange.data.Table
+        :return: a 2d array or a sparse matrix with a column for each
+            transformation
+        """
+        variables = list(OrderedDict.fromkeys(t.variable
+                                              for t in transformations))
+        columns = Table.from_table(Domain(variables), data).X
+        positions = {var: i for i, var in enumerate(variables)}
+        indices = [positions[t.variable] for t in transformations]
+        if indices != list(range(len(variables))):
+            columns = columns[:, indices]
+        return cls.transform_group(transformations, columns)
+
 
 class Identity(Transformation):
     """Return an untransformed value of `c`.
@@ -73,6 +138,12 @@ class Indicator(Transformation):
     def transform(self, c):
         return c == self.value
 
+    @classmethod
+    def transform_group(cls, transformations, columns):
+        if sp.issparse(columns):
+            return super().transform_group(transformations, columns)
+        return columns == np.array([t.value for t in transformations])
+
 
 class Indicator1(Transformation):
     """
@@ -93,6 +164,13 @@ class Indicator1(Transformation):
     def transform(self, c):
         return (c == self.value) * 2 - 1
 
+    @classmethod
+    def transform_group(cls, transformations, columns):
+        if sp.issparse(columns):
+            return super().transform_group(transformations, columns)
+        return (columns == np.array([t.value for t in transformations])) \
+            * 2 - 1
+
 
 class Normalizer(Transformation):
     """
@@ -122,6 +200,14 @@ class Normalizer(Transformation):
         else:
             return (c - self.offset) * self.factor
 
+    @classmethod
+    def transform_group(cls, transformations, columns):
+        if sp.issparse(columns):
+            return super().transform_group(transformations, columns)
+        offsets = np.array([t.offset for t in transformations], dtype=float)
+        factors = np.array([t.factor for t in transformations], dtype=float)
+        return (columns - offsets) * factors
+
 
 class Lookup(Transformation):
     """
@@ -139,3 +225,20 @@ class Lookup(Transformation):
 
     def transform(self, c):
         return self.lookup_table[c]
+
+    @classmethod
+    def transform_group(cls, transformations, columns):
+        if sp.issparse(columns):
+            return super().transform_group(transformations, columns)
+        try:
+            tables = [np.asarray(t.lookup_table, dtype=float)
+                      for t in transformations]
+        except (TypeError, ValueError):  # non-numeric lookup tables
+            return super().transform_group(transformations, columns)
+        lookup = np.full((len(tables), max(map(len, tables))), np.nan)
+        for i, table in enumerate(tables):
+            lookup[i, :len(table)] = table
+        mask = np.isnan(columns)
+        indices = np.where(mask, 0, columns).astype(int)
+        values = lookup[np.arange(len(tables)), indices]
+        return np.where(mask, np.nan, values)
@@ -37,6 +37,33 @@ class LinearRegressionLearner(SklLearner, _FeatureScorerMixin):
         model = super().fit(X, Y, W)
         return LinearModel(model.skl_model)
 
+    def leave_one_out(self, data):
+        """Leave-one-out predictions of least squares and ridge regression,
+        computed from residuals and the diagonal of the hat matrix"""
+        if self.__wraps__ is skl_linear_model.LinearRegression:
+            alpha = 0
+        elif self.__wraps__ is skl_linear_model.Ridge and \
+                not self.params["normalize"]:
+            alpha = self.params["alpha"]
+        else:
+            return None
+        data = self._leave_one_out_data(data)
+        if data is None:
+            return None
+        X, y = data.X, data.Y
+        penalty = np.full(X.shape[1], alpha, dtype=float)
+        if self.params.get("fit_intercept", True):
+            # Intercept is not penalized
+            X = np.hstack((np.ones((len(X), 1)), X))
+            penalty = np.hstack(([0], penalty))
+        inverse = np.linalg.pinv(X.T.dot(X) + np.diag(penalty))
+        leverage = np.einsum("ij,jk,ik->i", X, inverse, X)
+        if np.any(leverage > 1 - 1e-8):
+            # The instance alone determines some of the coefficients
+            return None
+        residuals = y - X.dot(inverse.dot(X.T.dot(y)))
+        return y - residuals / (1 - leverage), None
+
 
 class RidgeRegressionLearner(LinearRegressionLearner):
     __wraps__ = skl_linear_model.Ridge
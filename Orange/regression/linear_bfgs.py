@@ -1,6 +1,7 @@
 import numpy as np
 from scipy.optimize import fmin_l_bfgs_b
 
+from Orange.misc import minibatch
 from Orange.regression import Learner, Model
 from Orange.preprocess import (RemoveNaNClasses, Normalize, Continuize,
                                Impute, RemoveNaNColumns)
@@ -33,6 +34,28 @@ class LinearRegressionLearner(Learner):
         - remove columns with all values as NaN
         - replace NaN values with suitable values
 
+    solver : str, optional (default="lbfgs")
+        "lbfgs" minimizes the cost on the entire data with L-BFGS; "sgd" and
+        "adam" use mini-batch gradient descent (see
+        :obj:`Orange.misc.minibatch.minimize`), which takes only a batch of
+        rows at a time and can thus train on sparse data without
+        densifying it, or on memory-mapped data larger than the memory.
+
+    batch_size : int, optional (default=100)
+        The number of rows in a mini-batch.
+
+    n_epochs : int, optional (default=10)
+        The number of passes over the data with mini-batch solvers.
+
+    learning_rate : float, optional (default=0.001)
+        The step size of mini-batch solvers.
+
+    shuffle : bool, optional (default=True)
+        Whether to shuffle rows in each epoch of mini-batch solvers.
+
+    random_state : int, optional (default=None)
+        Seed for shuffling.
+
     fmin_args : dict, optional
         Parameters for L-BFGS algorithm.
     """
@@ -57,21 +80,33 @@ class LinearRegressionLearner(Learner):
                      Impute(),
                      RemoveNaNColumns()]
 
-    def __init__(self, lambda_=1.0, preprocessors=None, **fmin_args):
+    def __init__(self, lambda_=1.0, preprocessors=None, solver="lbfgs",
+                 batch_size=100, n_epochs=10, learning_rate=0.001,
+                 shuffle=True, random_state=None, **fmin_args):
 
         super().__init__(preprocessors=preprocessors)
+        if solver != "lbfgs" and solver not in minibatch.SOLVERS:
+            raise ValueError("Unknown solver '{}'".format(solver))
         self.lambda_ = lambda_
+        self.solver = solver
+        self.batch_size = batch_size
+        self.n_epochs = n_epochs
+        self.learning_rate = learning_rate
+        self.shuffle = shuffle
+        self.random_state = random_state
         self.fmin_args = fmin_args
 
-    def cost_grad(self, theta, X, y):
+    def cost_grad(self, theta, X, y, lambda_=None):
+        if lambda_ is None:
+            lambda_ = self.lambda_
         t = X.dot(theta) - y
 
         cost = t.dot(t)
-        cost += self.lambda_ * theta.dot(theta)
+        cost += lambda_ * theta.dot(theta)
         cost /= 2.0 * X.shape[0]
 
         grad = X.T.dot(t)
-        grad += self.lambda_ * theta
+        grad += lambda_ * theta
         grad /= X.shape[0]
 
         return cost, grad
@@ -86,8 +121,22 @@ class LinearRegressionLearner(Learner):
                              'unknown values')
 
         theta = np.zeros(X.shape[1])
-        theta, cost, ret = fmin_l_bfgs_b(self.cost_grad, theta,
-                                         args=(X, Y.ravel()), **self.fmin_args)
+        if self.solver == "lbfgs":
+            theta, cost, ret = fmin_l_bfgs_b(
+                self.cost_grad, theta, args=(X, Y.ravel()), **self.fmin_args)
+        else:
+            n_rows = X.shape[0]
+
+            def batch_cost_grad(theta, X_batch, y_batch):
+                # Regularization is divided among batches by their size
+                return self.cost_grad(
+                    theta, X_batch, y_batch,
+                    self.lambda_ * X_batch.shape[0] / n_rows)
+
+            theta = minibatch.minimize(
+                batch_cost_grad, theta, X, Y.ravel(), self.solver,
+                self.batch_size, self.n_epochs, self.learning_rate,
+                self.shuffle, self.random_state)
 
         return LinearRegressionModel(theta)
 
@@ -4,11 +4,15 @@ import numpy as np
 import sklearn.tree as skl_tree
 
 from Orange.tree import Node, DiscreteNode, MappedDiscreteNode, \
-    NumericNode, TreeModel
+    NumericNode, TreeModel, ForestLearner, candidate_attributes, sort_rows, \
+    partition_sorted
 from Orange.regression import SklLearner, SklModel, Learner
 from Orange.classification import _tree_scorers
 
-__all__ = ["SklTreeRegressionLearner", "TreeLearner"]
+__all__ = ["SklTreeRegressionLearner", "TreeLearner", "TreeForestLearner"]
+
+# Relative difference below which scores of attributes are considered equal
+SCORE_TOLERANCE = 1e-12
 
 
 class TreeLearner(Learner):
@@ -25,6 +29,11 @@ class TreeLearner(Learner):
 
     If the tree is not binary, it can contain zero-branches.
 
+    If several attributes have equal scores (up to rounding errors), the
+    first one is chosen. Columns are sorted once for the entire tree, so
+    scores are summed in a different order than in Orange 3.3; trees can
+    differ from those in nodes where attributes tie up to rounding errors.
+
     Args:
         binarize: if `True` the inducer will find optimal split into two
             subsets for values of discrete attributes. If `False` (default),
@@ -33,6 +42,10 @@ class TreeLearner(Learner):
         min_samples_split: the minimal nubmer of data instances that is split
             into subgroups
         max_depth: the maximal depth of the tree
+        max_features: the number of randomly chosen attributes considered
+            for each split (see :obj:`Orange.tree.candidate_attributes`);
+            all attributes if `None` (default)
+        random_state: the seed for choosing attributes
 
     Returns:
         instance of OrangeTreeModel
@@ -45,41 +58,53 @@ class TreeLearner(Learner):
     def __init__(
             self, *args,
             binarize=False, min_samples_leaf=1, min_samples_split=2,
-            max_depth=None, **kwargs):
+            max_depth=None, max_features=None, random_state=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.binarize = binarize
         self.min_samples_leaf = min_samples_leaf
         self.min_samples_split = min_samples_split
         self.max_depth = max_depth
+        self.max_features = max_features
+        self.random_state = random_state
 
-    def _select_attr(self, data):
+    def _select_attr(self, data, rows, sorted_rows, random=None):
         """Select the attribute for the next split.
 
+        Args:
+            data (Table): training data
+            rows (np.ndarray): indices of data instances in the node
+            sorted_rows (dict): indices of instances in the node with known
+                values of continuous attributes, sorted by the values
+            random (np.random.RandomState): generator for choosing
+                attributes if `max_features` is set
+
         Returns:
-            tuple with an instance of Node and a numpy array indicating
-            the branch index for each data instance, or -1 if data instance
-            is dropped
+            tuple with an instance of Node, a numpy array indicating
+            the branch index for each data instance in `rows`, or -1 if data
+            instance is dropped, and the number of branches
         """
-        # Prevent false warnings by pylint
-        attr = attr_no = None
         REJECT_ATTRIBUTE = 0, None, None, 0
+        X, Y = data.X, data.Y
+        col_y = Y[rows]
 
-        def _score_disc():
+        def _score_disc(attr_no, attr):
             n_values = len(attr.values)
+            col_x = X[rows, attr_no]
             score = _tree_scorers.compute_grouped_MSE(
                 col_x, col_y, n_values, self.min_samples_leaf)
             # The score is already adjusted for missing attribute values, so
             # we don't do it here
             if score == 0:
                 return REJECT_ATTRIBUTE
-            branches = col_x.flatten()
+            branches = col_x
             branches[np.isnan(branches)] = -1
             return score, DiscreteNode(attr, attr_no, None), branches, n_values
 
-        def _score_disc_bin():
+        def _score_disc_bin(attr_no, attr):
             n_values = len(attr.values)
             if n_values == 2:
-                return _score_disc()
+                return _score_disc(attr_no, attr)
+            col_x = X[rows, attr_no]
             score, mapping = _tree_scorers.find_binarization_MSE(
                 col_x, col_y, n_values, self.min_samples_leaf)
             # The score is already adjusted for missing attribute values, so
@@ -87,62 +112,92 @@ class TreeLearner(Learner):
             if score == 0:
                 return REJECT_ATTRIBUTE
             mapping, branches = MappedDiscreteNode.branches_from_mapping(
-                data.X[:, attr_no], mapping, len(attr.values))
+                col_x, mapping, len(attr.values))
             node = MappedDiscreteNode(attr, attr_no, mapping, None)
             return score, node, branches, 2
 
-        def _score_cont():
+        def _score_cont(attr_no, attr):
             """Scoring for numeric attributes"""
-            nans = np.sum(np.isnan(col_x))
-            non_nans = len(col_x) - nans
-            arginds = np.argsort(col_x)[:non_nans]
+            arginds = sorted_rows[attr_no]
             score, cut = _tree_scorers.find_threshold_MSE(
-                col_x, col_y, arginds, self.min_samples_leaf)
+                X[:, attr_no], Y, arginds, self.min_samples_leaf)
             if score == 0:
-                return  REJECT_ATTRIBUTE
-            score *= non_nans / len(col_x)
-            branches = np.full(len(col_x), -1, dtype=int)
-            mask = ~np.isnan(col_x)
-            branches[mask] = (col_x[mask] > cut).astype(int)
+                return REJECT_ATTRIBUTE
+            score *= len(arginds) / len(rows)
             node = NumericNode(attr, attr_no, cut, None)
-            return score, node, branches, 2
+            # Branches are computed only for the selected attribute
+            return score, node, None, 2
 
         #######################################
         # The real _select_attr starts here
         domain = data.domain
-        col_y = data.Y
         best_score, *best_res = REJECT_ATTRIBUTE
         best_res = [Node(None, 0, None), ] + best_res[1:]
         disc_scorer = _score_disc_bin if self.binarize else _score_disc
-        for attr_no, attr in enumerate(domain.attributes):
-            col_x = data[:, attr_no].X.reshape((len(data),))
-            sc, *res = disc_scorer() if attr.is_discrete else _score_cont()
-            if res[0] is not None and sc > best_score:
+        for attr_no in candidate_attributes(
+                len(domain.attributes), self.max_features, random):
+            attr = domain.attributes[attr_no]
+            sc, *res = disc_scorer(attr_no, attr) if attr.is_discrete \
+                else _score_cont(attr_no, attr)
+            # Scores of presorted columns are summed in a different order
+            # than on the node's rows; the tolerance keeps the first of
+            # attributes with (mathematically) equal scores
+            if res[0] is not None and \
+                    sc > best_score + SCORE_TOLERANCE * abs(best_score):
                 best_score, best_res = sc, res
+        node = best_res[0]
+        if isinstance(node, NumericNode):
+            col_x = X[rows, node.attr_idx]
+            branches = np.full(len(rows), -1, dtype=int)
+            mask = ~np.isnan(col_x)
+            branches[mask] = (col_x[mask] > node.threshold).astype(int)
+            best_res[1] = branches
         return best_res
 
-    def build_tree(self, data, active_inst, level=1):
+    def build_tree(self, data, active_inst, level=1, sorted_rows=None,
+                   random=None):
         """Induce a tree from the given data
 
+        The tree is induced from indices of instances, like in
+        :obj:`Orange.classification.TreeLearner`.
+
         Returns:
             root node (Node)"""
-        node_insts = data[active_inst]
-        if len(node_insts) < self.min_samples_leaf:
+        if len(active_inst) < self.min_samples_leaf:
             return None
-        if len(node_insts) < self.min_samples_split or \
+        if sorted_rows is None:
+            sorted_rows = sort_rows(data, active_inst)
+        if len(active_inst) < self.min_samples_split or \
                 self.max_depth is not None and level > self.max_depth:
             node, branches, n_children = Node(None, None, None), None, 0
         else:
-            node, branches, n_children = self._select_attr(node_insts)
-        mean, var = np.mean(node_insts.Y), np.var(node_insts.Y)
+            node, branches, n_children = self._select_attr(
+                data, active_inst, sorted_rows, random)
+        col_y = data.Y[active_inst]
+        mean, var = np.mean(col_y), np.var(col_y)
         node.value = np.array([mean, 1 if np.isnan(var) else var])
         node.subset = active_inst
         if branches is not None:
+            child_sorted = partition_sorted(
+                data, active_inst, branches, n_children, sorted_rows)
+            sorted_rows.clear()
             node.children = [
-                self.build_tree(data, active_inst[branches == br], level + 1)
+                self.build_tree(data, active_inst[branches == br], level + 1,
+                                child_sorted[br], random)
                 for br in range(n_children)]
         return node
 
+    def build_root(self, data, active_inst):
+        """Induce a tree from the given instances (indices into `data`,
+        which may repeat) and return its root"""
+        root = self.build_tree(
+            data, active_inst,
+            random=np.random.RandomState(self.random_state))
+        if root is None:
+            root = Node(None, 0, np.array([0., 0.]))
+        root.subset = active_inst
+        return root
+
     def fit_storage(self, data):
         if self.binarize and any(
                 attr.is_discrete and len(attr.values) > self.MAX_BINARIZATION
@@ -154,12 +209,49 @@ class TreeLearner(Learner):
                              format(self.MAX_BINARIZATION))
 
         active_inst = np.nonzero(~np.isnan(data.Y))[0].astype(np.int32)
-        root = self.build_tree(data, active_inst)
-        if root is None:
-            root = Node(None, 0, np.array([0., 0.]))
-        root.subset = active_inst
-        model = TreeModel(data, root)
-        return model
+        return TreeModel(data, self.build_root(data, active_inst))
+
+
+class TreeForestLearner(ForestLearner, Learner):
+    """
+    Random forest of regression trees induced by :obj:`TreeLearner`.
+
+    The model averages the values predicted by trees, which are instances
+    of :obj:`Orange.tree.TreeModel` and can be shown in tree visualizations.
+    Arguments are described in :obj:`Orange.tree.ForestLearner` and
+    :obj:`TreeLearner`.
+    """
+    name = 'tree forest'
+
+    def __init__(self, n_estimators=10, max_features="sqrt", bootstrap=True,
+                 binarize=False, max_depth=None, min_samples_leaf=1,
+                 min_samples_split=2, random_state=0, n_jobs=1,
+                 preprocessors=None):
+        super().__init__(n_estimators=n_estimators,
+                         max_features=max_features, bootstrap=bootstrap,
+                         random_state=random_state, n_jobs=n_jobs,
+                         preprocessors=preprocessors)
+        self.binarize = binarize
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.min_samples_split = min_samples_split
+
+    def tree_learner(self, random_state):
+        return TreeLearner(
+            binarize=self.binarize, max_depth=self.max_depth,
+            min_samples_leaf=self.min_samples_leaf,
+            min_samples_split=self.min_samples_split,
+            max_features=self.max_features, random_state=random_state)
+
+    def fit_storage(self, data):
+        if self.binarize and any(
+                attr.is_discrete and
+                len(attr.values) > TreeLearner.MAX_BINARIZATION
+                for attr in data.domain.attributes):
+            raise ValueError("Exhaustive binarization does not handle "
+                             "attributes with more than {} values".
+                             format(TreeLearner.MAX_BINARIZATION))
+        return super().fit_storage(data)
 
 
 class SklTreeRegressor(SklModel):
@@ -1,9 +1,15 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 import unittest
+from unittest.mock import Mock
 
-from Orange.base import SklLearner, Learner
-from Orange.preprocess import Discretize, Randomize
+import numpy as np
+
+from Orange.base import SklLearner, Learner, Model, reuse_preprocessing
+from Orange.classification import (LogisticRegressionLearner,
+                                   NaiveBayesLearner, SimpleTreeLearner)
+from Orange.data import Table, Domain, ContinuousVariable, Value
+from Orange.preprocess import Discretize, Randomize, Continuize
 from Orange.regression import LinearRegressionLearner
 
 
@@ -69,6 +75,132 @@ class TestLearner(unittest.TestCase):
             'Preprocessors should be able to be passed in as single object '
             'as well as an iterable object')
 
+    def test_reuse_preprocessing(self):
+        data, data2 = Table("iris"), Table("iris")
+        disc, rand = Discretize(), Randomize()
+        pp1 = Mock(side_effect=disc)
+        pp2 = Mock(side_effect=rand)
+        learner1 = DummyLearner(preprocessors=(pp1, pp2))
+        learner2 = DummyLearner(preprocessors=(pp1, pp2))
+        learner3 = DummyLearner(preprocessors=(pp1, ))
+
+        with reuse_preprocessing():
+            pdata = learner1.preprocess(data)
+            self.assertIs(learner2.preprocess(data), pdata)
+            self.assertIsNot(learner2.preprocess(data2), pdata)
+            learner3.preprocess(data)
+        self.assertEqual(pp1.call_count, 2)
+        self.assertEqual(pp2.call_count, 2)
+
+        self.assertIsNot(learner1.preprocess(data), pdata)
+        self.assertEqual(pp1.call_count, 3)
+
+    def test_preprocessing_cache(self):
+        data, data2 = Table("iris"), Table("iris")
+        pp1 = Mock(side_effect=Discretize())
+        pp2 = Mock(side_effect=Randomize())
+        learner1 = DummyLearner(preprocessors=(pp1, pp2))
+        learner2 = DummyLearner(preprocessors=(pp1, pp2))
+        learner3 = DummyLearner(preprocessors=(pp2, pp1))
+
+        Learner.enable_preprocessing_cache()
+        try:
+            pdata = learner1.preprocess(data)
+            self.assertIs(learner2.preprocess(data), pdata)
+            # tables with the same content share the results
+            self.assertIs(learner1.preprocess(data2), pdata)
+            self.assertEqual(pp1.call_count, 1)
+            self.assertIsNot(learner3.preprocess(data), pdata)
+            self.assertEqual(pp1.call_count, 2)
+
+            data2.X[0, 0] = 42
+            self.assertIsNot(learner1.preprocess(data2), pdata)
+            self.assertEqual(pp1.call_count, 3)
+
+            Learner.invalidate_preprocessing_cache(data)
+            self.assertIsNot(learner1.preprocess(data), pdata)
+            self.assertIs(learner1.preprocess(data2),
+                          learner2.preprocess(data2))
+            self.assertEqual(pp1.call_count, 4)
+
+            Learner.invalidate_preprocessing_cache()
+            learner1.preprocess(data2)
+            self.assertEqual(pp1.call_count, 5)
+
+            # results that exceed the budget are not kept
+            Learner.enable_preprocessing_cache(max_size=100)
+            learner1.preprocess(data)
+            learner1.preprocess(data)
+            self.assertEqual(pp1.call_count, 7)
+        finally:
+            Learner.disable_preprocessing_cache()
+        learner1.preprocess(data)
+        self.assertEqual(pp1.call_count, 8)
+
+
+class TestPredictionPlan(unittest.TestCase):
+    def assertSamePredictions(self, model, plan, data):
+        for ret in (Model.Value, Model.Probs):
+            np.testing.assert_equal(plan.predict(data.X, ret), model(data, ret))
+            for inst in data[:5]:
+                for row in (inst, list(inst)):
+                    np.testing.assert_equal(
+                        np.asarray(plan.predict_instance(row, ret), float),
+                        model(inst, ret)[0])
+            batches = list(plan.iter_predict(iter(data[:7]), ret,
+                                             batch_size=3))
+            self.assertEqual(len(batches), 7)
+            np.testing.assert_almost_equal(np.array(batches, dtype=float),
+                                           model(data[:7], ret))
+        value, probs = plan.predict_instance(data[0], Model.ValueProbs)
+        self.assertIsInstance(value, Value)
+        self.assertIs(value.variable, model.domain.class_var)
+        self.assertEqual(float(value), model(data[0])[0])
+        np.testing.assert_equal(probs, model(data[0], Model.Probs)[0])
+
+    def test_same_predictions(self):
+        for data in (Table("heart_disease"), Table("titanic")):
+            for learner in (LogisticRegressionLearner(), NaiveBayesLearner(),
+                            SimpleTreeLearner()):
+                model = learner(data)
+                self.assertSamePredictions(model, model.prediction_plan(),
+                                           data)
+
+    def test_conversion(self):
+        data = Table("heart_disease")
+        plan = LogisticRegressionLearner()(data).prediction_plan()
+        self.assertIs(plan.domain, data.domain)
+        self.assertGreater(len(plan._levels), 0)
+        np.testing.assert_equal(
+            plan.transform(data.X),
+            Table.from_table(plan.model.domain, data).X)
+        self.assertRaises(ValueError, plan.predict, data.X[:, 1:])
+
+    def test_computed_variables(self):
+        iris = Table("iris")
+        total = ContinuousVariable(
+            "total", compute_value=lambda data: data.X[:, :2].sum(axis=1))
+        domain = Domain([total, iris.domain[2]], iris.domain.class_var)
+        model = LogisticRegressionLearner()(Table.from_table(domain, iris))
+        plan = model.prediction_plan(iris.domain)
+        self.assertEqual(plan._computed, [total])
+        self.assertSamePredictions(model, plan, iris)
+
+    def test_refuse_class_and_metas(self):
+        iris = Table("iris")
+        attrs, class_var = iris.domain.attributes, iris.domain.class_var
+        model = LogisticRegressionLearner()(iris)
+        for domain in (Domain(attrs[:3], attrs[3]),
+                       Domain(attrs[:3], metas=[attrs[3]])):
+            self.assertRaises(ValueError, model.prediction_plan, domain)
+
+        # attributes computed from the class variable
+        data = Continuize()(Table.from_table(
+            Domain(attrs[:3] + (class_var,), attrs[3]), iris))
+        model = LinearRegressionLearner()(data)
+        self.assertRaises(ValueError, model.prediction_plan, iris.domain)
+        model.prediction_plan(data.domain)
+
 
 class TestSklLearner(unittest.TestCase):
     def test_sklearn_supports_weights(self):
@@ -3,13 +3,16 @@
 
 import unittest
 import numpy as np
+import sklearn.metrics as skl_metrics
 
 from Orange.data import DiscreteVariable, Domain
 from Orange.data import Table
 from Orange.classification import LogisticRegressionLearner, SklTreeLearner, NaiveBayesLearner,\
                                   MajorityLearner
 from Orange.evaluation import AUC, CA, Results, Recall, \
-    Precision, TestOnTrainingData, scoring, LogLoss, F1, CrossValidation
+    Precision, TestOnTrainingData, scoring, LogLoss, F1, CrossValidation, \
+    MSE, bootstrap_ci
+from Orange.regression import LinearRegressionLearner
 from Orange.preprocess import discretize, Discretize
 
 
@@ -136,6 +139,154 @@ class TestAUC(unittest.TestCase):
         return AUC(results)[0]
 
 
+class TestVectorizedScores(unittest.TestCase):
+    def _random_results(self, nclasses, random):
+        nrows, nmethods = 97, 4
+        actual = np.arange(nrows) % nclasses
+        random.shuffle(actual)
+        predicted = random.randint(nclasses, size=(nmethods, nrows))
+        predicted[0] = actual
+        probabilities = random.rand(nmethods, nrows, nclasses)
+        probabilities /= np.sum(probabilities, axis=2)[:, :, None]
+        results = Results(
+            domain=Domain([], DiscreteVariable("y", values="01234"[:nclasses])),
+            actual=actual.astype(float))
+        results.predicted = predicted.astype(float)
+        results.probabilities = probabilities
+        return results
+
+    def assert_scores(self, scores, function, iterable):
+        np.testing.assert_almost_equal(
+            scores, [function(*args) for args in iterable])
+
+    def test_compare_with_sklearn(self):
+        random = np.random.RandomState(0)
+        for nclasses in (2, 3, 5):
+            results = self._random_results(nclasses, random)
+            actual = results.actual
+            pairs = [(actual, predicted) for predicted in results.predicted]
+            self.assert_scores(CA(results), skl_metrics.accuracy_score, pairs)
+            self.assert_scores(
+                Precision(results),
+                lambda y, p: skl_metrics.precision_score(
+                    y, p, average="weighted"), pairs)
+            self.assert_scores(
+                Recall(results),
+                lambda y, p: skl_metrics.recall_score(
+                    y, p, average="weighted"), pairs)
+            self.assert_scores(
+                LogLoss(results), skl_metrics.log_loss,
+                [(actual, probs) for probs in results.probabilities])
+            if nclasses == 2:
+                self.assert_scores(F1(results), skl_metrics.f1_score, pairs)
+                self.assert_scores(AUC(results), skl_metrics.roc_auc_score,
+                                   pairs)
+            else:
+                self.assert_scores(
+                    F1(results),
+                    lambda y, p: skl_metrics.f1_score(
+                        y, p, average="weighted"), pairs)
+                self.assert_scores(
+                    AUC(results, target=1), skl_metrics.roc_auc_score,
+                    [(actual == 1, probs[:, 1])
+                     for probs in results.probabilities])
+
+    def test_auc_ties(self):
+        results = Results(
+            domain=Domain([], DiscreteVariable("y", values="01")),
+            actual=np.array([0, 0, 1, 1, 0, 1], dtype=float))
+        results.predicted = np.array([[0, 1, 1, 1, 0, 1],
+                                      [1, 1, 1, 1, 1, 1]], dtype=float)
+        np.testing.assert_almost_equal(
+            AUC(results),
+            [skl_metrics.roc_auc_score(results.actual, predicted)
+             for predicted in results.predicted])
+
+    def test_auc_single_class(self):
+        results = Results(
+            domain=Domain([], DiscreteVariable("y", values="01")),
+            actual=np.zeros(5))
+        results.predicted = np.zeros((1, 5))
+        self.assertRaises(ValueError, AUC, results)
+
+    def test_scores_by_folds(self):
+        data = Table("iris")
+        learners = [LogisticRegressionLearner(), MajorityLearner()]
+        results = CrossValidation(data, learners, k=5)
+        for score in (CA(), LogLoss(), AUC()):
+            np.testing.assert_almost_equal(
+                score.scores_by_folds(results),
+                [score.compute_score(results.get_fold(fold))
+                 for fold in range(5)])
+
+    def test_scores_by_folds_options(self):
+        data = Table("iris")
+        learners = [LogisticRegressionLearner(), MajorityLearner()]
+        results = CrossValidation(data, learners, k=5)
+        weights = np.arange(1, len(data) + 1)
+        score = LogLoss()
+        for kwargs in ({"normalize": False},
+                       {"sample_weight": weights},
+                       {"normalize": False, "sample_weight": weights},
+                       {"eps": 0.01}):
+            expected = []
+            for fold, rows in enumerate(results.folds):
+                fold_kwargs = dict(kwargs)
+                if "sample_weight" in kwargs:
+                    fold_kwargs["sample_weight"] = weights[rows]
+                expected.append(score.compute_score(results.get_fold(fold),
+                                                    **fold_kwargs))
+            np.testing.assert_almost_equal(
+                score.scores_by_folds(results, **kwargs), expected)
+        low, high = bootstrap_ci(results, score, n_resamples=20,
+                                 sample_weight=weights)
+        self.assertTrue(np.all(low <= high))
+
+
+class TestBootstrapCI(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.iris = Table("iris")
+
+    def test_interval(self):
+        learners = [LogisticRegressionLearner(), MajorityLearner()]
+        results = CrossValidation(self.iris, learners, k=5)
+        for score in (CA, AUC, F1):
+            scores = score(results)
+            low, high = bootstrap_ci(results, score, n_resamples=200)
+            self.assertEqual(low.shape, (2, ))
+            self.assertTrue(np.all(low <= high))
+            self.assertTrue(np.all(low <= scores + 0.02))
+            self.assertTrue(np.all(scores - 0.02 <= high))
+        low, high = bootstrap_ci(results, CA, n_resamples=200)
+        self.assertGreater(low[0], high[1])
+
+    def test_reproducible(self):
+        results = TestOnTrainingData(self.iris, [NaiveBayesLearner()])
+        ci1 = bootstrap_ci(results, CA, n_resamples=50, random_state=1)
+        ci2 = bootstrap_ci(results, CA(), n_resamples=50, random_state=1)
+        np.testing.assert_equal(ci1, ci2)
+
+    def test_average_scores_match_resampled_results(self):
+        results = CrossValidation(Table("housing"),
+                                  [LinearRegressionLearner()], k=3)
+        fast = bootstrap_ci(results, MSE, n_resamples=30)
+
+        class SlowMSE(MSE):
+            def instance_scores(self, results):
+                return None
+
+        slow = bootstrap_ci(results, SlowMSE, n_resamples=30)
+        np.testing.assert_almost_equal(fast, slow)
+
+    def test_narrower_with_lower_confidence(self):
+        results = TestOnTrainingData(self.iris, [NaiveBayesLearner()])
+        low95, high95 = bootstrap_ci(results, CA, alpha=0.05)
+        low50, high50 = bootstrap_ci(results, CA, alpha=0.5)
+        self.assertLessEqual(low95[0], low50[0])
+        self.assertGreaterEqual(high95[0], high50[0])
+
+
 class TestComputeCD(unittest.TestCase):
     def test_compute_CD(self):
         avranks = [1.9, 3.2, 2.8, 3.3]
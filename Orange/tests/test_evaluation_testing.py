@@ -1,15 +1,24 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import os
+import shutil
+import tempfile
 import unittest
 import multiprocessing as mp
+from unittest.mock import Mock, patch
+
 import numpy as np
 
-from Orange.classification import NaiveBayesLearner, MajorityLearner
-from Orange.regression import LinearRegressionLearner, MeanLearner
+from Orange.classification import NaiveBayesLearner, MajorityLearner, \
+    LogisticRegressionLearner, KNNLearner
+from Orange.regression import LinearRegressionLearner, MeanLearner, \
+    RidgeRegressionLearner, LassoRegressionLearner, KNNRegressionLearner
 from Orange.data import Table
 from Orange.evaluation import (Results, CrossValidation, LeaveOneOut, TestOnTrainingData,
-                               TestOnTestData, ShuffleSplit, sample, RMSE)
+                               TestOnTestData, ShuffleSplit, sample, RMSE,
+                               EvaluationCache, ResultsStorage,
+                               TopKProbabilities, CA, LogLoss)
 from Orange.preprocess import discretize, preprocess
 from Orange.util import OrangeWarning
 
@@ -270,6 +279,32 @@ class TestCrossValidation(TestSampling):
                          CrossValidation, self.iris, [_ParameterTuningLearner()], k=2, n_jobs=3)
         proc.daemon = was_daemon
 
+    def test_shared_memory(self):
+        data = Table('iris')
+        data = Table.from_table_rows(data, np.tile(np.arange(len(data)), 40))
+        learners = [NaiveBayesLearner(), MajorityLearner()]
+        res = CrossValidation(data, learners, k=3, store_models=True)
+        shared = CrossValidation(data, learners, k=3, store_models=True,
+                                 n_jobs=2, shared_memory=True)
+        np.testing.assert_equal(shared.row_indices, res.row_indices)
+        np.testing.assert_equal(shared.predicted, res.predicted)
+        np.testing.assert_equal(shared.probabilities, res.probabilities)
+        self.assertEqual(shared.models.shape, (3, 2))
+        self.assertEqual(shared.failed, [False, False])
+
+    def test_shared_preprocessing(self):
+        pp = Mock(side_effect=preprocess.Continuize())
+        learners = [LogisticRegressionLearner(preprocessors=[pp]),
+                    MajorityLearner(preprocessors=[pp]),
+                    NaiveBayesLearner()]
+        res = CrossValidation(self.iris, learners, k=3)
+        self.assertEqual(pp.call_count, 3)
+        self.assertEqual(res.failed, [False] * 3)
+
+        res2 = CrossValidation(
+            self.iris, [LogisticRegressionLearner(preprocessors=[pp])], k=3)
+        np.testing.assert_equal(res.predicted[0], res2.predicted[0])
+
 class TestLeaveOneOut(TestSampling):
     def test_results(self):
         nrows = self.nrows
@@ -348,11 +383,71 @@ class TestLeaveOneOut(TestSampling):
         self.run_test_failed(LeaveOneOut, 100)
 
     def test_callback(self):
-        self.run_test_callback(LeaveOneOut, self._callback_values(2 * self.nrows))
+        with patch.object(LeaveOneOut, "_fit_shortcut", return_value=False):
+            self.run_test_callback(LeaveOneOut,
+                                   self._callback_values(2 * self.nrows))
+        self.run_test_callback(LeaveOneOut, [1])
 
     def test_preprocessor(self):
         self.run_test_preprocessor(LeaveOneOut, [149] * 150)
 
+    @staticmethod
+    def _without_shortcuts(data, learners):
+        with patch.object(LeaveOneOut, "_fit_shortcut", return_value=False):
+            return LeaveOneOut(data, learners)
+
+    def test_shortcuts(self):
+        titanic = Table("titanic")[::10]
+        heart = Table("heart_disease")
+        housing = Table("housing")[::5]
+        for data, learners in (
+                (titanic, [NaiveBayesLearner(), MajorityLearner()]),
+                (heart, [NaiveBayesLearner(), MajorityLearner()]),
+                (self.iris, [KNNLearner(),
+                             KNNLearner(n_neighbors=3, weights="distance")]),
+                # Equally distant neighbours at the k-th position
+                (Table("titanic")[::5], [KNNLearner()]),
+                (Table("zoo"), [KNNLearner(),
+                                KNNLearner(n_neighbors=3, weights="distance")]),
+                (housing, [LinearRegressionLearner(),
+                           RidgeRegressionLearner(alpha=2),
+                           KNNRegressionLearner()])):
+            res = LeaveOneOut(data, learners)
+            expected = self._without_shortcuts(data, learners)
+            np.testing.assert_almost_equal(res.predicted, expected.predicted)
+            if data.domain.has_discrete_class:
+                np.testing.assert_almost_equal(res.probabilities,
+                                               expected.probabilities)
+
+    def test_shortcut_with_weights(self):
+        data = Table("iris")[::3]
+        data.set_weights(np.arange(len(data)) % 3 + 1)
+        learners = [MajorityLearner()]
+        res = LeaveOneOut(data, learners)
+        expected = self._without_shortcuts(data, learners)
+        np.testing.assert_equal(res.predicted, expected.predicted)
+        np.testing.assert_equal(res.probabilities, expected.probabilities)
+
+    def test_shortcut_is_used(self):
+        learner = MajorityLearner()
+        learner.fit_storage = Mock(side_effect=learner.fit_storage)
+        LeaveOneOut(self.iris, [learner])
+        learner.fit_storage.assert_not_called()
+
+        res = LeaveOneOut(self.iris, [learner], store_models=True)
+        self.assertEqual(learner.fit_storage.call_count, len(self.iris))
+        self.assertEqual(len(res.models), len(self.iris))
+
+    def test_shortcut_fallback(self):
+        # Data with missing values: default preprocessors depend on folds
+        data = Table("heart_disease")[80:100]
+        learner = KNNLearner()
+        self.assertIsNone(learner.leave_one_out(data))
+        learner = NaiveBayesLearner(preprocessors=[])
+        self.assertIsNone(learner.leave_one_out(data))
+        self.assertIsNone(LassoRegressionLearner().leave_one_out(
+            Table("housing")))
+
 
 class TestTestOnTrainingData(TestSampling):
     def test_results(self):
@@ -603,3 +698,175 @@ class TestShuffleSplit(TestSampling):
             strata_samples.append(np.count_nonzero(train < 2 * n) == n)
 
         self.assertTrue(not all(strata_samples))
+
+
+class _CountingLearner(MajorityLearner):
+    calls = 0
+
+    def __init__(self, tag=None):
+        super().__init__()
+        self.tag = tag
+
+    def __call__(self, data):
+        _CountingLearner.calls += 1
+        return super().__call__(data)
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = EvaluationCache(self.directory)
+        self.iris = Table("iris")
+        _CountingLearner.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cached_learners_are_not_fitted(self):
+        learners = [_CountingLearner(), NaiveBayesLearner()]
+        res = CrossValidation(self.iris, learners, k=3, cache=self.cache)
+        self.assertEqual(_CountingLearner.calls, 3)
+
+        learners.append(_CountingLearner(tag=1))
+        res2 = CrossValidation(self.iris, learners, k=3, cache=self.cache)
+        self.assertEqual(_CountingLearner.calls, 6)
+        np.testing.assert_equal(res2.predicted[:2], res.predicted)
+        np.testing.assert_equal(res2.probabilities[:2], res.probabilities)
+
+        # Results are stored on disk
+        res3 = CrossValidation(self.iris, learners, k=3,
+                               cache=EvaluationCache(self.directory))
+        self.assertEqual(_CountingLearner.calls, 6)
+        np.testing.assert_equal(res3.predicted, res2.predicted)
+
+    def test_key_depends_on_data_and_folds(self):
+        learners = [_CountingLearner()]
+        CrossValidation(self.iris, learners, k=3, cache=self.cache)
+        CrossValidation(self.iris, learners, k=3, random_state=1,
+                        cache=self.cache)
+        self.assertEqual(_CountingLearner.calls, 6)
+        CrossValidation(self.iris[:100], learners, k=3, cache=self.cache)
+        self.assertEqual(_CountingLearner.calls, 9)
+        ShuffleSplit(self.iris, learners, n_resamples=3, cache=self.cache)
+        self.assertEqual(_CountingLearner.calls, 12)
+        ShuffleSplit(self.iris, learners, n_resamples=3, cache=self.cache)
+        self.assertEqual(_CountingLearner.calls, 12)
+
+    def test_regression(self):
+        housing = Table("housing")
+        learners = [LinearRegressionLearner(), MeanLearner()]
+        res = CrossValidation(housing, learners, k=3, cache=self.cache)
+        res2 = CrossValidation(housing, learners, k=3, cache=self.cache)
+        np.testing.assert_equal(res2.predicted, res.predicted)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        # The imputer fitted by the shared SklImpute is not a part of the key
+        imputers = [pp for pp in learners[0].active_preprocessors
+                    if isinstance(pp, preprocess.SklImpute)]
+        self.assertTrue(imputers)
+        self.assertTrue(all(hasattr(pp, "imputer") for pp in imputers))
+
+    def test_store_models(self):
+        learners = [_CountingLearner()]
+        CrossValidation(self.iris, learners, k=3, cache=self.cache)
+        res = CrossValidation(self.iris, learners, k=3, cache=self.cache,
+                              store_models=True)
+        self.assertEqual(_CountingLearner.calls, 6)
+        self.assertEqual(res.models.shape, (3, 1))
+
+    def test_failed_and_unpicklable_learners(self):
+        class LocalLearner(MajorityLearner):
+            pass
+
+        def fails(_):
+            raise SystemError("failing learner")
+
+        res = CrossValidation(self.iris, [LocalLearner(), fails],
+                              k=3, cache=self.cache)
+        self.assertTrue(res.failed[1])
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_size_limit(self):
+        learners = [_CountingLearner(tag=i) for i in range(3)]
+        CrossValidation(self.iris, learners, k=3, cache=self.cache)
+        size = sum(os.path.getsize(os.path.join(self.directory, name))
+                   for name in os.listdir(self.directory))
+        cache = EvaluationCache(self.directory, max_size=size * 2 // 3)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+        CrossValidation(self.iris, learners[2:], k=3, cache=cache)
+        self.assertEqual(_CountingLearner.calls, 9)
+        CrossValidation(self.iris, learners[:1], k=3, cache=cache)
+        self.assertEqual(_CountingLearner.calls, 12)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+        cache.clear()
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class TestResultsStorage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.zoo = Table("zoo")
+        cls.learners = [NaiveBayesLearner(), MajorityLearner()]
+        cls.res = CrossValidation(cls.zoo, cls.learners, k=3)
+
+    def test_dtype(self):
+        res = CrossValidation(self.zoo, self.learners, k=3,
+                              storage=ResultsStorage(np.float16))
+        self.assertEqual(res.probabilities.dtype, np.float16)
+        np.testing.assert_equal(res.predicted, self.res.predicted)
+        np.testing.assert_almost_equal(res.probabilities,
+                                       self.res.probabilities, 3)
+        np.testing.assert_almost_equal(LogLoss(res), LogLoss(self.res), 3)
+
+    def test_memory_mapped(self):
+        directory = tempfile.mkdtemp()
+        try:
+            res = CrossValidation(
+                self.zoo, self.learners, k=3,
+                storage=ResultsStorage(directory=directory))
+            self.assertIsInstance(res.predicted, np.memmap)
+            self.assertIsInstance(res.probabilities, np.memmap)
+            np.testing.assert_equal(res.probabilities, self.res.probabilities)
+            # Files are unnamed
+            self.assertEqual(os.listdir(directory), [])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_top_k(self):
+        res = CrossValidation(self.zoo, self.learners, k=3,
+                              storage=ResultsStorage(top_k=2))
+        probs = res.probabilities
+        self.assertIsInstance(probs, TopKProbabilities)
+        self.assertEqual(probs.shape, self.res.probabilities.shape)
+        self.assertEqual(probs.values.shape[2], 2)
+
+        dense = np.asarray(probs)
+        full = self.res.probabilities
+        # The two highest probabilities are kept, others are 0
+        np.testing.assert_equal(np.sort(dense, axis=2)[:, :, -2:],
+                                np.sort(full, axis=2)[:, :, -2:])
+        self.assertTrue(np.all(np.sum(dense != 0, axis=2) <= 2))
+        nonzero = dense != 0
+        np.testing.assert_equal(dense[nonzero], full[nonzero])
+
+        np.testing.assert_equal(probs[1], dense[1])
+        np.testing.assert_equal(probs[(1,), :, :], dense[(1,), :, :])
+        np.testing.assert_equal(probs[:, 5:10], dense[:, 5:10])
+        np.testing.assert_equal(probs[0, :, 3], dense[0, :, 3])
+        np.testing.assert_equal(probs[:, [1, 4]], dense[:, [1, 4]])
+        np.testing.assert_equal(list(probs), list(dense))
+
+        np.testing.assert_equal(res.predicted, self.res.predicted)
+        np.testing.assert_equal(CA(res), CA(self.res))
+        fold = res.get_fold(1)
+        np.testing.assert_equal(fold.probabilities,
+                                dense[:, res.folds[1]])
+        by_model = list(res.split_by_model())[1]
+        np.testing.assert_equal(by_model.probabilities, dense[(1,), :, :])
+
+    def test_top_k_not_smaller(self):
+        res = CrossValidation(self.zoo, self.learners, k=3,
+                              storage=ResultsStorage(top_k=10))
+        self.assertIsInstance(res.probabilities, np.ndarray)
+        self.assertRaises(ValueError, ResultsStorage, top_k=0)
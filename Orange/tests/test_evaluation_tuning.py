@@ -0,0 +1,149 @@
+# Test methods with long descriptive names can omit docstrings
+# pylint: disable=missing-docstring
+
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from scipy.stats import randint
+
+from Orange.classification import KNNLearner, LogisticRegressionLearner, \
+    SimpleTreeLearner
+from Orange.data import Table
+from Orange.evaluation import GridSearch, RandomSearch, CrossValidation, \
+    CA, R2, Results
+from Orange.preprocess import Continuize
+from Orange.regression import RidgeRegressionLearner
+
+
+class TestGridSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.iris = Table("iris")
+        cls.housing = Table("housing")
+
+    def test_best_configuration(self):
+        grid = {"C": [0.001, 0.1, 10]}
+        search = GridSearch(LogisticRegressionLearner(), grid)
+        model = search(self.iris)
+        self.assertEqual(search.configurations,
+                         [{"C": 0.001}, {"C": 0.1}, {"C": 10}])
+        self.assertEqual(search.scores.shape, (3, 5))
+
+        learners = [LogisticRegressionLearner(C=C) for C in grid["C"]]
+        res = CrossValidation(self.iris, learners, k=5, random_state=0)
+        np.testing.assert_almost_equal(
+            search.scores.mean(axis=1), CA(res))
+        self.assertEqual(search.best_params,
+                         search.configurations[np.argmax(CA(res))])
+        self.assertEqual(search.best_learner.params["C"],
+                         search.best_params["C"])
+        self.assertEqual(model.skl_model.C, search.best_params["C"])
+        self.assertEqual(len(model(self.iris)), len(self.iris))
+
+    def test_learner_is_not_changed(self):
+        learner = KNNLearner(n_neighbors=3)
+        GridSearch(learner, {"n_neighbors": [1, 7]})(self.iris)
+        self.assertEqual(learner.params["n_neighbors"], 3)
+
+    def test_regression(self):
+        search = GridSearch(RidgeRegressionLearner(),
+                            {"alpha": [0.1, 1, 1000000]}, k=3)
+        search(self.housing)
+        self.assertEqual(search.scores.shape, (3, 3))
+        self.assertLess(search.scores[2].mean(), search.scores[0].mean())
+        self.assertNotEqual(search.best_params, {"alpha": 1000000})
+
+        search = GridSearch(RidgeRegressionLearner(),
+                            {"alpha": [0.1, 1000000]}, k=3, scorer=R2())
+        search(self.housing)
+        self.assertEqual(search.best_params, {"alpha": 0.1})
+
+    def test_orange_learner(self):
+        search = GridSearch(SimpleTreeLearner(),
+                            {"max_depth": [1, 5], "min_instances": [2, 4]},
+                            k=3)
+        model = search(self.iris)
+        self.assertEqual(len(search.configurations), 4)
+        self.assertEqual(search.best_learner.max_depth,
+                         search.best_params["max_depth"])
+        self.assertEqual(len(model(self.iris)), len(self.iris))
+
+    def test_preprocessors_and_adequacy(self):
+        search = GridSearch(LogisticRegressionLearner(), {"C": [0.1, 10]},
+                            k=3, preprocessors=[Continuize()])
+        data = Table("heart_disease")
+        model = search(data)
+        self.assertIs(model.original_domain, data.domain)
+        self.assertEqual(len(model(data)), len(data))
+
+        search = GridSearch(LogisticRegressionLearner(), {"C": [0.1, 10]})
+        with self.assertRaises(ValueError) as cm:
+            search(self.housing)
+        self.assertEqual(cm.exception.args[0],
+                         LogisticRegressionLearner.learner_adequacy_err_msg)
+        self.assertIsNone(search.configurations)
+
+    def test_unknown_parameter(self):
+        for learner in (KNNLearner(), SimpleTreeLearner()):
+            search = GridSearch(learner, {"no_such_parameter": [1, 2]})
+            self.assertRaises(ValueError, search, self.iris)
+
+    def test_one_pool(self):
+        fits = []
+        fit = Results.fit
+
+        def counting_fit(self, *args, **kwargs):
+            fits.append(len(self.learners))
+            return fit(self, *args, **kwargs)
+
+        with patch.object(Results, "fit", counting_fit):
+            GridSearch(KNNLearner(), {"n_neighbors": [1, 3, 5]})(self.iris)
+        self.assertEqual(fits, [3])
+
+    def test_abandon(self):
+        grid = {"n_neighbors": [1, 5, 119]}
+        full = GridSearch(KNNLearner(), grid)
+        full(self.iris)
+        self.assertFalse(np.any(np.isnan(full.scores)))
+
+        search = GridSearch(KNNLearner(), grid, abandon=0.1)
+        search(self.iris)
+        self.assertEqual(search.best_params, full.best_params)
+        # the worst configuration is abandoned after the second fold
+        self.assertTrue(np.all(np.isnan(search.scores[2, 2:])))
+        np.testing.assert_almost_equal(search.scores[:, :2],
+                                       full.scores[:, :2])
+        completed = ~np.any(np.isnan(search.scores), axis=1)
+        np.testing.assert_almost_equal(search.scores[completed],
+                                       full.scores[completed])
+
+    def test_failed_configurations(self):
+        search = GridSearch(KNNLearner(), {"n_neighbors": [-1, 3]})
+        search(self.iris)
+        self.assertTrue(np.all(np.isnan(search.scores[0])))
+        self.assertEqual(search.best_params, {"n_neighbors": 3})
+
+        search = GridSearch(KNNLearner(), {"n_neighbors": [-1, -2]})
+        self.assertRaises(ValueError, search, self.iris)
+
+
+class TestRandomSearch(unittest.TestCase):
+    def test_random_search(self):
+        iris = Table("iris")
+        space = {"n_neighbors": randint(1, 30), "weights": ["uniform", "distance"]}
+        search = RandomSearch(KNNLearner(), space, n_iter=4, random_state=42)
+        model = search(iris)
+        self.assertEqual(len(search.configurations), 4)
+        self.assertEqual(search.scores.shape, (4, 5))
+        self.assertIn(search.best_params, search.configurations)
+        self.assertEqual(model.skl_model.n_neighbors,
+                         search.best_params["n_neighbors"])
+
+        search2 = RandomSearch(KNNLearner(), space, n_iter=4, random_state=42)
+        search2(iris)
+        self.assertEqual(search.configurations, search2.configurations)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,9 @@
 
 import unittest
 
+import numpy as np
+import scipy.sparse as sp
+
 from Orange.data import Table
 from Orange.evaluation import CrossValidation, RMSE
 from Orange.regression.linear_bfgs import LinearRegressionLearner
@@ -16,3 +19,18 @@ class TestLinearRegressionLearner(unittest.TestCase):
         results = CrossValidation(table, learners, k=3)
         rmse = RMSE(results)
         self.assertLess(rmse[0], rmse[1])
+
+    def test_minibatch(self):
+        data = LinearRegressionLearner().preprocess(Table('housing'))
+        lbfgs = LinearRegressionLearner(preprocessors=[])
+        rmse = RMSE(CrossValidation(data, [lbfgs], k=3))[0]
+        for solver in ("sgd", "adam"):
+            learner = LinearRegressionLearner(
+                preprocessors=[], solver=solver, batch_size=20, n_epochs=100,
+                learning_rate=0.01, random_state=0)
+            results = CrossValidation(data, [learner], k=3)
+            self.assertLess(RMSE(results)[0], 1.05 * rmse)
+
+            dense = learner.fit(data.X, data.Y, None)
+            sparse = learner.fit(sp.csr_matrix(data.X), data.Y, None)
+            np.testing.assert_almost_equal(dense.theta, sparse.theta)
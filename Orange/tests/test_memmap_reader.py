@@ -0,0 +1,122 @@
+# Test methods with long descriptive names can omit docstrings
+# pylint: disable=missing-docstring
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from Orange.data import Table, Domain, ContinuousVariable, StringVariable
+from Orange.data.io import MemmapReader, FileFormat
+
+
+class TestMemmapReader(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def _roundtrip(self, data):
+        filename = os.path.join(self.tempdir, "data.mmap")
+        data.save(filename)
+        return Table(filename)
+
+    def assert_tables_equal(self, table1, table2):
+        self.assertEqual(table1.domain, table2.domain)
+        for part in ("X", "_Y", "W", "ids"):
+            a, b = getattr(table1, part), getattr(table2, part)
+            if sp.issparse(a):
+                a, b = a.toarray(), b.toarray()
+            np.testing.assert_equal(a, b)
+        np.testing.assert_equal(table1.metas.astype(object),
+                                table2.metas.astype(object))
+
+    def test_registered(self):
+        self.assertIs(FileFormat.readers[".mmap"], MemmapReader)
+        self.assertIs(FileFormat.writers[".mmap"], MemmapReader)
+
+    def test_read_write(self):
+        for name in ("iris", "zoo", "housing", "heart_disease"):
+            data = Table(name)
+            loaded = self._roundtrip(data)
+            self.assert_tables_equal(data, loaded)
+            self.assertEqual(loaded.name, "data")
+
+    def test_arrays_are_mapped_read_only(self):
+        data = Table("iris")
+        loaded = self._roundtrip(data)
+        self.assertIsInstance(loaded.X.base, np.memmap)
+        self.assertFalse(loaded.X.flags.writeable)
+        with self.assertRaises(ValueError):
+            loaded.X[0, 0] = 42
+
+        loaded.ensure_copy()
+        self.assertTrue(loaded.is_copy())
+        loaded.X[0, 0] = 42
+        loaded.append(data[0])
+        self.assertEqual(len(loaded), len(data) + 1)
+        self.assertEqual(Table(loaded.__file__).X[0, 0], data.X[0, 0])
+
+    def test_weights_and_attributes(self):
+        data = Table("iris")
+        data.set_weights(np.arange(len(data)))
+        data.attributes = {"origin": "test"}
+        loaded = self._roundtrip(data)
+        self.assert_tables_equal(data, loaded)
+        self.assertEqual(loaded.attributes, {"origin": "test"})
+
+    def test_string_metas(self):
+        domain = Domain([ContinuousVariable("x")], None,
+                        [StringVariable("s"), ContinuousVariable("m")])
+        data = Table.from_numpy(domain, np.arange(3).reshape(3, 1), None,
+                                np.array([["a", 1], ["b", 2], ["", 3]],
+                                         dtype=object))
+        loaded = self._roundtrip(data)
+        self.assert_tables_equal(data, loaded)
+        self.assertEqual(loaded.metas.dtype, object)
+
+    def test_sparse(self):
+        X = sp.random(20, 30, density=0.1, format="csr", random_state=42)
+        data = Table.from_numpy(None, X)
+        loaded = self._roundtrip(data)
+        self.assertTrue(sp.isspmatrix_csr(loaded.X))
+        self.assert_tables_equal(data, loaded)
+
+    def test_sparse_ensure_copy(self):
+        X = sp.random(20, 30, density=0.1, format="csr", random_state=42)
+        data = Table.from_numpy(None, X)
+        loaded = self._roundtrip(data)
+        with self.assertRaises(ValueError):
+            loaded.X.data[0] = 5
+
+        loaded.ensure_copy()
+        for part in (loaded.X.data, loaded.X.indices, loaded.X.indptr):
+            self.assertNotIsInstance(part.base, np.memmap)
+            self.assertTrue(part.flags.writeable)
+        loaded.X.data[0] = 5
+        self.assertEqual(loaded.X.data[0], 5)
+        self.assertEqual(Table(loaded.__file__).X.data[0], X.data[0])
+
+        copied = self._roundtrip(data).copy()
+        copied.X.data[0] = 5
+        self.assertEqual(copied.X.data[0], 5)
+
+    def test_empty(self):
+        data = Table("iris")[:0]
+        loaded = self._roundtrip(data)
+        self.assertEqual(len(loaded), 0)
+        self.assertEqual(loaded.domain, data.domain)
+
+    def test_invalid_file(self):
+        filename = os.path.join(self.tempdir, "invalid.mmap")
+        with open(filename, "wb") as f:
+            f.write(b"not a table" * 10)
+        self.assertRaises(ValueError, MemmapReader(filename).read)
+
+
+if __name__ == "__main__":
+    unittest.main()
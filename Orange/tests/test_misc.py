@@ -1,6 +1,6 @@
 import unittest
 
-from Orange.misc.cache import memoize_method, single_cache
+from Orange.misc.cache import memoize_method, single_cache, LRUCache
 
 
 class Calculator:
@@ -28,3 +28,45 @@ class TestCache(unittest.TestCase):
         self.assertEqual(calc.my_sum(1, 2, 3, 4, 5), 15)
         # Make sure different args produce different results
         self.assertEqual(calc.my_sum(1, 2, 3, 4), 10)
+
+    def test_lru_cache(self):
+        cache = LRUCache(3)
+        cache["a"], cache["b"], cache["c"] = 1, 2, 3
+        self.assertEqual(cache["a"], 1)
+        cache["d"] = 4
+        self.assertEqual(cache.keys(), ["c", "a", "d"])
+        self.assertNotIn("b", cache)
+        self.assertIsNone(cache.get("b"))
+        self.assertRaises(KeyError, lambda: cache["b"])
+
+        cache.discard("c")
+        cache.discard("c")
+        self.assertEqual(cache.keys(), ["a", "d"])
+        cache.discard_if(lambda key: key == "d")
+        self.assertEqual(cache.keys(), ["a"])
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+    def test_lru_cache_sizeof(self):
+        cache = LRUCache(10, len)
+        cache["a"] = "1234"
+        cache["b"] = "1234"
+        self.assertEqual(cache.size, 8)
+        cache["a"] = "12"
+        self.assertEqual(cache.size, 6)
+        cache["c"] = "123456"
+        self.assertEqual(cache.keys(), ["a", "c"])
+        self.assertEqual(cache.size, 8)
+        # Items larger than the cache are not stored
+        cache["d"] = "12345678901"
+        self.assertNotIn("d", cache)
+        self.assertEqual(cache.size, 8)
+
+    def test_lru_cache_on_evict(self):
+        evicted = []
+        cache = LRUCache(2, on_evict=lambda *item: evicted.append(item))
+        cache["a"], cache["b"] = 1, 2
+        cache.discard("a")
+        cache["c"], cache["d"] = 3, 4
+        self.assertEqual(evicted, [("b", 2)])
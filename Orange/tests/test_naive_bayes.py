@@ -3,6 +3,8 @@
 
 import unittest
 
+import numpy as np
+
 from Orange.classification import NaiveBayesLearner
 from Orange.data import Table, Domain, DiscreteVariable, ContinuousVariable
 from Orange.evaluation import CrossValidation, CA
@@ -45,3 +47,38 @@ class TestNaiveBayesLearner(unittest.TestCase):
         self.assertEqual(model.domain.attributes, ())
         self.assertEqual(model(t[0]), 1)
         self.assertTrue(all(model(t) == 1))
+
+    def test_unknown_values_and_blocks(self):
+        data = Table('titanic')
+        model = self.learner(data)
+        X = data.X.copy()
+        X[::3, 0] = np.nan
+        X[::5, 2] = np.nan
+        _, probs = model(X, model.ValueProbs)
+
+        n_cls = len(model.class_freq)
+        class_prob = (model.class_freq + 1) / (len(data) + n_cls)
+        for x, prob in zip(X[:50], probs):
+            expected = np.log(class_prob)
+            for val, cont in zip(x, model.cont):
+                if not np.isnan(val):
+                    expected += np.log((cont[:, int(val)] + 1) /
+                                       (model.class_freq + cont.shape[1]))
+            expected = np.exp(expected)
+            np.testing.assert_almost_equal(prob, expected / expected.sum())
+
+        model.MAX_BLOCK_ELEMENTS = 10
+        np.testing.assert_almost_equal(model(X, model.ValueProbs)[1], probs)
+
+    def test_partial_fit(self):
+        for data in (Table('titanic'), Table('iris')):
+            model = self.learner(data)
+            updated = self.learner(data[::2]).partial_fit(data[1::2])
+            self.assertIsInstance(updated.class_freq, np.ndarray)
+            np.testing.assert_almost_equal(updated.class_freq,
+                                           model.class_freq)
+            if data.domain.has_continuous_attributes():
+                # Intervals are not recomputed
+                continue
+            np.testing.assert_almost_equal(
+                updated(data, updated.Probs), model(data, model.Probs))
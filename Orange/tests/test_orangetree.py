@@ -1,11 +1,16 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import os
+import pickle
+import tempfile
 import unittest
 
 import numpy as np
 
 from Orange.data import Table, Domain, DiscreteVariable, ContinuousVariable
+from Orange.classification import _tree_scorers
+from Orange.misc import mmap_pickle
 from Orange.classification.tree import \
     TreeModel, Node, DiscreteNode, MappedDiscreteNode, NumericNode
 
@@ -215,6 +220,43 @@ class TestClassifier(TestTree, unittest.TestCase):
         cls.blind_prediction = np.ones((1, 3)) / 3
         cls.prediction_on_0_1 = np.array([[0.5, 0.5, 0]])
 
+    def assert_same_trees(self, node1, node2):
+        self.assertIs(type(node1), type(node2))
+        if node1 is None:
+            return
+        self.assertEqual(node1.attr_idx, node2.attr_idx)
+        np.testing.assert_equal(node1.value, node2.value)
+        np.testing.assert_equal(node1.subset, node2.subset)
+        self.assertEqual(getattr(node1, "threshold", None),
+                         getattr(node2, "threshold", None))
+        np.testing.assert_equal(getattr(node1, "mapping", None),
+                                getattr(node2, "mapping", None))
+        self.assertEqual(len(node1.children), len(node2.children))
+        for child1, child2 in zip(node1.children, node2.children):
+            self.assert_same_trees(child1, child2)
+
+    def test_parallel_scoring(self):
+        for binarize in (False, True):
+            tree = self.TreeLearner(binarize=binarize)(self.data_mixed)
+            learner = self.TreeLearner(binarize=binarize, n_jobs=2)
+            learner.MIN_PARALLEL_INSTANCES = 0
+            self.assert_same_trees(tree.root, learner(self.data_mixed).root)
+
+    def test_subsets_and_weights(self):
+        data = self.data_mixed
+        tree = self.TreeLearner(binarize=True)(data)
+        for node in self.all_nodes(tree.root):
+            self.assertTrue(np.all(np.diff(node.subset) > 0))
+            np.testing.assert_almost_equal(
+                node.value, np.bincount(data.Y[node.subset].astype(int),
+                                        minlength=len(data.domain.class_var.values)))
+
+        weighted = data.copy()
+        weighted.W = np.ones(len(data)) * 2
+        tree_weighted = self.TreeLearner()(weighted)
+        np.testing.assert_almost_equal(tree_weighted.root.value,
+                                       2 * tree.root.value)
+
 
 class TestRegressor(TestTree, unittest.TestCase):
     from Orange.regression import TreeLearner
@@ -235,6 +277,144 @@ class TestRegressor(TestTree, unittest.TestCase):
         cls.blind_prediction = 0
         cls.prediction_on_0_1 = 0.5
 
+    def test_known_tree(self):
+        def splits(node):
+            if node is None:
+                return []
+            split = [(node.attr_idx, round(node.threshold, 5))
+                     if node.children else None]
+            return split + [s for child in node.children
+                            for s in splits(child)]
+
+        # Attributes 0 and 4 have equal scores in the node root.1.0
+        tree = self.TreeLearner(max_depth=4)(self.data)
+        self.assertEqual(
+            splits(tree.root),
+            [(5, 6.939), (12, 14.37), (7, 1.3567), (0, 9.2323), None, None,
+             (5, 6.54), None, None, (0, 6.96215), (4, 0.524), None, None,
+             (4, 0.597), None, None, (5, 7.42), (0, 6.53876), (7, 1.8773),
+             None, None, (0, 19.6091), None, None, (0, 2.01019), (10, 14.7),
+             None, None, None])
+
+
+class TestForest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.iris = Table('iris')
+        cls.housing = Table('housing')
+
+    def test_predictions_average_trees(self):
+        from Orange.classification import TreeForestLearner
+
+        forest = TreeForestLearner(n_estimators=5)(self.iris)
+        self.assertEqual(len(forest.trees), 5)
+        self.assertTrue(all(isinstance(tree, TreeModel)
+                            for tree in forest.trees))
+        np.testing.assert_almost_equal(
+            forest(self.iris, forest.Probs),
+            np.mean([tree(self.iris, tree.Probs) for tree in forest.trees],
+                    axis=0))
+
+    def test_compact_mmap_pickle(self):
+        from Orange.regression import TreeForestLearner
+
+        forest = TreeForestLearner(n_estimators=3)(self.housing)
+        expected = forest(self.housing)
+        n_nodes = [tree.node_count() for tree in forest.trees]
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            mmap_pickle.dump(forest.compact(), filename)
+            loaded = mmap_pickle.load(filename)
+            # pylint: disable=protected-access
+            self.assertFalse(loaded._code.flags.writeable)
+            self.assertIsNone(loaded.instances)
+            np.testing.assert_equal(loaded(self.housing), expected)
+            self.assertEqual([tree.node_count() for tree in loaded.trees],
+                             n_nodes)
+            del loaded
+            # Compaction does not change the model itself
+            self.assertIs(forest.instances, self.housing)
+            for tree in forest.trees:
+                self.assertIs(tree.instances, self.housing)
+                self.assertGreater(len(tree.root.subset), 0)
+        finally:
+            os.remove(filename)
+
+    def test_regression(self):
+        from Orange.regression import TreeForestLearner
+
+        forest = TreeForestLearner(n_estimators=5)(self.housing)
+        np.testing.assert_almost_equal(
+            forest(self.housing),
+            np.mean([tree(self.housing) for tree in forest.trees], axis=0))
+
+    def test_processes_give_same_forest(self):
+        from Orange.classification import TreeForestLearner
+        from Orange.regression import TreeForestLearner as RegressionForest
+
+        for learner, data in ((TreeForestLearner, self.iris),
+                              (RegressionForest, self.housing)):
+            forest = learner(n_estimators=3, random_state=1)(data)
+            parallel = learner(n_estimators=3, random_state=1, n_jobs=2)(data)
+            np.testing.assert_almost_equal(forest(data), parallel(data))
+            for tree1, tree2 in zip(forest.trees, parallel.trees):
+                np.testing.assert_equal(tree1.root.subset, tree2.root.subset)
+                self.assertIs(tree2.instances, data)
+
+    def test_bootstrap_and_attributes(self):
+        from Orange.classification import TreeForestLearner
+
+        forest = TreeForestLearner(n_estimators=3, bootstrap=False,
+                                   max_features=None)(self.iris)
+        for tree in forest.trees:
+            np.testing.assert_equal(tree.root.subset, np.arange(150))
+            np.testing.assert_equal(tree.root.value, [50, 50, 50])
+
+        forest = TreeForestLearner(n_estimators=3, max_features=1)(self.iris)
+        self.assertGreater(
+            len({tree.root.attr_idx for tree in forest.trees}), 1)
+        for tree in forest.trees:
+            self.assertEqual(len(tree.root.subset), 150)
+            self.assertLess(len(np.unique(tree.root.subset)), 150)
+
+
+class TestTreeScorers(unittest.TestCase):
+    def test_threshold_does_not_depend_on_order_of_ties(self):
+        random = np.random.RandomState(0)
+        for _ in range(20):
+            x = random.randint(10, size=100).astype(float)
+            y = (random.rand(100) < x / 10).astype(float)
+            idx = np.argsort(x, kind="mergesort")
+            expected = _tree_scorers.find_threshold_entropy(x, y, idx, 2, 3)
+            for _ in range(5):
+                perm = random.permutation(100)
+                idx = perm[np.argsort(x[perm], kind="mergesort")]
+                self.assertEqual(
+                    _tree_scorers.find_threshold_entropy(x, y, idx, 2, 3),
+                    expected)
+
+    def test_threshold_is_optimal(self):
+        random = np.random.RandomState(1)
+        for _ in range(20):
+            x = random.randint(8, size=50).astype(float)
+            y = random.randint(3, size=50).astype(float)
+            idx = np.argsort(x, kind="mergesort")
+            score, threshold = \
+                _tree_scorers.find_threshold_entropy(x, y, idx, 3, 1)
+
+            def entropy(labels):
+                p = np.bincount(labels.astype(int)) / len(labels)
+                p = p[p > 0]
+                return -np.sum(p * np.log2(p))
+
+            gains = [entropy(y)
+                     - np.mean(x <= t) * entropy(y[x <= t])
+                     - np.mean(x > t) * entropy(y[x > t])
+                     for t in np.unique(x)[:-1]]
+            self.assertAlmostEqual(score, max(gains))
+            self.assertAlmostEqual(gains[int(threshold)], score)
+
 
 class TestNodes(unittest.TestCase):
     def test_node(self):
@@ -391,6 +571,56 @@ class TestTreeModel(unittest.TestCase):
         np.testing.assert_equal(subset.X, np.array([[8, 9, 10], [12, 13, 14]]))
         np.testing.assert_equal(subset.Y, np.array([11, 15]))
 
+    def test_compact(self):
+        # pylint: disable=protected-access
+        def describe(model):
+            # pylint: disable=protected-access
+            return [(node.description, list(node.value))
+                    for node in model._nodes()]
+
+        model = TreeModel(self.data, self.root)
+        self.root.subset = np.arange(10)
+        self.root.children[0].subset = np.array([2, 3])
+        description = describe(model)
+        x = np.array([[12, 1, 0], [14, 0, 2]], dtype=float)
+
+        compact = pickle.loads(pickle.dumps(model.compact(keep_data=True)))
+        self.assertIsNone(compact._root)
+        self.assertEqual(len(compact.get_instances([compact.root])), 10)
+        self.assertIsNotNone(compact._root)
+        np.testing.assert_equal(compact.root.children[0].subset, [2, 3])
+        np.testing.assert_equal(compact.root.children[1].mapping, [1, 1, 0])
+        self.assertEqual(describe(compact), description)
+        np.testing.assert_equal(compact.predict(x), model.predict(x))
+        self.assertEqual(compact.rule(compact.root.children[1].children[1]),
+                         ["v3: d or e", "v1 > 13.000"])
+
+        compact = pickle.loads(pickle.dumps(model.compact()))
+        self.assertIsNone(compact.instances)
+        self.assertEqual(describe(compact), description)
+        self.assertEqual(len(compact.root.subset), 0)
+
+        # Compaction does not change the model itself
+        self.assertIs(model.instances, self.data)
+        self.assertIs(model._root, self.root)
+        self.assertEqual(len(model.get_instances([model.root])), 10)
+        np.testing.assert_equal(model.root.children[0].subset, [2, 3])
+
+    def test_decompile_null_branches(self):
+        a = DiscreteVariable("d5", "abc")
+        domain = Domain([a], ContinuousVariable("fy"))
+        root = MappedDiscreteNode(a, 0, np.array([1, 0, 1]),
+                                  np.array([1., 2]))
+        root.children = [None, Node(None, None, np.array([3., 4]))]
+        model = TreeModel(Table(domain), root).compact()
+        model = pickle.loads(pickle.dumps(model))
+        np.testing.assert_equal(model.root.mapping, [0, 1, 0])
+        self.assertIsNone(model.root.children[1])
+        np.testing.assert_equal(model.root.children[0].value, [3, 4])
+        x = np.array([[0.], [1]])
+        np.testing.assert_equal(model.get_values_by_nodes(x),
+                                model.get_values(x))
+
     def test_print(self):
         model = TreeModel(self.data, self.root)
         self.assertEqual(model.print_tree(), """             [ 1 42] v1 ≤ 13.000
@@ -11,7 +11,11 @@ from Orange.classification.rules import (_RuleLearner, _RuleClassifier,
                                          RuleHunter, Rule, EntropyEvaluator,
                                          LaplaceAccuracyEvaluator,
                                          WeightedRelativeAccuracyEvaluator,
-                                         argmaxrnd, hash_dist)
+                                         LengthEvaluator, GuardianValidator,
+                                         TopDownSearchStrategy, argmaxrnd,
+                                         hash_dist, pack_coverage,
+                                         unpack_coverage, count_coverage,
+                                         Selector, compile_rules)
 
 from Orange.classification import (CN2Learner, CN2UnorderedLearner,
                                    CN2SDLearner, CN2SDUnorderedLearner)
@@ -209,5 +213,128 @@ class TestRuleInduction(unittest.TestCase):
         self.assertEqual(argmaxrnd(temp, hash_dist(np.array([3, 4]))), 5)
         self.assertRaises(ValueError, argmaxrnd, np.ones((1, 1, 1)))
 
+    def test_coverage_bitsets(self):
+        covered = np.random.RandomState(0).rand(3, 37) > 0.5
+        bits = pack_coverage(covered)
+        self.assertEqual(bits.shape, (3, 6))
+        np.testing.assert_equal(unpack_coverage(bits, 37), covered)
+        np.testing.assert_equal(count_coverage(bits), covered.sum(axis=1))
+
+    def test_refine_rule(self):
+        data = self.titanic
+        X, Y = data.X, data.Y.astype(int)
+        initial_dist = np.bincount(Y, minlength=2).astype(float)
+        strategy = TopDownSearchStrategy()
+        root, = strategy.initialise_rule(
+            X, Y, None, 1, [], data.domain, initial_dist, initial_dist,
+            EntropyEvaluator(), LengthEvaluator(), None,
+            GuardianValidator(min_covered_examples=1))
+        for rule in strategy.refine_rule(X, Y, None, root):
+            covered = rule.selectors[0].filter_data(X)
+            np.testing.assert_equal(rule.covered_examples, covered)
+            np.testing.assert_equal(rule.curr_class_dist,
+                                    np.bincount(Y[covered], minlength=2))
+            self.assertTrue(rule.general_validator.validate_rule(rule))
+            self.assertAlmostEqual(
+                rule.quality, rule.quality_evaluator.evaluate_rule(rule))
+            self.assertEqual(rule.complexity, -1)
+
+    def test_evaluate_rules(self):
+        rules = CN2UnorderedLearner()(self.iris).rule_list
+        for evaluator in (EntropyEvaluator(), LaplaceAccuracyEvaluator()):
+            for rule in rules:
+                self.assertAlmostEqual(evaluator.evaluate_rules([rule])[0],
+                                       evaluator.evaluate_rule(rule))
+
+    def test_compiled_rules(self):
+        X = np.array([[0, 1.5], [1, np.nan], [np.nan, 3], [2, 0.5]])
+        rules = [Rule(selectors=[Selector(0, "!=", 1), Selector(1, ">=", 1)]),
+                 Rule(selectors=[Selector(0, "==", 1)]),
+                 Rule(selectors=[Selector(1, "<=", 1)]),
+                 Rule(selectors=[])]
+        compiled = compile_rules(rules)
+        np.testing.assert_equal(compiled.offsets, [0, 2, 3, 4, 4])
+        np.testing.assert_equal(compiled.columns, [0, 1, 0, 1])
+        probabilities = np.vstack((np.eye(3), [0.2, 0.3, 0.5]))
+        for i, rule in enumerate(rules):
+            rule.probabilities = probabilities[i]
+            rule.curr_class_dist = np.full(3, i + 1) / 3
+        classifier = _RuleClassifier(self.iris.domain, rules)
+        covered = np.array([rule.evaluate_data(X) for rule in rules])
+        np.testing.assert_equal(covered, [[1, 0, 1, 0],
+                                          [0, 1, 0, 0],
+                                          [0, 0, 0, 1],
+                                          [1, 1, 1, 1]])
+        np.testing.assert_equal(classifier.ordered_predict(X),
+                                probabilities[[0, 1, 0, 2]])
+        np.testing.assert_equal(classifier.unordered_predict(X),
+                                probabilities[[0, 1, 0, 2]])
+
+        rules[0].selectors = [Selector(1, ">=", 0)]
+        np.testing.assert_almost_equal(
+            classifier.unordered_predict(X),
+            [[1, 0, 0], [0, 1, 0], [1, 0, 0], [1 / 4, 0, 3 / 4]])
+        rules[0].selectors = [Selector(1, ">=", 5)]
+        rules[1].selectors = [Selector(1, ">=", 5)]
+        np.testing.assert_equal(classifier.unordered_predict(X),
+                                probabilities[[3, 3, 3, 2]])
+
+    def test_unknown_discrete_values(self):
+        class GenericSearchStrategy(TopDownSearchStrategy):
+            def find_new_selectors(self, *args):
+                return super().find_new_selectors(*args)
+
+        data = Table('voting')
+        self.assertTrue(np.isnan(data.X).any())
+        for learner_class in (CN2Learner, CN2UnorderedLearner):
+            learner = learner_class(preprocessors=[])
+            learner.rule_finder.general_validator.max_rule_length = 2
+            rules = learner(data).rule_list
+            for rule in rules:
+                self.assertFalse(any(np.isnan(selector.value)
+                                     for selector in rule.selectors))
+            learner.rule_finder.search_strategy = GenericSearchStrategy()
+            self.assertEqual([str(rule) for rule in learner(data).rule_list],
+                             [str(rule) for rule in rules])
+
+    def test_overridden_evaluate_and_validate_rule(self):
+        calls = {"evaluate": 0, "validate": 0}
+
+        class Evaluator(LaplaceAccuracyEvaluator):
+            def evaluate_rule(self, rule):
+                calls["evaluate"] += 1
+                return super().evaluate_rule(rule)
+
+        class Validator(GuardianValidator):
+            def validate_rule(self, rule):
+                calls["validate"] += 1
+                return super().validate_rule(rule)
+
+        for evaluator in (EntropyEvaluator, LaplaceAccuracyEvaluator,
+                          LengthEvaluator):
+            class Overridden(evaluator):
+                def evaluate_rule(self, rule):
+                    return 42
+
+            rules = CN2Learner()(self.titanic).rule_list
+            self.assertEqual(Overridden().evaluate_rules(rules),
+                             [42] * len(rules))
+
+        learner = CN2UnorderedLearner()
+        rules = [str(rule) for rule in learner(self.titanic).rule_list]
+        learner.rule_finder.quality_evaluator = Evaluator()
+        learner.rule_finder.general_validator = Validator()
+        self.assertEqual(
+            [str(rule) for rule in learner(self.titanic).rule_list], rules)
+        self.assertGreater(calls["evaluate"], 0)
+        self.assertGreater(calls["validate"], 0)
+
+    def test_unordered_n_jobs(self):
+        learner = CN2UnorderedLearner()
+        rules = [str(rule) for rule in learner(self.titanic).rule_list]
+        learner.n_jobs = 2
+        self.assertEqual(
+            [str(rule) for rule in learner(self.titanic).rule_list], rules)
+
 if __name__ == '__main__':
     unittest.main()
@@ -58,6 +58,7 @@ class TestSimpleTreeLearner(unittest.TestCase):
         clf_ = pickle.loads(pickle.dumps(clf))
         p_ = clf_(self.data_cls, clf.Probs)
         np.testing.assert_almost_equal(p, p_)
+        self.assertEqual(clf_.dumps_tree(clf_.node), clf.dumps_tree(clf.node))
 
     def test_SimpleTree_classification_tree(self):
         lrn = SimpleTreeCls(min_instances=6, max_majority=0.7)
@@ -73,7 +74,15 @@ class TestSimpleTreeLearner(unittest.TestCase):
         self.assertEqual(p.shape, (self.N,))
 
     def test_SimpleTree_regression_pickle(self):
-        pass
+        lrn = SimpleTreeReg()
+        clf = lrn(self.data_reg)
+        _, nodes = clf.__getstate__()
+        self.assertEqual(nodes['type'][0], clf.node.contents.type)
+        clf_ = pickle.loads(pickle.dumps(clf))
+        # the unpickled domain has a different class variable
+        np.testing.assert_almost_equal(clf(self.data_reg.X),
+                                       clf_(self.data_reg.X))
+        self.assertEqual(clf_.dumps_tree(clf_.node), clf.dumps_tree(clf.node))
 
     def test_SimpleTree_regression_tree(self):
         lrn = SimpleTreeReg(min_instances=5)
@@ -3,6 +3,9 @@
 
 import unittest
 
+import numpy as np
+import scipy.sparse as sp
+
 from Orange.data import Table
 from Orange.classification import Model, SoftmaxRegressionLearner
 from Orange.evaluation import CrossValidation, CA
@@ -48,3 +51,26 @@ class TestSoftmaxRegressionLearner(unittest.TestCase):
         c = learner(self.iris)
         c(self.iris.X)
         vals, probs = c(self.iris.X, c.ValueProbs)
+
+    def test_minibatch(self):
+        for solver in ("sgd", "adam"):
+            learner = SoftmaxRegressionLearner(
+                solver=solver, batch_size=10, n_epochs=50,
+                learning_rate=0.05, random_state=0)
+            results = CrossValidation(self.iris, [learner], k=3)
+            self.assertGreater(CA(results), 0.9)
+
+    def test_minibatch_sparse(self):
+        data = SoftmaxRegressionLearner().preprocess(self.iris)
+        for solver in ("lbfgs", "adam"):
+            learner = SoftmaxRegressionLearner(
+                preprocessors=[], solver=solver, batch_size=10,
+                learning_rate=0.05, random_state=0)
+            dense = learner.fit(data.X, data.Y, None)
+            sparse = learner.fit(sp.csr_matrix(data.X), data.Y, None)
+            np.testing.assert_almost_equal(dense.Theta, sparse.Theta)
+            np.testing.assert_almost_equal(
+                dense.predict(data.X), sparse.predict(sp.csr_matrix(data.X)))
+
+    def test_unknown_solver(self):
+        self.assertRaises(ValueError, SoftmaxRegressionLearner, solver="foo")
@@ -1,9 +1,16 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
-from scipy.sparse import csr_matrix
+import pickle
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from scipy.sparse import csr_matrix, csc_matrix, isspmatrix_csc
 
 from Orange import data
+from Orange.statistics.contingency import get_contingency
+from Orange.statistics.distribution import get_distribution
 from Orange.tests import test_table as tabletests
 
 
@@ -43,3 +50,60 @@ class InterfaceTest(tabletests.InterfaceTest):
     def test_value_assignment(self):
         with self.assertRaises(ValueError):
             super().test_value_assignment()
+
+
+class TestCSCCache(unittest.TestCase):
+    def setUp(self):
+        self.dense = data.Table("zoo")
+        self.table = data.Table.from_numpy(
+            self.dense.domain, csr_matrix(self.dense.X), self.dense._Y,
+            self.dense.metas)
+
+    def test_get_csc(self):
+        table = self.table
+        X = table._get_csc("X")
+        self.assertTrue(isspmatrix_csc(X))
+        np.testing.assert_equal(X.toarray(), self.dense.X)
+        self.assertIs(table._get_csc("X"), X)
+        self.assertIs(table._get_csc("metas"), table.metas)
+        self.assertIs(self.dense._get_csc("X"), self.dense.X)
+
+        table.X = csc_matrix(self.dense.X)
+        self.assertIs(table._get_csc("X"), table.X)
+
+    def test_invalidation(self):
+        table = self.table
+        table._get_csc("X")
+        table.set_weights(2)
+        self.assertIsNone(table._csc_cache)
+
+        table._get_csc("X")
+        table.X = csr_matrix(self.dense.X[::-1])
+        np.testing.assert_equal(table._get_csc("X").toarray(),
+                                self.dense.X[::-1])
+
+    def test_statistics_use_cache(self):
+        table = self.table
+        domain = table.domain
+        with patch.object(csr_matrix, "tocsc", autospec=True,
+                          side_effect=csr_matrix.tocsc) as tocsc:
+            for var in domain.attributes[:5]:
+                get_distribution(table, var)
+                get_contingency(table, var)
+            table._compute_basic_stats()
+        self.assertEqual(tocsc.call_count, 1)
+
+        csc_table = data.Table.from_numpy(
+            domain, csc_matrix(self.dense.X), self.dense._Y, self.dense.metas)
+        for var in domain.attributes[:5]:
+            np.testing.assert_equal(get_distribution(table, var),
+                                    get_distribution(csc_table, var))
+            np.testing.assert_equal(get_contingency(table, var),
+                                    get_contingency(csc_table, var))
+
+    def test_pickle(self):
+        table = self.table
+        table._get_csc("X")
+        table2 = pickle.loads(pickle.dumps(table))
+        self.assertIsNone(table2._csc_cache)
+        np.testing.assert_equal(table2.X.toarray(), self.dense.X)
@@ -1,6 +1,7 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import csv
 import io
 from os import path, remove
 import unittest
@@ -8,6 +9,7 @@ import tempfile
 import shutil
 import pickle
 from collections import OrderedDict
+from unittest.mock import patch
 
 import numpy as np
 
@@ -135,6 +137,29 @@ class TestTabReader(unittest.TestCase):
         self.assertSequenceEqual(t2.domain['x'].values, 'abcdgh')
         np.testing.assert_almost_equal(t2.X.ravel(), [5, 4, 0, 2, 1])
 
+    def test_read_ordered_values(self):
+        file = io.StringIO("x\tc\nlow mid high\td\n\t\nhigh\ta\n"
+                           "unknown\tb\nlow\ta\n?\tb\n")
+        table = read_tab_file(file)
+        x, c = table.domain
+        self.assertEqual(x.values, ["low", "mid", "high"])
+        self.assertTrue(x.ordered)
+        np.testing.assert_equal(table.X[:, 0], [2, np.nan, 0, np.nan])
+        np.testing.assert_equal(table.X[:, 1], [0, 1, 0, 1])
+
+    def test_sniff_once(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            filename = path.join(tempdir, "non-ascii.tab")
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write("x\n" + "a\n" * 1000 + "\u010d\n")
+            with patch("csv.Sniffer.sniff", wraps=csv.Sniffer().sniff) as sniff:
+                table = read_tab_file(filename)
+            self.assertEqual(sniff.call_count, 1)
+            self.assertEqual(table.domain[0].values, ["a", "\u010d"])
+        finally:
+            shutil.rmtree(tempdir)
+
     def test_renaming(self):
         simplefile = """\
             a\t  b\t  a\t  a\t  b\t     a\t     c\t  a\t b
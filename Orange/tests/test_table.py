@@ -2,6 +2,8 @@
 # pylint: disable=missing-docstring
 
 import os
+import shutil
+import tempfile
 import unittest
 from itertools import chain
 from math import isnan
@@ -734,68 +736,61 @@ class TableTestCase(unittest.TestCase):
         self.assertEqual(d_ref.Y.shape, (10,))
 
     def test_saveTab(self):
-        d = data.Table("iris")[:3]
-        d.save("test-save.tab")
+        tempdir = tempfile.mkdtemp()
         try:
-            d2 = data.Table("test-save.tab")
-            for e1, e2 in zip(d, d2):
-                self.assertEqual(e1, e2)
+            self._test_saveTab(tempdir)
         finally:
-            os.remove("test-save.tab")
+            shutil.rmtree(tempdir)
+
+    def _test_saveTab(self, tempdir):
+        filename = os.path.join(tempdir, "test-save.tab")
+        d = data.Table("iris")[:3]
+        d.save(filename)
+        d2 = data.Table(filename)
+        for e1, e2 in zip(d, d2):
+            self.assertEqual(e1, e2)
 
         dom = data.Domain([data.ContinuousVariable("a")])
         d = data.Table(dom)
         d += [[i] for i in range(3)]
-        d.save("test-save.tab")
-        try:
-            d2 = data.Table("test-save.tab")
-            self.assertEqual(len(d.domain.attributes), 1)
-            self.assertEqual(d.domain.class_var, None)
-            for i in range(3):
-                self.assertEqual(d2[i], [i])
-        finally:
-            os.remove("test-save.tab")
+        d.save(filename)
+        d2 = data.Table(filename)
+        self.assertEqual(len(d.domain.attributes), 1)
+        self.assertEqual(d.domain.class_var, None)
+        for i in range(3):
+            self.assertEqual(d2[i], [i])
 
         dom = data.Domain([data.ContinuousVariable("a")], None)
         d = data.Table(dom)
         d += [[i] for i in range(3)]
-        d.save("test-save.tab")
-        try:
-            d2 = data.Table("test-save.tab")
-            self.assertEqual(len(d.domain.attributes), 1)
-            for i in range(3):
-                self.assertEqual(d2[i], [i])
-        finally:
-            os.remove("test-save.tab")
+        d.save(filename)
+        d2 = data.Table(filename)
+        self.assertEqual(len(d.domain.attributes), 1)
+        for i in range(3):
+            self.assertEqual(d2[i], [i])
 
         d = data.Table("zoo")
-        d.save("test-zoo.tab")
-        dd = data.Table("test-zoo")
-        try:
-            self.assertTupleEqual(d.domain.metas, dd.domain.metas, msg="Meta attributes don't match.")
-            self.assertTupleEqual(d.domain.variables, dd.domain.variables, msg="Attributes don't match.")
+        d.save(os.path.join(tempdir, "test-zoo.tab"))
+        dd = data.Table(os.path.join(tempdir, "test-zoo"))
+        self.assertTupleEqual(d.domain.metas, dd.domain.metas, msg="Meta attributes don't match.")
+        self.assertTupleEqual(d.domain.variables, dd.domain.variables, msg="Attributes don't match.")
 
-            np.testing.assert_almost_equal(d.W, dd.W, err_msg="Weights don't match.")
-            for i in range(10):
-                for j in d.domain.variables:
-                    self.assertEqual(d[i][j], dd[i][j])
-        finally:
-            os.remove("test-zoo.tab")
+        np.testing.assert_almost_equal(d.W, dd.W, err_msg="Weights don't match.")
+        for i in range(10):
+            for j in d.domain.variables:
+                self.assertEqual(d[i][j], dd[i][j])
 
         d = data.Table("zoo")
         d.set_weights(range(len(d)))
-        d.save("test-zoo-weights.tab")
-        dd = data.Table("test-zoo-weights")
-        try:
-            self.assertTupleEqual(d.domain.metas, dd.domain.metas, msg="Meta attributes don't match.")
-            self.assertTupleEqual(d.domain.variables, dd.domain.variables, msg="Attributes don't match.")
+        d.save(os.path.join(tempdir, "test-zoo-weights.tab"))
+        dd = data.Table(os.path.join(tempdir, "test-zoo-weights"))
+        self.assertTupleEqual(d.domain.metas, dd.domain.metas, msg="Meta attributes don't match.")
+        self.assertTupleEqual(d.domain.variables, dd.domain.variables, msg="Attributes don't match.")
 
-            np.testing.assert_almost_equal(d.W, dd.W, err_msg="Weights don't match.")
-            for i in range(10):
-                for j in d.domain.variables:
-                    self.assertEqual(d[i][j], dd[i][j])
-        finally:
-            os.remove("test-zoo-weights.tab")
+        np.testing.assert_almost_equal(d.W, dd.W, err_msg="Weights don't match.")
+        for i in range(10):
+            for j in d.domain.variables:
+                self.assertEqual(d[i][j], dd[i][j])
 
     def test_save_pickle(self):
         table = data.Table("iris")
@@ -1180,6 +1175,38 @@ class TableTestCase(unittest.TestCase):
         x = filter.Values([f])(d)
         self.assertEqual(len(x), 7)
 
+        col = d[:, "name"].metas[:, 0]
+        f2 = filter.FilterString("name", filter.FilterString.StartsWith, "ca")
+        x = filter.Values([f, f2])(d)
+        self.assertEqual(set(x.metas[:, 0]),
+                         {e for e in col if len(e) == 4 and e[:2] == "ca"})
+
+        x = filter.Values([f, f2], conjunction=False)(d)
+        self.assertEqual(
+            set(x.metas[:, 0]),
+            {e for e in col if len(e) == 4 and e[0] == "c" or e[:2] == "ca"})
+
+    def test_valueFilter_stringlist(self):
+        d = data.Table("zoo")
+        col = d[:, "name"].metas[:, 0]
+        f = filter.FilterStringList("name", ["girl", "Lion", "mole"])
+        x = filter.Values([f])(d)
+        self.assertEqual(set(x.metas[:, 0]), {"girl", "mole"})
+
+        f.case_sensitive = False
+        x = filter.Values([f])(d)
+        self.assertEqual(set(x.metas[:, 0]), {"girl", "lion", "mole"})
+
+        f2 = filter.FilterString("name", filter.FilterString.EndsWith, "e")
+        x = filter.Values([f, f2])(d)
+        self.assertEqual(set(x.metas[:, 0]), {"mole"})
+
+        x = filter.Values([f, f2], conjunction=False, negate=True)(d)
+        self.assertEqual(
+            set(x.metas[:, 0]),
+            {e for e in col
+             if e not in ("girl", "lion", "mole") and not e.endswith("e")})
+
     def test_table_dtypes(self):
         table = data.Table("iris")
         metas = np.hstack((table.metas, table.Y.reshape(len(table), 1)))
@@ -2150,6 +2177,178 @@ class TestRowInstance(unittest.TestCase):
         np.testing.assert_array_equal(table.X[:, 0], np.arange(len(table)))
 
 
+class TestConversionCache(unittest.TestCase):
+    def setUp(self):
+        self.data = data.Table("iris")
+        self.compute_value = Mock(side_effect=lambda d: d.X[:, 0] * 2)
+        self.domain = Domain(
+            [ContinuousVariable("x", compute_value=self.compute_value)],
+            self.data.domain.class_var)
+        Table.enable_conversion_cache()
+
+    def tearDown(self):
+        Table.disable_conversion_cache()
+
+    def test_disabled(self):
+        Table.disable_conversion_cache()
+        Table.from_table(self.domain, self.data)
+        Table.from_table(self.domain, self.data)
+        self.assertEqual(self.compute_value.call_count, 2)
+
+    def test_reuse(self):
+        t1 = Table.from_table(self.domain, self.data)
+        t2 = Table.from_table(self.domain, self.data)
+        self.assertEqual(self.compute_value.call_count, 1)
+        self.assertIsNot(t1, t2)
+        np.testing.assert_equal(t1.X, t2.X)
+        np.testing.assert_equal(t2.X[:, 0], self.data.X[:, 0] * 2)
+
+        # only conversions of entire tables are cached
+        Table.from_table(self.domain, self.data, [1, 2, 3])
+        self.assertEqual(self.compute_value.call_count, 2)
+
+        # another source with the same content
+        Table.from_table(self.domain, self.data.copy())
+        self.assertEqual(self.compute_value.call_count, 3)
+
+    def test_returns_read_only_views(self):
+        t1 = Table.from_table(self.domain, self.data)
+        self.assertRaises(ValueError, t1.X.__setitem__, (0, 0), 42)
+        t1.ensure_copy()
+        t1.X[0, 0] = 42
+
+        t2 = Table.from_table(self.domain, self.data)
+        self.assertEqual(t2.X[0, 0], self.data.X[0, 0] * 2)
+
+    def test_invalidation(self):
+        for modify in (lambda d: d.__setitem__((0, 0), 42),
+                       lambda d: d.extend(d[:2].copy()),
+                       lambda d: d.ensure_copy(),
+                       lambda d: d[0].__setitem__(0, 13)):
+            Table.from_table(self.domain, self.data)
+            self.compute_value.reset_mock()
+            modify(self.data)
+            t = Table.from_table(self.domain, self.data)
+            self.assertEqual(self.compute_value.call_count, 1)
+            np.testing.assert_equal(t.X[:, 0], self.data.X[:, 0] * 2)
+
+    def test_eviction(self):
+        t = Table.from_table(self.domain, self.data)
+        size = t.X.nbytes + t._Y.nbytes + t.W.nbytes + t.ids.nbytes
+        Table.enable_conversion_cache(max_size=size)
+        Table.from_table(self.domain, self.data)
+        Table.from_table(self.domain, self.data)
+        self.assertEqual(self.compute_value.call_count, 2)
+        other = self.data.copy()
+        Table.from_table(self.domain, other)
+        Table.from_table(self.domain, self.data)
+        self.assertEqual(self.compute_value.call_count, 4)
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_iter_blocks(self):
+        zoo = data.Table("zoo")
+        blocks = list(zoo.iter_blocks(40))
+        self.assertEqual([(start, stop) for start, stop, *_ in blocks],
+                         [(0, 40), (40, 80), (80, 101)])
+        for start, stop, X, Y, metas, W in blocks:
+            self.assertIs(X.base, zoo.X)
+            np.testing.assert_equal(X, zoo.X[start:stop])
+            np.testing.assert_equal(Y[:, 0], zoo.Y[start:stop])
+            np.testing.assert_equal(metas, zoo.metas[start:stop])
+            self.assertEqual(W.shape, (stop - start, 0))
+
+        self.assertEqual(len(list(zoo[:0].iter_blocks())), 0)
+        self.assertEqual(len(list(zoo.iter_blocks())), 1)
+        self.assertRaises(ValueError, next, zoo.iter_blocks(0))
+
+    def test_iter_blocks_sparse(self):
+        table = data.Table.from_numpy(None, sp.csr_matrix(np.eye(5)))
+        table.set_weights(np.arange(5))
+        for start, stop, X, _, _, W in table.iter_blocks(2):
+            np.testing.assert_equal(X.toarray(), np.eye(5)[start:stop])
+            np.testing.assert_equal(W, np.arange(start, stop))
+
+
+class TestTableBuilder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.iris = data.Table("iris")
+        cls.zoo = data.Table("zoo")
+
+    def test_append(self):
+        iris = self.iris
+        builder = data.TableBuilder(iris.domain, capacity=1)
+        builder.append(iris[3])
+        builder.append([1, 2, 3, 4, "Iris-virginica"])
+        builder.append(data.Instance(iris.domain, iris[5]))
+        self.assertEqual(len(builder), 3)
+        table = builder.get_table()
+        np.testing.assert_equal(table.X, [iris.X[3], [1, 2, 3, 4], iris.X[5]])
+        np.testing.assert_equal(table.Y, [0, 2, 0])
+        self.assertEqual(table.ids[0], iris.ids[3])
+        self.assertEqual(len(set(table.ids)), 3)
+        self.assertFalse(table.has_weights())
+
+    def test_extend(self):
+        zoo = self.zoo
+        builder = data.TableBuilder(zoo.domain)
+        builder.extend(zoo[:50])
+        builder.extend(list(zoo[50:60]))
+        builder.extend(np.hstack((zoo.X[60:], zoo._Y[60:])))
+        table = builder.get_table()
+        self.assertEqual(len(table), len(zoo))
+        np.testing.assert_equal(table.X, zoo.X)
+        np.testing.assert_equal(table.Y, zoo.Y)
+        np.testing.assert_equal(table.metas[:60], zoo.metas[:60])
+        unknown = zoo.domain.metas[0].Unknown
+        self.assertTrue(all(m == unknown for m in table.metas[60:, 0]))
+        np.testing.assert_equal(table.ids[:60], zoo.ids[:60])
+
+        with self.assertRaises(ValueError):
+            builder.extend(zoo.X)
+
+    def test_extend_other_domain(self):
+        iris = self.iris
+        domain = data.Domain(iris.domain.attributes[:2], iris.domain.class_var)
+        builder = data.TableBuilder(domain)
+        builder.extend(iris)
+        builder.append(iris[0])
+        table = builder.get_table()
+        np.testing.assert_equal(table.X, np.vstack((iris.X[:, :2],
+                                                    iris.X[:1, :2])))
+
+    def test_weights(self):
+        iris = self.iris[:10].copy()
+        iris.set_weights(np.arange(10))
+        builder = data.TableBuilder(iris.domain, weights=True)
+        builder.extend(iris[:5])
+        builder.append(iris[5])
+        builder.append(list(iris[6]))
+        builder.extend(np.hstack((iris.X, iris._Y))[7:])
+        table = builder.get_table()
+        np.testing.assert_equal(table.W, [0, 1, 2, 3, 4, 5, 1, 1, 1, 1])
+
+    def test_get_table_does_not_copy(self):
+        builder = data.TableBuilder(self.iris.domain)
+        builder.extend(self.iris)
+        X = builder._X
+        table = builder.get_table()
+        self.assertIs(table.X, X)
+        self.assertTrue(table.is_copy())
+        self.assertEqual(table.X.shape, self.iris.X.shape)
+
+        self.assertEqual(len(builder), 0)
+        builder.append(self.iris[0])
+        self.assertEqual(len(table), len(self.iris))
+        self.assertEqual(len(builder.get_table()), 1)
+
+    def test_sparse(self):
+        table = data.Table.from_numpy(None, sp.csr_matrix(np.eye(3)))
+        builder = data.TableBuilder(table.domain)
+        self.assertRaises(ValueError, builder.extend, table)
+
+
 class TestTableTranspose(unittest.TestCase):
     def test_transpose_no_class(self):
         attrs = [ContinuousVariable("c1"), ContinuousVariable("c2")]
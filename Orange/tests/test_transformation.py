@@ -1,9 +1,14 @@
 import unittest
 import numpy as np
+import scipy.sparse as sp
 
 from Orange.data import Table, Domain, DiscreteVariable, ContinuousVariable, \
     StringVariable
-from Orange.preprocess.transformation import Identity, Transformation
+from Orange.preprocess import Continuize, Normalize, Discretize, Impute, \
+    remove
+from Orange.preprocess.impute import ReplaceUnknowns
+from Orange.preprocess.transformation import Identity, Transformation, \
+    Indicator, Indicator1, Normalizer, Lookup
 
 
 class TestTransformation(unittest.TestCase):
@@ -59,3 +64,94 @@ class TestTransformation(unittest.TestCase):
         np.testing.assert_equal(D1.X, D.X)
         np.testing.assert_equal(D1.Y, D.Y)
         np.testing.assert_equal(D1.metas, D.metas)
+
+
+class TestGroupTransformation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = Table("heart_disease")
+
+    def assert_group_equals_single(self, transformations, columns):
+        group = type(transformations[0]).transform_group(transformations,
+                                                         columns)
+        for i, trans in enumerate(transformations):
+            np.testing.assert_equal(group[:, i],
+                                    trans.transform(columns[:, i]))
+
+    def test_transform_group(self):
+        columns = np.array([[0, 1, 2], [2, 1, np.nan], [1, 0, 0]])
+        var = self.data.domain[0]
+        self.assert_group_equals_single(
+            [Indicator(var, 0), Indicator(var, 1), Indicator(var, 2)],
+            columns)
+        self.assert_group_equals_single(
+            [Indicator1(var, 0), Indicator1(var, 1), Indicator1(var, 2)],
+            columns)
+        self.assert_group_equals_single(
+            [Normalizer(var, 1, 2), Normalizer(var, 0, 1),
+             Normalizer(var, 3, 0.5)], columns)
+        self.assert_group_equals_single(
+            [ReplaceUnknowns(var, 1), ReplaceUnknowns(var, 5),
+             ReplaceUnknowns(var, 42)], columns)
+
+        lookups = [Lookup(var, np.array([4, 5, 6])),
+                   Lookup(var, np.array([1, 0])),
+                   Lookup(var, np.array([7, 8, 9, 10]))]
+        group = Lookup.transform_group(lookups, columns)
+        np.testing.assert_equal(
+            group, [[4, 0, 9], [6, 0, np.nan], [5, 1, 7]])
+
+    def test_supports_group_transform(self):
+        self.assertFalse(Transformation.supports_group_transform())
+        self.assertFalse(Identity.supports_group_transform())
+        self.assertTrue(Indicator.supports_group_transform())
+        self.assertTrue(Lookup.supports_group_transform())
+        self.assertTrue(remove.Lookup.supports_group_transform())
+
+        class IndicatorMock(Indicator):
+            def transform(self, c):
+                return c != self.value
+
+        self.assertFalse(IndicatorMock.supports_group_transform())
+
+        class LookupMock(remove.Lookup):
+            def transform(self, column):
+                return column
+
+        self.assertFalse(LookupMock.supports_group_transform())
+
+    def test_compute_group(self):
+        data = self.data
+        var0, var1 = data.domain[0], data.domain[1]
+        trans = [Normalizer(var1, 1, 2), Normalizer(var0, 3, 4),
+                 Normalizer(var1, 5, 6)]
+        np.testing.assert_almost_equal(
+            Normalizer.compute_group(trans, data),
+            np.column_stack([t(data) for t in trans]))
+
+    def test_from_table(self):
+        data = self.data
+        for preprocessor in (Continuize(), Normalize(), Discretize(),
+                             Impute()):
+            domain = preprocessor(data).domain
+            converted = Table.from_table(domain, data)
+            for i, var in enumerate(domain.attributes):
+                if var.compute_value is not None:
+                    np.testing.assert_almost_equal(
+                        converted.X[:, i], var.compute_value(data))
+            np.testing.assert_almost_equal(
+                Table.from_table(domain, data, [3, 1, 4]).X,
+                converted.X[[3, 1, 4]])
+
+    def test_from_table_sparse(self):
+        X = sp.csr_matrix(np.array([[0, 1, 2], [2, 1, 0], [1, 0, 0]]))
+        data = Table.from_numpy(None, X)
+        var = ContinuousVariable("x")
+        domain = Domain(
+            [var.copy(compute_value=Normalizer(data.domain[i], 0, i))
+             for i in range(3)] + [ContinuousVariable("unknown")])
+        converted = Table.from_table(domain, data)
+        self.assertTrue(sp.issparse(converted.X))
+        np.testing.assert_almost_equal(
+            converted.X[:, :3].toarray(), X.toarray() * [0, 1, 2])
+        self.assertTrue(np.isnan(converted.X[:, 3].toarray()).all())
@@ -5,9 +5,15 @@ import unittest
 from tempfile import NamedTemporaryFile
 import os
 import warnings
+from unittest.mock import patch
 
-from Orange.data import Table, ContinuousVariable, DiscreteVariable
-from Orange.data.io import CSVReader
+import numpy as np
+
+from Orange.data import io, Table, ContinuousVariable, DiscreteVariable, \
+    StringVariable
+from Orange.data.io import CSVReader, TabReader, FileFormat, \
+    InferredTypeError
+from Orange.data.table import dataset_dirs
 from Orange.tests import test_filename
 
 tab_file = """\
@@ -101,3 +107,187 @@ time
             CSVReader(filename).read()
         finally:
             os.remove(filename)
+
+
+class ChunkedTabReader(TabReader):
+    CHUNK_SIZE = 2
+
+
+class TestChunkedReader(unittest.TestCase):
+    def read_chunked(self, s):
+        file = NamedTemporaryFile("wt", suffix=".tab", delete=False)
+        try:
+            file.write(s)
+            file.close()
+            return ChunkedTabReader(file.name).read()
+        finally:
+            os.remove(file.name)
+
+    def assert_tables_equal(self, table1, table2):
+        self.assertEqual(table1.domain, table2.domain)
+        for var1, var2 in zip(table1.domain.variables + table1.domain.metas,
+                              table2.domain.variables + table2.domain.metas):
+            self.assertIs(type(var1), type(var2))
+        np.testing.assert_equal(table1.X, table2.X)
+        np.testing.assert_equal(table1._Y, table2._Y)
+        np.testing.assert_equal(table1.W, table2.W)
+        np.testing.assert_equal(table1.metas, table2.metas)
+
+    def test_same_as_full_read(self):
+        for name in ("iris", "zoo", "titanic", "heart_disease", "housing",
+                     "adult_sample", "brown-selected"):
+            filename = FileFormat.locate(name, dataset_dirs)
+            self.assert_tables_equal(ChunkedTabReader(filename).read(),
+                                     TabReader(filename).read())
+
+    def test_heuristics(self):
+        data = "a\tb\tc\td\n1\tx\t0\tp\n2\ty\t1\tq\n" \
+               "3\tz\t\tr\n4\tx\t1\ts\n5\tx\t0\tt\n"
+        chunked = FileFormat.data_table_chunked(
+            (line.split("\t") for line in data.splitlines()), chunk_size=2)
+        full = FileFormat.data_table(line.split("\t")
+                                     for line in data.splitlines())
+        self.assert_tables_equal(chunked, full)
+        a, b, c = chunked.domain.attributes
+        self.assertIsInstance(a, ContinuousVariable)
+        self.assertIsInstance(b, DiscreteVariable)
+        self.assertIsInstance(c, DiscreteVariable)
+        self.assertIsInstance(chunked.domain.metas[0], StringVariable)
+
+    def test_inferred_type_error(self):
+        data = "a\n1\n2\n3\n4\nx\n"
+        with self.assertRaises(InferredTypeError):
+            FileFormat.data_table_chunked(
+                (line.split(",") for line in data.splitlines()), chunk_size=4)
+
+        table = self.read_chunked(data)
+        self.assertIsInstance(table.domain.metas[0], StringVariable)
+        self.assertEqual(list(table.metas[:, 0]), list("1234x"))
+
+    def test_noncontinous_marked_continuous(self):
+        with self.assertRaises(ValueError) as cm:
+            self.read_chunked(noncont_marked_cont.replace(",", "\t"))
+        self.assertIn('line 5, column 2', cm.exception.args[0])
+
+    def test_longer_rows(self):
+        data = "a\tb\n1\t2\n3\t4\n5\t6\tx\n7\t8\ty\n"
+        rows = [line.split("\t") for line in data.splitlines()]
+        table = FileFormat.data_table_chunked(rows, chunk_size=2)
+        self.assertEqual(len(table.domain.attributes), 3)
+        np.testing.assert_equal(table.X[:, 2], [np.nan, np.nan, 0, 1])
+
+
+class NativeTabReader(TabReader):
+    ENGINE = 'native'
+
+
+class NativeCSVReader(CSVReader):
+    ENGINE = 'native'
+
+
+class TestNativeReader(unittest.TestCase):
+    tricky = [
+        'a,b,c\n1,"x,y",3\n2,"multi\nline",4\n3,"q""uote",5\n',
+        'a;b;c\r\n1;x;3\r\n\r\n2;y;4\r\n5;z;6',
+        'a,b\r1,2\r3,4\r5,\r',
+        'x,y,z\n1, 2,  3\n?,NA,nan\n~,.,\n4,5,6\n7,8,9\n10,11,12\n',
+        'c#a,d#b,s\n1.5,x,hello\n2,y, world \n,?,\n1e3,x,"a\n b"\n',
+        'n,v\n1,1e-3\n2,1_000\n3,4\n4,5\n5,6\n',
+        'a,b,c\n1,2\n3,4,5\n6\n',
+        'a,b\n"unterminated,1\n2,3\n',
+        'name,val\nfoo\xa0,1\nfoo,2\nbar,3\n\xa0?,4\n',
+        'k\n1\n2\n3\n4\nx\n',
+    ]
+
+    def setUp(self):
+        self.files = []
+
+    def tearDown(self):
+        for filename in self.files:
+            os.remove(filename)
+
+    def write(self, s, encoding="utf-8"):
+        file = NamedTemporaryFile("wt", suffix=".csv", delete=False,
+                                  encoding=encoding, newline="")
+        file.write(s)
+        file.close()
+        self.files.append(file.name)
+        return file.name
+
+    def assert_tables_equal(self, table1, table2):
+        self.assertEqual(
+            [var.name for var in table1.domain.variables + table1.domain.metas],
+            [var.name for var in table2.domain.variables + table2.domain.metas])
+        self.assertEqual(len(table1.domain.attributes),
+                         len(table2.domain.attributes))
+        self.assertEqual(len(table1.domain.metas), len(table2.domain.metas))
+        for var1, var2 in zip(table1.domain.variables + table1.domain.metas,
+                              table2.domain.variables + table2.domain.metas):
+            self.assertIs(type(var1), type(var2))
+            self.assertEqual(getattr(var1, "values", None),
+                             getattr(var2, "values", None))
+        np.testing.assert_equal(table1.X, table2.X)
+        np.testing.assert_equal(table1._Y, table2._Y)
+        np.testing.assert_equal(table1.W, table2.W)
+        np.testing.assert_equal(table1.metas, table2.metas)
+
+    def assert_same_as_python(self, filename, n_threads=None):
+        reader = NativeCSVReader(filename)
+        reader.N_THREADS = n_threads
+        native = reader._read_native()
+        self.assertIsNotNone(native)
+        self.assert_tables_equal(native, CSVReader(filename).read())
+
+    def test_same_as_python_engine(self):
+        for name in ("iris", "zoo", "titanic", "heart_disease", "housing",
+                     "adult_sample", "brown-selected"):
+            filename = FileFormat.locate(name, dataset_dirs)
+            reader = NativeTabReader(filename)
+            native = reader._read_native()
+            self.assertIsNotNone(native)
+            self.assert_tables_equal(native, TabReader(filename).read())
+            self.assert_tables_equal(reader.read(), native)
+
+    def test_tricky_files(self):
+        for s in self.tricky:
+            for encoding in ("utf-8", "latin-1"):
+                self.assert_same_as_python(self.write(s, encoding))
+
+    def test_split_ranges(self):
+        with patch.object(io, "_NATIVE_RANGE_SIZE", 3):
+            for s in self.tricky:
+                self.assert_same_as_python(self.write(s), n_threads=4)
+            filename = FileFormat.locate("heart_disease", dataset_dirs)
+            reader = NativeTabReader(filename)
+            reader.N_THREADS = 5
+            self.assert_tables_equal(reader._read_native(),
+                                     TabReader(filename).read())
+
+    def test_fallback(self):
+        reader = NativeCSVReader(self.write(""))
+        self.assertIsNone(reader._read_native())
+        self.assertEqual(len(reader.read()), 0)
+
+        filename = self.write("a,b\n1,\x002\n")
+        self.assertIsNone(NativeCSVReader(filename)._read_native())
+
+        filename = self.write(csv_file, "utf-16")
+        self.assertIsNone(NativeCSVReader(filename)._read_native())
+        self.assert_tables_equal(NativeCSVReader(filename).read(),
+                                 CSVReader(filename).read())
+
+    def test_errors_reported_by_python_engine(self):
+        filename = self.write(noncont_marked_cont)
+        with self.assertRaises(ValueError) as cm:
+            NativeCSVReader(filename).read()
+        self.assertIn('line 5, column 2', cm.exception.args[0])
+
+    def test_bugs_are_not_hidden(self):
+        filename = self.write(csv_file)
+        with patch.object(NativeCSVReader, "_native_table",
+                          side_effect=TypeError):
+            self.assertRaises(TypeError, NativeCSVReader(filename).read)
+        with patch.object(NativeCSVReader, "_native_table",
+                          side_effect=ValueError):
+            self.assert_tables_equal(NativeCSVReader(filename).read(),
+                                     CSVReader(filename).read())
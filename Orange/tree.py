@@ -1,10 +1,16 @@
-"""Tree model used by Orange inducers, and Tree interface"""
-
+"""Tree model used by Orange inducers, forests of such trees, and Tree
+interface"""
+import os
+import shutil
+import tempfile
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 
 import numpy as np
 
-from Orange.base import Model
+from Orange.base import Learner, Model, RandomForest
 
 
 class Node:
@@ -16,6 +22,8 @@ class Node:
         value (object): value used for prediction (e.g. class distribution)
         children (list of Node): child branches
         subset (numpy.array): indices of data instances in this node
+        n_instances (int): the number of data instances in this node; this
+            is also known for nodes reconstructed without `subset`
     """
     def __init__(self, attr, attr_idx, value):
         self.attr = attr
@@ -25,6 +33,16 @@ class Node:
         self.subset = np.array([], dtype=np.int32)
         self.description = ""
         self.condition = ()
+        self._n_instances = None
+
+    @property
+    def n_instances(self):
+        n_instances = getattr(self, "_n_instances", None)
+        return len(self.subset) if n_instances is None else n_instances
+
+    @n_instances.setter
+    def n_instances(self, n_instances):
+        self._n_instances = n_instances
 
     def descend(self, inst):
         """Return the child for the given data instance"""
@@ -132,17 +150,82 @@ class TreeModel(Model):
     """
     Tree classifier with proper handling of nominal attributes and binarization
     and the interface API for visualization.
+
+    Predictions use the compiled tree (arrays `_code`, `_values` and
+    `_thresholds`). After calling :obj:`compact`, the model is pickled
+    without the graph of nodes, which is reconstructed from the compiled
+    tree when it is needed (e.g. by a viewer).
     """
 
     def __init__(self, data, root):
         super().__init__(data.domain)
         self.instances = data
-        self.root = root
+        self._root = root
+        self._compact = False
+        self._keep_data = True
+        self._subsets = self._subset_offsets = None
 
         self._values = self._thresholds = self._code = None
+        self._counts = None
         self._compile()
         self._compute_descriptions()
 
+    @property
+    def root(self):
+        if self._root is None:
+            self._root = self._decompile()
+            self._compute_descriptions()
+        return self._root
+
+    def compact(self, keep_data=False):
+        """
+        Pickle the model without the graph of nodes and, unless `keep_data`
+        is set, without the training data and the indices of data
+        instances in nodes; the numbers of instances in nodes are kept.
+        Return the model.
+
+        The model itself is not changed; only its pickles are. Compact
+        models are also suitable for :obj:`Orange.misc.mmap_pickle`,
+        which maps the compiled tree from the file when loading.
+        """
+        self._compact = True
+        self._keep_data = keep_data
+        return self
+
+    def _nodes(self):
+        """Return a list of nodes in the order of compilation"""
+        def _collect(node):
+            nodes.append(node)
+            for child in node.children:
+                if child is not None:
+                    _collect(child)
+
+        nodes = []
+        _collect(self.root)
+        return nodes
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if state.get("_compact"):
+            state["_root"] = None
+            if not self._keep_data:
+                state.update(instances=None,
+                             _subsets=None, _subset_offsets=None)
+            elif self._root is not None:
+                nodes = self._nodes()
+                state["_subsets"] = np.hstack([node.subset for node in nodes])
+                state["_subset_offsets"] = np.cumsum(
+                    [0] + [len(node.subset) for node in nodes])
+        return state
+
+    def __setstate__(self, state):
+        # Models pickled before compaction was introduced
+        if "root" in state:
+            state["_root"] = state.pop("root")
+            state.update(_compact=False, _keep_data=True,
+                         _subsets=None, _subset_offsets=None, _counts=None)
+        self.__dict__.update(state)
+
     def _prepare_predictions(self, n):
         rootval = self.root.value
         return np.empty((n,) + rootval.shape, dtype=rootval.dtype)
@@ -317,6 +400,7 @@ class TreeModel(Model):
             code_ptr += 2
 
             self._values[node_idx] = node.value
+            self._counts[node_idx] = node.n_instances
             if isinstance(node, NumericNode):
                 self._thresholds[node_idx] = node.threshold
             node_idx += 1
@@ -344,11 +428,60 @@ class TreeModel(Model):
         _compute_sizes(self.root)
         self._values = self._prepare_predictions(nnodes)
         self._thresholds = np.empty(nnodes)
+        self._counts = np.empty(nnodes, np.int32)
         self._code = np.empty(codesize, np.int32)
 
         code_ptr = node_idx = 0
         _compile_node(self.root)
 
+    def _decompile(self):
+        """Reconstruct the graph of nodes from the compiled tree"""
+        from Orange.classification._tree_scorers import NULL_BRANCH
+
+        def _decompile_node(code_ptr):
+            node_type = self.NODE_TYPES[self._code[code_ptr]]
+            node_idx = self._code[code_ptr + 1]
+            value = self._values[node_idx]
+            # pylint: disable=unidiomatic-typecheck
+            if node_type is Node:
+                node = Node(None, None, value)
+            else:
+                attr_idx = int(self._code[code_ptr + 2])
+                attr = self.domain.attributes[attr_idx]
+                jump_table_size = 2 if node_type is NumericNode \
+                    else len(attr.values)
+                jump_table = self._code[code_ptr + 3:
+                                        code_ptr + 3 + jump_table_size]
+                if node_type is NumericNode:
+                    node = NumericNode(attr, attr_idx,
+                                       self._thresholds[node_idx], value)
+                    child_ptrs = jump_table
+                elif node_type is DiscreteNode:
+                    node = DiscreteNode(attr, attr_idx, value)
+                    child_ptrs = jump_table
+                else:
+                    # Children are compiled in order; a missing child
+                    # (if any) is put last
+                    child_ptrs = np.unique(jump_table[jump_table != NULL_BRANCH])
+                    mapping = np.searchsorted(child_ptrs, jump_table)
+                    if np.any(jump_table == NULL_BRANCH):
+                        mapping[jump_table == NULL_BRANCH] = len(child_ptrs)
+                        child_ptrs = np.append(child_ptrs, NULL_BRANCH)
+                    node = MappedDiscreteNode(attr, attr_idx,
+                                              mapping.astype(np.int16), value)
+                node.children = [
+                    None if ptr == NULL_BRANCH else _decompile_node(ptr)
+                    for ptr in child_ptrs]
+            if self._subsets is not None:
+                node.subset = self._subsets[
+                    self._subset_offsets[node_idx]:
+                    self._subset_offsets[node_idx + 1]]
+            if self._counts is not None:
+                node.n_instances = int(self._counts[node_idx])
+            return node
+
+        return _decompile_node(0)
+
     def _compute_descriptions(self):
         def _compute_subtree(node):
             for i, child in enumerate(node.children):
@@ -369,3 +502,222 @@ class TreeModel(Model):
         conditions = OrderedDict()
         self.root.parent = None
         _compute_subtree(self.root)
+
+
+def sort_rows(data, rows):
+    """Return indices of rows with known values of each continuous
+    attribute, sorted by the values"""
+    sorted_rows = {}
+    for attr_no, attr in enumerate(data.domain.attributes):
+        if attr.is_continuous:
+            col_x = data.X[rows, attr_no]
+            order = np.argsort(col_x, kind="mergesort")
+            order = order[:len(order) - np.sum(np.isnan(col_x))]
+            sorted_rows[attr_no] = rows[order].astype(np.intp)
+    return sorted_rows
+
+
+def partition_sorted(data, rows, branches, n_children, sorted_rows):
+    """Split sorted indices between branches, keeping their order"""
+    branch_of = np.empty(len(data), dtype=np.int16)
+    branch_of[rows] = branches
+    children = [{} for _ in range(n_children)]
+    for attr_no, sorted_ in sorted_rows.items():
+        sorted_branches = branch_of[sorted_]
+        for br, child in enumerate(children):
+            child[attr_no] = sorted_[sorted_branches == br]
+    return children
+
+
+def candidate_attributes(n_attributes, max_features, random):
+    """Return indices of attributes that are considered for a split
+
+    Args:
+        n_attributes (int): the number of attributes
+        max_features (int, float or str): the number or the proportion of
+            randomly chosen attributes, or `"sqrt"` or `"log2"` of the
+            number of attributes; all attributes if `None`
+        random (np.random.RandomState): random generator
+
+    Returns:
+        indices of attributes
+    """
+    if max_features is None:
+        return range(n_attributes)
+    if max_features == "sqrt":
+        k = int(np.sqrt(n_attributes))
+    elif max_features == "log2":
+        k = int(np.log2(max(n_attributes, 1)))
+    elif isinstance(max_features, float):
+        k = int(max_features * n_attributes)
+    else:
+        k = max_features
+    k = max(1, k)
+    if k >= n_attributes:
+        return range(n_attributes)
+    return np.sort(random.choice(n_attributes, k, replace=False))
+
+
+class ForestModel(Model, RandomForest):
+    """
+    Forest of :obj:`TreeModel`; the compiled trees are concatenated, so
+    predictions of all trees are computed in a single pass over the data.
+
+    Classification forests average the class probabilities in leaves and
+    regression forests average the predicted values.
+    """
+    def __init__(self, data, trees):
+        super().__init__(data.domain)
+        self.instances = data
+        self._trees = trees
+        self._compact = False
+        self._keep_data = True
+
+        self._values = self._thresholds = self._code = None
+        self._code_offsets = self._value_offsets = None
+        self._compile()
+
+    @property
+    def trees(self):
+        return self._trees
+
+    def compact(self, keep_data=False):
+        """
+        Compact the trees (see :obj:`TreeModel.compact`) and, unless
+        `keep_data` is set, pickle the model without the training data.
+        Return the model, which itself is not changed.
+        """
+        for tree in self._trees:
+            tree.compact(keep_data)
+        self._compact = True
+        self._keep_data = keep_data
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if state.get("_compact") and not state.get("_keep_data"):
+            state["instances"] = None
+        return state
+
+    def _compile(self):
+        # pylint: disable=protected-access
+        values = []
+        for tree in self._trees:
+            tree_values = tree._values
+            if self.domain.class_var.is_discrete:
+                sums = np.sum(tree_values, axis=1)
+                sums[sums == 0] = 1
+                tree_values = tree_values / sums[:, np.newaxis]
+            values.append(tree_values)
+        code_sizes = [len(tree._code) for tree in self._trees]
+        value_sizes = [len(tree_values) for tree_values in values]
+        self._code = np.hstack([tree._code for tree in self._trees])
+        self._values = np.vstack(values)
+        self._thresholds = np.hstack(
+            [tree._thresholds for tree in self._trees])
+        self._code_offsets = np.cumsum(
+            [0] + code_sizes[:-1]).astype(np.int32)
+        self._value_offsets = np.cumsum(
+            [0] + value_sizes[:-1]).astype(np.int32)
+
+    def get_values(self, X):
+        from Orange.classification import _tree_scorers
+        return _tree_scorers.compute_forest_predictions(
+            X, self._code, self._values, self._thresholds,
+            self._code_offsets, self._value_offsets)
+
+    def predict(self, X):
+        predictions = self.get_values(X)
+        if self.domain.class_var.is_continuous:
+            return predictions[:, 0]
+        return predictions
+
+
+@lru_cache(maxsize=1)
+def _open_shared(filename):
+    """Open the memory-mapped data; each worker process maps the file once
+    and reuses it for all its trees"""
+    from Orange.data.io import MemmapReader
+    return MemmapReader(filename).read()
+
+
+def _fit_tree(data, tree_learner, rows, bootstrap_seed):
+    if bootstrap_seed is not None:
+        random = np.random.RandomState(bootstrap_seed)
+        rows = rows[random.randint(len(rows), size=len(rows))]
+    return tree_learner.build_root(data, rows)
+
+
+def _fit_shared_tree(filename, tree_learner, rows, bootstrap_seed):
+    return _fit_tree(_open_shared(filename), tree_learner, rows,
+                     bootstrap_seed)
+
+
+class ForestLearner(Learner):
+    """
+    Base class for forests of trees induced by Orange's tree inducers.
+
+    Each tree is induced from a bootstrap sample of data instances, and
+    only a random subset of attributes is considered for each split.
+    Trees are induced from indices into the training data, which is
+    never copied. With `n_jobs > 1`, trees are induced in a pool of
+    processes; the data is written into a memory-mapped file (see
+    :obj:`Orange.data.io.MemmapReader`), which the processes share instead
+    of receiving pickled copies.
+
+    Derived classes define :obj:`tree_learner`, which returns the inducer
+    of a single tree.
+
+    Args:
+        n_estimators (int): the number of trees
+        max_features (int, float or str): the number of attributes
+            considered for a split (see :obj:`candidate_attributes`)
+        bootstrap (bool): if `True`, trees are induced from bootstrap
+            samples, otherwise from all data instances
+        random_state (int): the seed for sampling instances and attributes
+        n_jobs (int): the number of processes
+
+    Returns:
+        instance of ForestModel
+    """
+    __returns__ = ForestModel
+
+    def __init__(self, n_estimators=10, max_features="sqrt", bootstrap=True,
+                 random_state=0, n_jobs=1, preprocessors=None):
+        super().__init__(preprocessors=preprocessors)
+        self.n_estimators = n_estimators
+        self.max_features = max_features
+        self.bootstrap = bootstrap
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def tree_learner(self, random_state):
+        """Return the inducer of a tree with the given random state; the
+        inducer must implement `build_root(data, rows)`"""
+        raise NotImplementedError
+
+    def fit_storage(self, data):
+        active_inst = np.nonzero(~np.isnan(data.Y))[0].astype(np.int32)
+        random = np.random.RandomState(self.random_state)
+        seeds = random.randint(2 ** 31 - 1, size=(self.n_estimators, 2))
+        tree_learners = [self.tree_learner(int(seed)) for seed in seeds[:, 0]]
+        bootstrap_seeds = [int(seed) for seed in seeds[:, 1]] \
+            if self.bootstrap else [None] * self.n_estimators
+
+        if self.n_jobs > 1 and self.n_estimators > 1:
+            shared_dir = tempfile.mkdtemp(prefix="orange-forest-")
+            try:
+                filename = os.path.join(shared_dir, "data.mmap")
+                data.save(filename)
+                with ProcessPoolExecutor(self.n_jobs) as executor:
+                    roots = list(executor.map(
+                        _fit_shared_tree, repeat(filename), tree_learners,
+                        repeat(active_inst), bootstrap_seeds))
+            finally:
+                shutil.rmtree(shared_dir, ignore_errors=True)
+        else:
+            roots = [_fit_tree(data, tree_learner, active_inst, seed)
+                     for tree_learner, seed in zip(tree_learners,
+                                                   bootstrap_seeds)]
+        return self.__returns__(
+            data, [TreeModel(data, root) for root in roots])
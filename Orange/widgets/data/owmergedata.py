@@ -5,8 +5,10 @@ from collections import defaultdict
 from AnyQt.QtWidgets import QWidget, QGridLayout
 from AnyQt.QtCore import Qt
 import numpy
+import scipy.sparse as sp
 
 import Orange
+from Orange.data import Value
 from Orange.widgets import widget, gui, settings
 from Orange.widgets.utils import itemmodels
 from Orange.widgets.utils.sql import check_sql_input
@@ -200,15 +202,33 @@ def group_table_indices(table, key_vars, exclude_unknown=False):
     :param bool exclude_unknown:
 
     """
+    domain = table.domain
+    n_attrs = len(domain.attributes)
+
+    def key_column(a, start, stop, X, Y, metas):
+        if a == INSTANCEID:
+            return table.ids[start:stop]
+        if a == INDEX:
+            return range(start, stop)
+        col = domain.index(a)
+        if col < 0:
+            values = metas[:, -1 - col]
+        elif col < n_attrs:
+            values = X[:, col]
+        else:
+            values = Y[:, col - n_attrs]
+        if sp.issparse(values):
+            values = values.toarray().ravel()
+        return [Value(a, val) for val in values]
+
     groups = defaultdict(list)
-    for i, inst in enumerate(table):
-        key = [inst.id if a == INSTANCEID else
-               i if a == INDEX else inst[a]
-                   for a in key_vars]
-        if exclude_unknown and any(math.isnan(k) for k in key):
-            continue
-        key = tuple([str(k) for k in key])
-        groups[key].append(i)
+    for start, stop, X, Y, metas, _ in table.iter_blocks():
+        columns = [key_column(a, start, stop, X, Y, metas) for a in key_vars]
+        for i, *key in zip(range(start, stop), *columns):
+            if exclude_unknown and any(math.isnan(k) for k in key):
+                continue
+            key = tuple([str(k) for k in key])
+            groups[key].append(i)
     return groups
 
 
@@ -13,6 +13,7 @@ from Orange.classification.tree import SklTreeClassifier
 from Orange.data import Table
 from Orange.regression.random_forest import RandomForestRegressor
 from Orange.regression.tree import SklTreeRegressor
+from Orange.tree import ForestModel
 from Orange.widgets import gui, settings
 from Orange.widgets.utils.colorpalette import ContinuousPaletteGenerator
 from Orange.widgets.visualize.pythagorastreeviewer import PythagorasTreeViewer
@@ -23,6 +24,7 @@ from Orange.widgets.visualize.utils.owgrid import (
 )
 from Orange.widgets.visualize.utils.tree.skltreeadapter import \
     SklTreeAdapter
+from Orange.widgets.visualize.utils.tree.treeadapter import TreeAdapter
 from Orange.widgets.widget import OWWidget
 
 
@@ -130,6 +132,9 @@ class OWPythagoreanForest(OWWidget):
                 self.forest_type = self.CLASSIFICATION
             elif isinstance(model, RandomForestRegressor):
                 self.forest_type = self.REGRESSION
+            elif isinstance(model, ForestModel):
+                self.forest_type = self.CLASSIFICATION \
+                    if model.domain.has_discrete_class else self.REGRESSION
             else:
                 raise RuntimeError('Invalid type of forest.')
 
@@ -226,6 +231,11 @@ class OWPythagoreanForest(OWWidget):
         return max([tree.tree_adapter.max_depth for tree in self.ptrees])
 
     def _get_forest_adapter(self, model):
+        if isinstance(model, ForestModel):
+            return ForestAdapter(
+                model,
+                adjust_weight=self.SIZE_CALCULATION[self.size_calc_idx][1],
+            )
         return SklRandomForestAdapter(
             model,
             model.domain,
@@ -275,14 +285,16 @@ class OWPythagoreanForest(OWWidget):
 
         selected_item = self.scene.selectedItems()[0]
         self.selected_tree_index = self.grid_items.index(selected_item)
-        tree = self.model.skl_model.estimators_[self.selected_tree_index]
-
-        if self.forest_type == self.CLASSIFICATION:
-            obj = SklTreeClassifier(tree)
+        if isinstance(self.model, ForestModel):
+            obj = self.model.trees[self.selected_tree_index]
         else:
-            obj = SklTreeRegressor(tree)
-        obj.domain = self.model.domain
-        obj.instances = self.model.instances
+            tree = self.model.skl_model.estimators_[self.selected_tree_index]
+            if self.forest_type == self.CLASSIFICATION:
+                obj = SklTreeClassifier(tree)
+            else:
+                obj = SklTreeRegressor(tree)
+            obj.domain = self.model.domain
+            obj.instances = self.model.instances
 
         obj.meta_target_class_index = self.target_class_index
         obj.meta_size_calc_idx = self.size_calc_idx
@@ -428,3 +440,21 @@ class SklRandomForestAdapter:
     def domain(self):
         """Get the domain."""
         return self._domain
+
+
+class ForestAdapter:
+    """Take a `ForestModel` and wrap its trees into `TreeAdapter` instances
+    that Pythagorean trees use."""
+    def __init__(self, model, adjust_weight=lambda x: x):
+        self._adapters = [TreeAdapter(tree, adjust_weight)
+                          for tree in model.trees]
+        self._domain = model.domain
+
+    def get_trees(self):
+        """Get the tree adapters in the forest."""
+        return self._adapters
+
+    @property
+    def domain(self):
+        """Get the domain."""
+        return self._domain
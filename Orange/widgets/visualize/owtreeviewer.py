@@ -328,7 +328,7 @@ class OWTreeGraph(OWTreeViewer2D):
         """Update the printed contents of the node for classification trees"""
         node_inst = node.node_inst
         distr = node_inst.value
-        total = len(node_inst.subset)
+        total = node_inst.n_instances
         distr = distr / np.sum(distr)
         if self.target_class_index:
             tabs = distr[self.target_class_index - 1]
@@ -352,7 +352,7 @@ class OWTreeGraph(OWTreeViewer2D):
         """Update the printed contents of the node for regression trees"""
         node_inst = node.node_inst
         mean, var = node_inst.value
-        insts = len(node_inst.subset)
+        insts = node_inst.n_instances
         text = "{:.1f} ± {:.1f}<br/>".format(mean, var)
         text += "{} instances".format(insts)
         text = self._update_node_info_attr_name(node, text)
@@ -384,10 +384,10 @@ class OWTreeGraph(OWTreeViewer2D):
             for node in self.scene.nodes():
                 node.backgroundBrush = brush
         elif self.regression_colors == self.COL_INSTANCE:
-            max_insts = len(self.model.instances)
+            max_insts = self.model.root.n_instances
             for node in self.scene.nodes():
                 node.backgroundBrush = QBrush(def_color.lighter(
-                    120 - 20 * len(node.node_inst.subset) / max_insts))
+                    120 - 20 * node.node_inst.n_instances / max_insts))
         elif self.regression_colors == self.COL_MEAN:
             minv = np.nanmin(self.dataset.Y)
             maxv = np.nanmax(self.dataset.Y)
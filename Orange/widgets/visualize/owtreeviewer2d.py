@@ -458,11 +458,11 @@ class OWTreeViewer2D(OWWidget):
         root_instances = len(model.instances)
         width = 3
         for edge in self.scene.edges():
-            num_inst = len(edge.node2.node_inst.subset)
+            num_inst = edge.node2.node_inst.n_instances
             if self.line_width_method == 1:
                 width = 8 * num_inst / root_instances
             elif self.line_width_method == 2:
-                width = 8 * num_inst / len(edge.node1.node_inst.subset)
+                width = 8 * num_inst / edge.node1.node_inst.n_instances
             edge.setPen(QPen(Qt.gray, width, Qt.SolidLine, Qt.RoundCap))
         self.scene.update()
 
@@ -305,8 +305,8 @@ class OWVennDiagram(widget.OWWidget):
         def items_by_key(key, input):
             attr = self.itemsetAttr(key)
             if attr is not None:
-                return [str(inst[attr]) for inst in input.table
-                        if not numpy.isnan(inst[attr])]
+                return [str(val) for val in column_values(input.table, attr)
+                        if not numpy.isnan(val)]
             else:
                 return []
 
@@ -536,7 +536,7 @@ class OWVennDiagram(widget.OWWidget):
             if self.useidentifiers:
                 attr = self.itemsetAttr(key)
                 if attr is not None:
-                    mask = list(map(match, (inst[attr] for inst in input.table)))
+                    mask = list(map(match, column_values(input.table, attr)))
                 else:
                     mask = [False] * len(input.table)
 
@@ -767,10 +767,13 @@ def reshape_wide(table, varlist, idvarlist, groupvarlist):
         (i.e. conditions).
 
     """
-    def inst_key(inst, vars):
-        return tuple(str(inst[var]) for var in vars)
+    def inst_keys(vars):
+        if not vars:
+            return [()] * len(table)
+        return list(zip(*([str(val) for val in column_values(table, var)]
+                          for var in vars)))
 
-    instance_groups = [inst_key(inst, groupvarlist) for inst in table]
+    instance_groups = inst_keys(groupvarlist)
     # A list of groups (for each element in a group the varying variable
     # will be duplicated)
     groups = list(unique(instance_groups))
@@ -778,7 +781,7 @@ def reshape_wide(table, varlist, idvarlist, groupvarlist):
 
     # A list of instance ids (subject ids)
     # Each instance in the output will correspond to one of these ids)
-    instance_ids = [inst_key(inst, idvarlist) for inst in table]
+    instance_ids = inst_keys(idvarlist)
     ids = list(unique(instance_ids))
 
     # an mapping from ids to an list of input instance indices
@@ -851,6 +854,15 @@ def reshape_wide(table, varlist, idvarlist, groupvarlist):
     return newtable
 
 
+def column_values(table, var):
+    """
+    Return a list of values (`Orange.data.Value`) of `var` in `table`
+    without constructing data instances.
+    """
+    column, _ = table.get_column_view(var)
+    return [Orange.data.Value(var, val) for val in column]
+
+
 def unique(seq):
     """
     Return an iterator over unique items of `seq`.
@@ -1,6 +1,7 @@
 from unittest.mock import Mock
 
 from Orange.classification.random_forest import RandomForestLearner
+from Orange.classification.tree import TreeForestLearner
 from Orange.data import Table
 from Orange.regression.random_forest import RandomForestRegressionLearner
 from Orange.widgets.tests.base import WidgetTest
@@ -24,6 +25,8 @@ class TestOWPythagoreanForest(WidgetTest):
             n_estimators=3)(housing_data)
         cls.housing.instances = housing_data
 
+        cls.iris_forest = TreeForestLearner(n_estimators=3)(Table('iris'))
+
     def setUp(self):
         self.widget = self.create_widget(OWPythagoreanForest)
 
@@ -141,3 +144,11 @@ class TestOWPythagoreanForest(WidgetTest):
         self.widget.ui_zoom_slider.setValue(zoom - 1)
         lw, lh = destructure_rectf(grid_item.boundingRect())
         self.assertTrue(iw > lw and ih > lh)
+
+    def test_forest_of_orange_trees(self):
+        self.send_signal('Random forest', self.iris_forest)
+        self.assertEqual(len(self.get_tree_widgets()), 3,
+                         'Incorrect number of trees when forest on input')
+
+        self.get_grid_items()[0].setSelected(True)
+        self.assertIn(self.get_output('Tree'), self.iris_forest.trees)
@@ -1,13 +1,15 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import pickle
 import unittest
 
 import numpy as np
 
 from Orange.data import Table, Domain, DiscreteVariable, ContinuousVariable
 from Orange.classification.tree import \
-    TreeModel, Node, DiscreteNode, MappedDiscreteNode, NumericNode
+    TreeModel, Node, DiscreteNode, MappedDiscreteNode, NumericNode, \
+    TreeLearner
 from Orange.widgets.visualize.utils.tree.treeadapter import TreeAdapter
 
 
@@ -76,3 +78,18 @@ class TestTreeAdapter(unittest.TestCase):
         self.assertIs(adapt.root, self.root)
         self.assertIs(adapt.domain, self.domain)
 
+
+    def test_compact_model(self):
+        data = Table("iris")
+        model = TreeLearner()(data)
+        compact = pickle.loads(pickle.dumps(model.compact()))
+        self.assertIsNone(compact.instances)
+        adapt = TreeAdapter(compact)
+        self.assertEqual(adapt.num_samples(adapt.root), len(data))
+        self.assertEqual(len(adapt.root.subset), 0)
+        for node, orig_node in zip(compact._nodes(), model._nodes()):
+            self.assertEqual(adapt.num_samples(node), len(orig_node.subset))
+            if node is not adapt.root:
+                self.assertAlmostEqual(
+                    adapt.weight(node),
+                    len(orig_node.subset) / len(orig_node.parent.subset))
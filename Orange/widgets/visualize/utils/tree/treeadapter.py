@@ -278,14 +278,16 @@ class BaseTreeAdapter(metaclass=ABCMeta):
 
 
 class TreeAdapter(BaseTreeAdapter):
-    def __init__(self, model):
+    def __init__(self, model, adjust_weight=lambda x: x):
         self.model = model
+        self._adjust_weight = adjust_weight
 
     def weight(self, node):
-        return len(node.subset) / len(node.parent.subset)
+        return self._adjust_weight(node.n_instances) / \
+            self._adjust_weight(node.parent.n_instances)
 
     def num_samples(self, node):
-        return len(node.subset)
+        return node.n_instances
 
     def parent(self, node):
         return node.parent